@@ -0,0 +1,56 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import numpy as np
+import pandas as pd
+import pytest
+from predictor.backtest import backtest, horizon_errors, make_cutoffs, prepare_frames
+
+
+@pytest.fixture
+def raw_frames():
+    rng = np.random.default_rng(0)
+    dates = pd.date_range("2022-01-01", periods=160, name="date")
+    frames = {}
+    for country, scale in (("France", 100), ("Spain", 50)):
+        trend = scale * (1 + np.sin(np.arange(160) / 20))
+        frames[country] = pd.DataFrame({'new_cases': trend + rng.normal(0, 5, 160)}, index=dates)
+    return frames
+
+
+def test_make_cutoffs():
+    assert make_cutoffs(200, 3, horizon=7) == [179, 186, 193]
+    assert make_cutoffs(200, 3, horizon=7, step=1) == [191, 192, 193]
+    # Les coupures laissant moins de min_train lignes d'entraînement sont ignorées
+    assert make_cutoffs(120, 5, horizon=10, min_train=90) == [90, 100, 110]
+
+
+def test_backtest_inline(raw_frames):
+    frames = prepare_frames(raw_frames, 'new_cases')
+    results = backtest(frames, 'new_cases', n_cutoffs=2, horizon=5, min_train=60, workers=1)
+
+    assert len(results) == 2 * 2 * 5
+    first = results.iloc[0]
+    df = frames[first['country']]
+    # Le premier jour prédit suit la coupure et est comparé à la valeur observée
+    assert first['date'] == first['cutoff'] + pd.Timedelta(days=1)
+    assert first['actual'] == pytest.approx(df.loc[first['date'], 'new_cases'])
+    assert np.allclose(results['error'], results['predicted'] - results['actual'])
+
+    errors = horizon_errors(results)
+    assert list(errors.index) == [1, 2, 3, 4, 5]
+    assert (errors['folds'] == 4).all()
+    assert (errors['RMSE'] >= errors['MAE']).all()
+    assert len(horizon_errors(results, by_country=True)) == 2 * 5
+
+
+def test_backtest_process_pool(raw_frames):
+    frames = prepare_frames(raw_frames, 'new_cases')
+    inline = backtest(frames, 'new_cases', n_cutoffs=2, horizon=3, min_train=60, workers=1)
+    pooled = backtest(frames, 'new_cases', n_cutoffs=2, horizon=3, min_train=60, workers=2)
+    pd.testing.assert_frame_equal(inline, pooled)
+
+
+def test_backtest_history_too_short(raw_frames):
+    frames = prepare_frames(raw_frames, 'new_cases')
+    with pytest.raises(ValueError):
+        backtest(frames, 'new_cases', n_cutoffs=2, horizon=7, min_train=500)
@@ -2,7 +2,9 @@ import sys, os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 import pandas as pd
 import pytest
-from predictor.data_processing import create_features
+import numpy as np
+from predictor import data_processing
+from predictor.data_processing import FeatureCache, create_features, create_features_multi, feature_matrix, features_frame
 
 @pytest.fixture
 def sample_df():
@@ -35,3 +37,103 @@ def test_create_features_partial(sample_df):
     assert "lag_1" in df_features.columns
     assert "rolling_7_mean" not in df_features.columns
     assert "day_of_week" not in df_features.columns
+
+def test_create_features_multi_matches_create_features(sample_df):
+    targets = ["new_cases", "new_deaths", "new_recovered"]
+    features = create_features_multi(sample_df, targets)
+    for target in targets:
+        expected = create_features(sample_df.copy(), target=target)
+        assert expected.index.equals(features["index"][target])
+        X = features["X"][target]
+        assert X.dtype == np.float32
+        assert X.flags["C_CONTIGUOUS"]
+        np.testing.assert_array_equal(X, expected[features["feature_names"]].to_numpy(dtype=np.float32))
+        np.testing.assert_array_equal(features["y"][target], expected[target].to_numpy())
+
+def test_create_features_multi_lignes_par_cible(sample_df):
+    # Valeurs manquantes propres à une cible : les autres cibles gardent leurs lignes
+    df = sample_df.astype(float)
+    df.loc[df.index[-5:], "new_recovered"] = np.nan
+    targets = ["new_cases", "new_recovered"]
+    features = create_features_multi(df, targets)
+    for target in targets:
+        expected = create_features(df.copy(), target=target)
+        assert expected.index.equals(features["index"][target])
+        np.testing.assert_array_equal(features["X"][target],
+                                      expected[features["feature_names"]].to_numpy(dtype=np.float32))
+    assert len(features["index"]["new_cases"]) > len(features["index"]["new_recovered"])
+
+def test_create_features_compact(sample_df):
+    default = create_features(sample_df.copy(), target="new_cases")
+    compact = create_features(sample_df.copy(), target="new_cases", compact=True)
+    assert compact["lag_1"].dtype == np.float32
+    assert compact["cases_per_100k"].dtype == np.float32
+    assert compact["month"].dtype == np.int8
+    assert compact.memory_usage().sum() < default.memory_usage().sum()
+    np.testing.assert_array_equal(compact["day_of_month"], default["day_of_month"])
+
+def test_feature_matrix_sans_copie(sample_df):
+    features = create_features_multi(sample_df, ["new_cases"])
+    names = features["feature_names"]
+    X = features["X"]["new_cases"]
+    df = features_frame(features, "new_cases")
+    block = feature_matrix(df, names)
+    assert np.shares_memory(block, X) and block.flags["C_CONTIGUOUS"]
+    np.testing.assert_array_equal(block, X)
+    # Tranche de lignes (fold de backtest) : toujours une vue
+    assert np.shares_memory(feature_matrix(df.iloc[:5], names), X)
+    # Autre ordre de colonnes ou DataFrame de create_features : copie float32 C-contiguë
+    reordered = feature_matrix(df, names[::-1])
+    assert not np.shares_memory(reordered, X)
+    np.testing.assert_array_equal(reordered, X[:, ::-1])
+    copied = feature_matrix(create_features(sample_df.copy(), "new_cases", compact=True), names)
+    assert copied.dtype == np.float32 and copied.flags["C_CONTIGUOUS"]
+    np.testing.assert_array_equal(copied, X)
+
+def test_create_features_multi_options_and_frame(sample_df):
+    features = create_features_multi(sample_df, ["new_cases"], look_back=5, use_rolling=False, use_calendar=False)
+    assert features["feature_names"][:5] == [f"lag_{i}" for i in range(1, 6)]
+    assert "rolling_7_mean" not in features["feature_names"]
+    assert len(features["index"]["new_cases"]) == len(sample_df) - 5
+    df = features_frame(features, "new_cases")
+    assert list(df.columns) == features["feature_names"] + ["new_cases"]
+    assert df["lag_1"].iloc[0] == sample_df["new_cases"].iloc[4]
+
+def _assert_same_features(actual, expected):
+    assert actual["feature_names"] == expected["feature_names"]
+    for target in expected["X"]:
+        assert actual["index"][target].equals(expected["index"][target])
+        np.testing.assert_array_equal(actual["X"][target], expected["X"][target])
+        np.testing.assert_array_equal(actual["y"][target], expected["y"][target])
+
+def test_feature_cache_hit_and_incremental_update(sample_df, monkeypatch):
+    cache = FeatureCache()
+    targets = ["new_cases", "new_deaths"]
+    first = cache.get(sample_df.iloc[:35], targets)
+    assert cache.get(sample_df.iloc[:35].copy(), targets) is first
+    assert cache.stats()["hits"] == 1
+
+    # Nouvelles lignes : seule la fin de la série est recalculée
+    lengths = []
+    original = data_processing.create_features_multi
+    monkeypatch.setattr(data_processing, "create_features_multi", lambda df, *args: lengths.append(len(df)) or original(df, *args))
+    extended = cache.get(sample_df, targets)
+    assert lengths == [30 + 5]
+    _assert_same_features(extended, create_features_multi(sample_df, targets))
+    assert cache.stats()["partial_hits"] == 1
+
+    # Une configuration différente ne réutilise pas l'entrée
+    cache.get(sample_df, targets, look_back=7)
+    assert cache.stats()["misses"] == 2
+
+def test_feature_cache_on_disk(sample_df, tmp_path):
+    targets = ["new_cases"]
+    FeatureCache(cache_dir=str(tmp_path)).get(sample_df.iloc[:35], targets)
+
+    fresh = FeatureCache(cache_dir=str(tmp_path))
+    _assert_same_features(fresh.get(sample_df.iloc[:35], targets), create_features_multi(sample_df.iloc[:35], targets))
+    assert fresh.stats()["hits"] == 1
+
+    other = FeatureCache(cache_dir=str(tmp_path))
+    _assert_same_features(other.get(sample_df, targets), create_features_multi(sample_df, targets))
+    assert other.stats()["partial_hits"] == 1
@@ -4,7 +4,12 @@ import pytest
 import pandas as pd
 from unittest.mock import MagicMock
 from sqlalchemy.engine.base import Engine
-from predictor.database import create_db_engine, load_data
+from sqlalchemy import text
+from predictor.database import (
+    create_db_engine, dispose_engines, get_engine, load_data, load_data_multi,
+    load_data_stream, load_db_config, refresh_daily_series, has_forecast_tables, save_forecasts,
+    load_forecasts,
+)
 
 def test_create_db_engine_url():
     engine = create_db_engine("user", "pass", "localhost", "mydb")
@@ -70,3 +75,238 @@ def test_load_data_sql_exception(monkeypatch, caplog):
         load_data(mock_engine, "Brazil")
 
     assert "Erreur lors du chargement des données" in caplog.text
+
+
+@pytest.fixture
+def sqlite_engine(tmp_path):
+    """Base SQLite minimale avec le schéma Country / Global_Data."""
+    engine = get_engine(load_db_config(url=f"sqlite:///{tmp_path / 'pandemia.db'}"))
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE Country (id INTEGER PRIMARY KEY, name TEXT, population BIGINT)"))
+        connection.execute(text(
+            "CREATE TABLE Global_Data (id INTEGER PRIMARY KEY, country_id INT, date DATE, "
+            "new_cases INT, new_deaths INT, new_recovered INT)"
+        ))
+        connection.execute(text("INSERT INTO Country VALUES (1, 'France', 67000000), (2, 'Spain', 47000000)"))
+    add_rows(engine, [(1, day, day * 10) for day in range(1, 4)] + [(2, day, day) for day in range(1, 3)])
+    yield engine
+    dispose_engines()
+
+def add_rows(engine, rows):
+    with engine.begin() as connection:
+        connection.execute(
+            text("INSERT INTO Global_Data (country_id, date, new_cases, new_deaths, new_recovered) "
+                 "VALUES (:country_id, :date, :cases, 0, 0)"),
+            [{"country_id": c, "date": f"2023-01-{day:02d}", "cases": cases} for c, day, cases in rows],
+        )
+
+def test_load_data_multi_splits_by_country(sqlite_engine):
+    frames = load_data_multi(sqlite_engine, ["France", "Spain"], targets=["new_cases"])
+    assert list(frames) == ["France", "Spain"]
+    assert frames["France"]["new_cases"].tolist() == [10, 20, 30]
+    assert isinstance(frames["Spain"].index, pd.DatetimeIndex)
+    assert "country" not in frames["France"].columns
+
+def test_load_data_multi_all_countries(monkeypatch):
+    captured = {}
+
+    def mock_read_sql(query, engine, params):
+        captured['params'] = params
+        return pd.DataFrame({
+            'country': ['Italy'],
+            'date': ["2023-01-01"],
+            'population': [1000],
+            'new_cases': [1],
+            'new_deaths': [0],
+            'new_recovered': [0],
+        })
+
+    monkeypatch.setattr(pd, "read_sql", mock_read_sql)
+    frames = load_data_multi(MagicMock())
+    assert list(frames) == ["Italy"]
+    assert captured['params'] is None
+
+def test_load_data_incremental_cache(sqlite_engine, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    first = load_data(sqlite_engine, "France", targets=["new_cases"], cache_dir=cache_dir)
+    assert len(first) == 3
+
+    queries = []
+    read_sql = pd.read_sql
+    monkeypatch.setattr(pd, "read_sql", lambda query, engine, params: queries.append(params) or read_sql(query, engine, params=params))
+    add_rows(sqlite_engine, [(1, 4, 40), (1, 5, 50)])
+    second = load_data(sqlite_engine, "France", targets=["new_cases"], cache_dir=cache_dir)
+    assert queries[-1]["since"] == "2023-01-03"
+    assert second["new_cases"].tolist() == [10, 20, 30, 40, 50]
+
+    # Plus de nouvelles lignes : le cache suffit
+    assert len(load_data(sqlite_engine, "France", targets=["new_cases"], cache_dir=cache_dir)) == 5
+
+    load_data(sqlite_engine, "France", targets=["new_cases"], cache_dir=cache_dir, refresh=True)
+    assert "since" not in queries[-1]
+
+def test_load_data_multi_incremental_cache(sqlite_engine, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    first = load_data_multi(sqlite_engine, ["France", "Spain"], targets=["new_cases"], cache_dir=cache_dir)
+    assert len(first["Spain"]) == 2
+
+    queries = []
+    read_sql = pd.read_sql
+    monkeypatch.setattr(pd, "read_sql", lambda query, engine, params: queries.append(params) or read_sql(query, engine, params=params))
+    add_rows(sqlite_engine, [(2, 3, 3), (2, 4, 4)])
+    second = load_data_multi(sqlite_engine, ["France", "Spain"], targets=["new_cases"], cache_dir=cache_dir)
+    assert len(queries) == 1
+    assert second["Spain"]["new_cases"].tolist() == [1, 2, 3, 4]
+    assert len(second["France"]) == 3
+
+def test_engine_factory_shares_engine_and_reads_env(monkeypatch, tmp_path):
+    config_file = tmp_path / "db.ini"
+    config_file.write_text("[database]\nhost = db.example\npool_size = 3\n")
+    monkeypatch.setenv("PANDEMIA_DB_MAX_OVERFLOW", "2")
+    monkeypatch.setenv("PANDEMIA_DB_POOL_PRE_PING", "false")
+    config = load_db_config(str(config_file))
+    assert config["host"] == "db.example"
+    assert config["pool_size"] == 3
+    assert config["max_overflow"] == 2
+    assert config["pool_pre_ping"] is False
+
+    engine = get_engine(config)
+    assert get_engine(dict(config)) is engine
+    assert engine.pool.size() == 3
+    dispose_engines()
+    assert get_engine(config) is not engine
+    dispose_engines()
+
+def _mock_chunked_read_sql(rows, calls):
+    def mock_read_sql(query, connection, params, chunksize):
+        calls.append(chunksize)
+        for start in range(0, len(rows), chunksize):
+            yield rows.iloc[start:start + chunksize].copy()
+    return mock_read_sql
+
+@pytest.fixture
+def streamed_rows():
+    return pd.DataFrame({
+        'country': ['France'] * 3 + ['Spain'] * 2,
+        'date': ["2023-01-01", "2023-01-02", "2023-01-03", "2023-01-01", "2023-01-02"],
+        'population': [67000000] * 3 + [47000000] * 2,
+        'new_cases': [10, 20, 30, 5, 6],
+    })
+
+def test_load_data_stream_concat_compact_dtypes(monkeypatch, streamed_rows):
+    calls = []
+    monkeypatch.setattr(pd, "read_sql", _mock_chunked_read_sql(streamed_rows, calls))
+    df = load_data_stream(MagicMock(), targets=["new_cases"], chunksize=2)
+    assert calls == [2]
+    assert len(df) == 5
+    assert isinstance(df.index, pd.DatetimeIndex)
+    assert df['country'].dtype == "category"
+    assert df['new_cases'].dtype == "int32"
+    assert df['population'].dtype == "uint32"
+
+def test_load_data_stream_per_country(monkeypatch, streamed_rows):
+    monkeypatch.setattr(pd, "read_sql", _mock_chunked_read_sql(streamed_rows, []))
+    frames = dict(load_data_stream(MagicMock(), targets=["new_cases"], chunksize=2, per_country=True))
+    assert list(frames) == ["France", "Spain"]
+    assert frames["France"]['new_cases'].tolist() == [10, 20, 30]
+    assert "country" not in frames["Spain"].columns
+
+def test_load_data_stream_sqlite(sqlite_engine):
+    frames = dict(load_data_stream(sqlite_engine, ["France", "Spain"], targets=["new_cases"], chunksize=2, per_country=True))
+    assert frames["France"]["new_cases"].tolist() == [10, 20, 30]
+    assert frames["Spain"]["new_cases"].dtype == "int32"
+
+def test_load_data_uses_daily_series_table(sqlite_engine, monkeypatch):
+    with sqlite_engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE Country_Daily_Series (country_id INT NOT NULL, date DATE NOT NULL, "
+            "new_cases INT, new_deaths INT, new_recovered INT, PRIMARY KEY (country_id, date))"
+        ))
+    # Deux lignes le même jour dans Global_Data : agrégées dans la série quotidienne
+    add_rows(sqlite_engine, [(1, 3, 5)])
+    assert refresh_daily_series(sqlite_engine) == 5
+
+    queries = []
+    read_sql = pd.read_sql
+    monkeypatch.setattr(pd, "read_sql", lambda query, engine, params: queries.append(str(query)) or read_sql(query, engine, params=params))
+    df = load_data(sqlite_engine, "France", targets=["new_cases"])
+    assert "Country_Daily_Series" in queries[0]
+    assert df["new_cases"].tolist() == [10, 20, 35]
+
+    add_rows(sqlite_engine, [(1, 4, 40)])
+    assert refresh_daily_series(sqlite_engine, since="2023-01-04") == 1
+    assert load_data(sqlite_engine, "France", targets=["new_cases"])["new_cases"].tolist() == [10, 20, 35, 40]
+
+
+def test_source_table_propage_les_erreurs_de_base(tmp_path):
+    from sqlalchemy import create_engine
+    from sqlalchemy.exc import OperationalError
+    from predictor.database import _source_table
+    # Base inaccessible : l'erreur n'est pas masquée par un repli sur Global_Data
+    engine = create_engine(f"sqlite:///{tmp_path / 'absent' / 'db.sqlite'}")
+    with pytest.raises(OperationalError):
+        _source_table(engine)
+    assert _source_table(MagicMock()) == "Global_Data"
+
+
+def create_forecast_tables(engine):
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE Model_Run (run_id TEXT, country_id INT, target TEXT, created_at DATETIME, "
+            "strategy TEXT, mae REAL, rmse REAL, r2 REAL, metrics TEXT, PRIMARY KEY (run_id, country_id, target))"
+        ))
+        connection.execute(text(
+            "CREATE TABLE Forecast (run_id TEXT, country_id INT, target TEXT, date DATE, value REAL, "
+            "PRIMARY KEY (run_id, country_id, target, date))"
+        ))
+
+
+def test_save_forecasts_single_transaction(sqlite_engine, monkeypatch):
+    assert not has_forecast_tables(sqlite_engine)
+    create_forecast_tables(sqlite_engine)
+    assert has_forecast_tables(sqlite_engine)
+
+    index = pd.date_range("2023-01-04", periods=3, name="date")
+    predictions = {
+        country: {target: pd.DataFrame({f"predicted_{target}": [1.0, 2.0, 3.0]}, index=index)
+                  for target in ("new_cases", "new_deaths")}
+        for country in ("France", "Spain", "Atlantis")
+    }
+    metrics = {"France": {"new_cases": {"MAE": 1.5, "RMSE": 2.0, "R2": 0.9, "training_mode": "full"}}}
+
+    statements = []
+    monkeypatch.setattr(
+        sqlite_engine.dialect, "do_executemany",
+        lambda cursor, statement, parameters, context=None: (statements.append(statement),
+                                                              cursor.executemany(statement, parameters)),
+    )
+    run_id = save_forecasts(sqlite_engine, predictions, metrics, strategy="recursive")
+    # Un seul executemany par table, pour tous les pays
+    assert len(statements) == 2
+
+    df = load_forecasts(sqlite_engine)
+    assert set(df["country"]) == {"France", "Spain"}  # Atlantis absent de Country
+    assert len(df) == 12 and (df["run_id"] == run_id).all()
+    assert df[df["country"] == "France"]["date"].iloc[0] == pd.Timestamp("2023-01-04")
+    assert len(load_forecasts(sqlite_engine, run_id=run_id, country_names=["Spain"])) == 6
+
+    with sqlite_engine.connect() as connection:
+        runs = connection.execute(text("SELECT target, mae, r2, metrics, strategy FROM Model_Run "
+                                       "WHERE country_id = 1 ORDER BY target")).all()
+    assert runs[0][1:3] == (1.5, 0.9) and '"training_mode": "full"' in runs[0][3]
+    assert runs[0][4] == "recursive"
+    assert runs[1][1] is None and runs[1][3] is None  # new_deaths sans métriques
+
+
+def test_load_forecasts_latest_run_is_deterministic(sqlite_engine):
+    create_forecast_tables(sqlite_engine)
+    index = pd.date_range("2023-01-04", periods=2, name="date")
+    first, second = "0" * 32, "f" * 32
+    for run_id, value in ((second, 2.0), (first, 1.0)):
+        save_forecasts(sqlite_engine, {"France": {"new_cases": pd.DataFrame({"predicted_new_cases": [value] * 2},
+                                                                            index=index)}}, run_id=run_id)
+    # Deux exécutions enregistrées dans la même seconde (DATETIME sans microsecondes)
+    with sqlite_engine.begin() as connection:
+        connection.execute(text("UPDATE Model_Run SET created_at = '2023-01-04 12:00:00'"))
+    assert (load_forecasts(sqlite_engine)["run_id"] == second).all()
+    assert (load_forecasts(sqlite_engine, run_id=first)["value"] == 1.0).all()
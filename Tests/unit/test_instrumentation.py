@@ -0,0 +1,81 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import json
+import pstats
+import time
+import pytest
+from predictor import instrumentation
+
+
+@pytest.fixture
+def instrumented():
+    instrumentation.reset()
+    instrumentation.configure(memory=True, profile=True)
+    yield instrumentation
+    instrumentation.configure(enabled=False)
+    instrumentation.reset()
+
+
+@instrumentation.timed()
+def allocate(n):
+    return [0] * n
+
+
+def test_disabled_records_nothing():
+    instrumentation.configure(enabled=False)
+    instrumentation.reset()
+    with instrumentation.stage("outer"):
+        assert allocate(10) == [0] * 10
+    assert instrumentation.records() == []
+
+
+def test_disabled_path_skips_stage(monkeypatch):
+    instrumentation.configure(enabled=False)
+    instrumentation.reset()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("_Stage ne doit pas être créé quand l'instrumentation est désactivée")
+
+    monkeypatch.setattr(instrumentation, "_Stage", fail)
+    assert instrumentation.stage("outer", country="France") is instrumentation._NULL_STAGE
+    assert instrumentation.timed("plain")(lambda x: x + 1)(1) == 2
+    assert instrumentation.records() == []
+
+
+def test_nested_stages_memory_and_labels(instrumented):
+    with instrumented.stage("outer", country="France"):
+        allocate(1_000_000)
+    records = {r['stage']: r for r in instrumented.records()}
+    assert records['allocate']['depth'] == 1
+    assert records['outer']['country'] == "France"
+    # Le pic de l'étape englobante inclut celui de l'étape imbriquée (~8 Mo)
+    assert records['allocate']['peak_bytes'] > 7_000_000
+    assert records['outer']['peak_bytes'] >= records['allocate']['peak_bytes']
+
+    summary = instrumented.summary()
+    assert summary['outer']['calls'] == 1
+    assert list(summary) == ['outer', 'allocate']
+
+
+def test_reports_and_profile(instrumented, tmp_path):
+    with instrumented.stage("fast"):
+        pass
+    with instrumented.stage("slow"):
+        time.sleep(0.02)
+
+    # Mesures d'un autre processus (pool) fusionnées avec leurs labels
+    worker = {'records': [{'stage': 'train_model', 'seconds': 0.01, 'depth': 0}], 'slowest': None}
+    instrumented.merge(worker, country="Spain", target="new_cases")
+
+    report = json.loads(open(instrumented.write_report(str(tmp_path / "run.json"), run_seconds=1.0)).read())
+    assert report['slowest_profiled_stage']['stage'] == "slow"
+    assert report['stages']['train_model']['calls'] == 1
+    assert {'country': 'Spain', 'target': 'new_cases'}.items() <= report['records'][-1].items()
+
+    prom = open(instrumented.write_report(str(tmp_path / "run.prom"), run_seconds=1.0)).read()
+    assert 'pandemia_stage_seconds{stage="slow"}' in prom
+    assert "pandemia_run_seconds 1.0" in prom
+
+    stage, seconds = instrumented.dump_profile(str(tmp_path / "slow.prof"))
+    assert stage == "slow" and seconds >= 0.02
+    assert pstats.Stats(str(tmp_path / "slow.prof")).total_calls > 0
@@ -0,0 +1,69 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+import pytest
+import main
+
+
+@pytest.mark.parametrize("threads, workers", [(8, None), (8, 3), (8, 20), (1, 4), (None, None), (0, 2)])
+def test_split_threads(threads, workers):
+    n_workers, nthread = main.split_threads(threads, workers)
+    budget = max(1, threads or os.cpu_count() or 1)
+    assert n_workers >= 1 and nthread >= 1
+    assert n_workers * nthread <= budget
+    if workers is None:
+        # Sans --workers, un processus par thread et un thread XGBoost par processus
+        assert (n_workers, nthread) == (budget, 1)
+
+
+def test_read_countries_file(tmp_path):
+    path = tmp_path / "countries.txt"
+    path.write_text("# Europe\nFrance\n\n  Spain  \n   \n  # commentaire indenté\nCôte d'Ivoire\n", encoding="utf-8")
+    assert main.read_countries_file(str(path)) == ["France", "Spain", "Côte d'Ivoire"]
+
+
+@pytest.fixture
+def batch_args(tmp_path):
+    return SimpleNamespace(
+        threads=2, workers=2, cache_dir=str(tmp_path / "cache"), refresh=False, feature_cache_dir=None,
+        days=3, no_train=False, tune=False, model_format="joblib", tuner="halving", tune_budget_seconds=None,
+        hyperparam_store=None, hyperparam_max_age_days=30, incremental=False, full_retrain_days=7,
+        strategy="recursive", write_files=False, instrumentation=None, no_plots=True, plot_format="png",
+        db_output=False,
+    )
+
+
+def test_run_batch_collects_job_errors(monkeypatch, batch_args, capsys):
+    dates = pd.date_range("2023-01-01", periods=60)
+    frames = {country: pd.DataFrame({"new_cases": np.arange(60.0), "new_deaths": np.arange(60.0) / 10}, index=dates)
+              for country in ("France", "Spain")}
+    monkeypatch.setattr("predictor.database.load_data_multi", lambda *args, **kwargs: frames)
+
+    def fake_job(country, df, target, days_ahead, *args):
+        if (country, target) == ("Spain", "new_deaths"):
+            return {'country': country, 'target': target, 'preds': None, 'metrics': None,
+                    'error': "échec simulé", 'duration': 0.0}
+        preds = pd.DataFrame({f'predicted_{target}': np.zeros(days_ahead)},
+                             index=pd.date_range(df.index[-1], periods=days_ahead + 1)[1:])
+        return {'country': country, 'target': target, 'preds': preds, 'metrics': {'MAE': 0.0},
+                'error': None, 'duration': 0.0}
+
+    stored = {}
+    monkeypatch.setattr(main, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(main, "run_job", fake_job)
+    monkeypatch.setattr(main, "save_results", lambda *args, **kwargs: None)
+    monkeypatch.setattr(main, "store_results",
+                        lambda engine, predictions, metrics, args, strategy: stored.update(predictions))
+
+    main.run_batch(None, ["France", "Spain"], ["new_cases", "new_deaths"], batch_args)
+
+    # L'échec d'un job n'interrompt pas les autres
+    assert set(stored) == {"France", "Spain"}
+    assert list(stored["France"]) == ["new_cases", "new_deaths"]
+    assert list(stored["Spain"]) == ["new_cases"]
+    out = capsys.readouterr().out
+    assert "Erreur pour Spain / new_deaths: échec simulé" in out
+    assert "4 jobs" in out
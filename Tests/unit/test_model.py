@@ -2,10 +2,13 @@ import sys, os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 import os
 import shutil
+import joblib
+import json
+import xgboost as xgb
 import pandas as pd
 import numpy as np
 import pytest
-from predictor.model import PandemicModel  # Remplace par le vrai nom du fichier si différent
+from predictor.model import PandemicModel, ModelRegistry  # Remplace par le vrai nom du fichier si différent
 
 @pytest.fixture
 def sample_df():
@@ -42,6 +45,9 @@ def test_train_model_and_metrics(model, sample_df):
     assert "MAE" in metrics
     assert "RMSE" in metrics
     assert "R2" in metrics
+    # Entraîné sur une matrice NumPy : les noms des features restent portés par le booster
+    assert list(trained_model.feature_names_in_) == features
+    assert trained_model.predict(sample_df[features]).shape == (len(sample_df),)
 
 def test_save_and_load_model(model, sample_df):
     features = ["lag_1", "lag_2", "rolling_7_mean", "rolling_30_mean", "day_of_week", "day_of_month", "month"]
@@ -71,3 +77,364 @@ def test_predict_multiple_targets(model, sample_df):
     assert "new_cases" in predictions
     assert "new_deaths" in predictions
     assert predictions["new_cases"].shape[0] == 3
+
+def _legacy_predict_future(model, df, target, feature_names, days_ahead, look_back=30):
+    """Boucle pandas historique, utilisée comme référence pour les lags."""
+    predictions = []
+    last_data = df.iloc[-1:].copy()
+    for _ in range(days_ahead):
+        pred = model.predict(last_data[feature_names])[0]
+        predictions.append(pred)
+        new_row = last_data.copy()
+        for lag in range(look_back, 1, -1):
+            new_row[f'lag_{lag}'] = new_row[f'lag_{lag-1}']
+        new_row['lag_1'] = pred
+        last_data = new_row
+    return np.array(predictions)
+
+def test_predict_future_matches_legacy_lags(model, sample_df):
+    features = [f"lag_{i}" for i in range(1, 31)]
+    trained_model, _ = model.train_model(sample_df, "new_cases", features)
+    model.save_model(trained_model, "new_cases")
+    preds = model.predict_future(sample_df, "new_cases", features, days_ahead=10)
+    expected = _legacy_predict_future(trained_model, sample_df, "new_cases", features, 10)
+    np.testing.assert_array_equal(preds["predicted_new_cases"].to_numpy(), expected)
+    assert preds.index[0] == sample_df.index.max() + pd.Timedelta(days=1)
+
+class _RecordingModel:
+    """Modèle factice qui enregistre les features reçues et prédit une constante."""
+    def __init__(self, value):
+        self.value = value
+        self.inputs = []
+
+    def predict(self, X):
+        self.inputs.append(np.array(X, copy=True))
+        return np.full(len(X), self.value)
+
+def test_predict_future_updates_rolling_and_calendar(model, sample_df, monkeypatch):
+    features = ["lag_1", "rolling_7_mean", "rolling_30_mean", "day_of_week", "day_of_month", "month"]
+    stub = _RecordingModel(100.0)
+    monkeypatch.setattr(model, "load_model", lambda target: stub)
+    model.predict_future(sample_df, "new_cases", features, days_ahead=3)
+
+    history = sample_df["new_cases"].to_numpy(dtype=float)
+    second, third = stub.inputs[1][0], stub.inputs[2][0]
+    assert second[0] == 100.0
+    assert second[1] == pytest.approx(np.mean(list(history[-6:]) + [100.0]))
+    assert second[2] == pytest.approx(np.mean(list(history[-29:]) + [100.0]))
+    assert third[1] == pytest.approx(np.mean(list(history[-5:]) + [100.0, 100.0]))
+    next_date = sample_df.index.max() + pd.Timedelta(days=2)
+    assert list(second[3:]) == [next_date.dayofweek, next_date.day, next_date.month]
+
+def test_predict_future_historique_trop_court(model, sample_df, monkeypatch):
+    monkeypatch.setattr(model, "load_model", lambda target: _RecordingModel(100.0))
+    # rolling_30_mean exige 30 valeurs observées
+    with pytest.raises(ValueError):
+        model.predict_future(sample_df.iloc[-20:], "new_cases", ["lag_1", "rolling_30_mean"], days_ahead=3)
+    preds = model.predict_future(sample_df.iloc[-20:], "new_cases", ["lag_1", "rolling_7_mean"], days_ahead=3)
+    assert len(preds) == 3
+
+def test_predict_future_batch_matches_single_series(model, sample_df):
+    features = [f"lag_{i}" for i in range(1, 31)] + ["rolling_7_mean", "day_of_week", "month"]
+    trained_model, _ = model.train_model(sample_df, "new_cases", features)
+    model.save_model(trained_model, "new_cases")
+    other_df = sample_df.iloc[:45].copy()
+    other_df["new_cases"] = other_df["new_cases"] * 2
+
+    batch = model.predict_future_batch({"France": sample_df, "Spain": other_df}, "new_cases", features, days_ahead=6)
+    assert list(batch) == ["France", "Spain"]
+    for name, df in (("France", sample_df), ("Spain", other_df)):
+        single = model.predict_future(df, "new_cases", features, days_ahead=6)
+        pd.testing.assert_frame_equal(batch[name], single)
+
+def test_predict_future_batch_single_predict_per_step(model, sample_df, monkeypatch):
+    stub = _RecordingModel(1.0)
+    monkeypatch.setattr(model, "load_model", lambda target: stub)
+    dfs = {f"country_{i}": sample_df for i in range(5)}
+    model.predict_future_batch(dfs, "new_cases", ["lag_1", "lag_2"], days_ahead=4)
+    assert len(stub.inputs) == 4
+    assert all(X.shape == (5, 2) for X in stub.inputs)
+
+def test_load_model_uses_cache(model_dir, sample_df, monkeypatch):
+    registry = ModelRegistry()
+    manager = PandemicModel(model_dir=str(model_dir), registry=registry)
+    trained_model, _ = manager.train_model(sample_df, "new_cases", ["lag_1", "lag_2"])
+    manager.save_model(trained_model, "new_cases")
+
+    calls = []
+    original_load = joblib.load
+    monkeypatch.setattr(joblib, "load", lambda path: calls.append(path) or original_load(path))
+    assert manager.load_model("new_cases") is trained_model
+    manager.predict_future(sample_df, "new_cases", ["lag_1", "lag_2"], days_ahead=3)
+    assert calls == []
+    assert registry.stats()["hits"] == 2
+
+    # Un fichier modifié sur disque est rechargé
+    path = model_dir / "new_cases_model.pkl"
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    reloaded = manager.load_model("new_cases")
+    assert reloaded is not trained_model
+    assert len(calls) == 1
+    assert registry.misses == 1
+
+def test_model_registry_lru_eviction(tmp_path):
+    registry = ModelRegistry(max_entries=2)
+    loads = []
+    for name in ["a", "b", "c"]:
+        (tmp_path / name).write_text(name)
+    loader = lambda path: loads.append(path) or path
+    registry.get("a", str(tmp_path / "a"), loader)
+    registry.get("b", str(tmp_path / "b"), loader)
+    registry.get("a", str(tmp_path / "a"), loader)
+    registry.get("c", str(tmp_path / "c"), loader)
+    assert registry.evictions == 1
+    registry.get("a", str(tmp_path / "a"), loader)
+    registry.get("b", str(tmp_path / "b"), loader)
+    assert len(loads) == 4
+    assert registry.stats() == {"hits": 2, "misses": 4, "evictions": 2, "entries": 2, "bytes": 2}
+
+def test_save_and_load_native_format(model_dir, sample_df):
+    features = ["lag_1", "lag_2", "rolling_7_mean", "day_of_week"]
+    manager = PandemicModel(model_dir=str(model_dir), registry=ModelRegistry(), model_format="ubj")
+    trained_model, _ = manager.train_model(sample_df, "new_cases", features)
+    manager.save_model(trained_model, "new_cases")
+    assert (model_dir / "new_cases_model.ubj").exists()
+    manifest = json.loads((model_dir / "new_cases_model.json").read_text())
+    assert manifest["feature_names"] == features
+
+    # Rechargement à froid depuis le disque : mêmes prédictions que le XGBRegressor
+    cold = PandemicModel(model_dir=str(model_dir), registry=ModelRegistry(), model_format="ubj")
+    assert isinstance(cold.load_model("new_cases"), xgb.Booster)
+    np.testing.assert_array_equal(
+        cold.load_model("new_cases").inplace_predict(sample_df[features].to_numpy(), iteration_range=(0, trained_model.best_iteration + 1)),
+        trained_model.predict(sample_df[features]),
+    )
+
+def test_migrate_pickle_to_native_format(model_dir, sample_df):
+    features = ["lag_1", "lag_2"]
+    legacy = PandemicModel(model_dir=str(model_dir), registry=ModelRegistry())
+    trained_model, _ = legacy.train_model(sample_df, "new_cases", features)
+    legacy.save_model(trained_model, "new_cases")
+    expected = legacy.predict_future(sample_df, "new_cases", features, days_ahead=4)
+
+    native = PandemicModel(model_dir=str(model_dir), registry=ModelRegistry(), model_format="ubj")
+    assert native.migrate_models() == ["new_cases"]
+    assert (model_dir / "new_cases_model.ubj").exists()
+    pd.testing.assert_frame_equal(native.predict_future(sample_df, "new_cases", features, days_ahead=4), expected)
+
+
+def test_tuner_halving_trouve_des_parametres(sample_df):
+    from predictor.tuning import PARAM_SPACE, Tuner
+    features = [c for c in sample_df.columns if c.startswith("lag_")]
+    tuner = Tuner(mode="halving", n_splits=3, min_rounds=5, max_rounds=45, n_candidates=9,
+                  early_stopping_rounds=5)
+    best_params, summary = tuner.tune(sample_df[features], sample_df["new_cases"])
+
+    assert set(best_params) == set(PARAM_SPACE)
+    # 9 candidats à 5 rounds, 3 à 15, 1 à 45
+    assert [e['rounds'] for e in summary['evaluations']].count(45) == 1
+    assert len(summary['evaluations']) == 13
+    # Les meilleurs paramètres sont proposés en premier au tuning suivant
+    assert tuner.warm_start[0] == best_params
+
+
+def test_tuner_respecte_le_budget(sample_df):
+    from predictor.tuning import Tuner
+    features = [c for c in sample_df.columns if c.startswith("lag_")]
+    tuner = Tuner(mode="hyperband", budget_seconds=0.5, n_splits=3, max_rounds=2000,
+                  min_rounds=10, early_stopping_rounds=2000)
+    best_params, summary = tuner.tune(sample_df[features], sample_df["new_cases"])
+    assert summary['duration'] < 2
+
+
+def test_tuner_tpe(sample_df):
+    pytest.importorskip("optuna")
+    from predictor.tuning import Tuner
+    features = [c for c in sample_df.columns if c.startswith("lag_")]
+    warm = {'max_depth': 3, 'learning_rate': 0.1, 'subsample': 1.0, 'colsample_bytree': 1.0}
+    tuner = Tuner(mode="tpe", n_splits=3, max_rounds=20, n_candidates=4, early_stopping_rounds=5,
+                  warm_start=[warm])
+    best_params, summary = tuner.tune(sample_df[features], sample_df["new_cases"])
+    assert summary['evaluations'][0]['params'] == warm
+    assert len(summary['evaluations']) == 4
+
+
+def test_train_model_avec_tuning(model, sample_df):
+    from predictor.tuning import Tuner
+    features = [c for c in sample_df.columns if c.startswith("lag_")]
+    model.tuner = Tuner(n_splits=3, min_rounds=5, max_rounds=15, n_candidates=3, early_stopping_rounds=5)
+    trained, metrics = model.train_model(sample_df, "new_cases", features, tune_hyperparams=True)
+    assert model.best_params is not None
+    assert trained.get_params()['max_depth'] == model.best_params['max_depth']
+    assert "RMSE" in metrics
+
+
+def test_hyperparam_store_reutilise_les_parametres(model_dir, sample_df, tmp_path):
+    from predictor.tuning import HyperparamStore, Tuner
+    features = [c for c in sample_df.columns if c.startswith("lag_")]
+    store = HyperparamStore(str(tmp_path / "hyperparams.sqlite"))
+    tuner = Tuner(n_splits=3, min_rounds=5, max_rounds=15, n_candidates=3, early_stopping_rounds=5)
+    manager = PandemicModel(model_dir=str(model_dir), tuner=tuner, hyperparam_store=store, country="France")
+    manager.train_model(sample_df, "new_cases", features, tune_hyperparams=True)
+    tuned = manager.best_params
+
+    entry = store.get("France", "new_cases", features)
+    assert entry['params'] == tuned
+    assert entry['n_rows'] == len(sample_df) and entry['n_evaluations'] > 0
+    import sqlite3
+    with sqlite3.connect(store.path) as connection:
+        assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    # Nouveau processus : le store suffit, aucun tuning n'est relancé
+    def fail(*args, **kwargs):
+        raise AssertionError("tuning relancé")
+    tuner.tune = fail
+    other = PandemicModel(model_dir=str(model_dir), tuner=tuner,
+                          hyperparam_store=HyperparamStore(store.path), country="France")
+    other.train_model(sample_df, "new_cases", features, tune_hyperparams=True)
+    assert other.best_params == tuned
+
+
+def test_hyperparam_store_obsolescence(sample_df, tmp_path):
+    from predictor.tuning import HyperparamStore
+    store = HyperparamStore(str(tmp_path / "hyperparams.sqlite"), max_new_rows=0.2, max_drift=1.0)
+    window = HyperparamStore.window(sample_df, "new_cases")
+    store.put("France", "new_cases", ["lag_1"], {'max_depth': 3}, window)
+    assert store.get("France", "new_cases", ["lag_1"], window) is not None
+    # Autre configuration de features
+    assert store.get("France", "new_cases", ["lag_1", "lag_2"], window) is None
+    # Trop de nouvelles lignes
+    assert store.get("France", "new_cases", ["lag_1"], dict(window, n_rows=window['n_rows'] * 2)) is None
+    # Dérive de la cible
+    drifted = dict(window, target_mean=window['target_mean'] + 3 * window['target_std'])
+    assert store.get("France", "new_cases", ["lag_1"], drifted) is None
+    # Âge
+    old = HyperparamStore(store.path, max_age_days=0)
+    assert old.get("France", "new_cases", ["lag_1"], window) is None
+
+
+def test_train_model_incremental(model_dir, sample_df):
+    features = [c for c in sample_df.columns if c.startswith("lag_")]
+    manager = PandemicModel(model_dir=str(model_dir), country="France")
+    full_model, full_metrics = manager.train_model(sample_df, "new_cases", features, incremental=True)
+    assert full_metrics['training_mode'] == "full"
+    manager.save_model(full_model, "new_cases")
+    assert os.path.exists(model_dir / "new_cases_training.json")
+
+    # Nouveau processus : l'état du dernier entraînement complet est relu sur disque
+    other = PandemicModel(model_dir=str(model_dir), country="France")
+    model, metrics = other.train_model(sample_df, "new_cases", features, incremental=True,
+                                       extra_rounds=10, drift_threshold=10.0)
+    assert metrics['training_mode'] == "incremental"
+    assert metrics['full_RMSE'] == pytest.approx(full_metrics['RMSE'])
+    previous_trees = int(full_model.get_booster().attr('best_iteration')) + 1
+    assert previous_trees < model.get_booster().num_boosted_rounds() <= previous_trees + 10
+
+
+def test_train_model_incremental_reentrainement_complet(model_dir, sample_df):
+    features = [c for c in sample_df.columns if c.startswith("lag_")]
+    manager = PandemicModel(model_dir=str(model_dir), country="France")
+    model, _ = manager.train_model(sample_df, "new_cases", features)
+    manager.save_model(model, "new_cases")
+
+    # Dérive de l'erreur au-delà du seuil
+    manager.training_states["new_cases"]['full_RMSE'] = 1e-6
+    _, metrics = manager.train_model(sample_df, "new_cases", features, incremental=True)
+    assert metrics['training_mode'] == "full"
+    manager.save_model(model, "new_cases")
+
+    # Réentraînement complet planifié
+    manager.training_states["new_cases"]['last_full_at'] = "2000-01-01T00:00:00+00:00"
+    _, metrics = manager.train_model(sample_df, "new_cases", features, incremental=True, drift_threshold=10.0)
+    assert metrics['training_mode'] == "full"
+
+    # Autre pays
+    _, metrics = PandemicModel(model_dir=str(model_dir), country="Spain").train_model(
+        sample_df, "new_cases", features, incremental=True, drift_threshold=10.0)
+    assert metrics['training_mode'] == "full"
+
+
+def test_default_model_hist_et_threads(model_dir):
+    params = PandemicModel(model_dir=str(model_dir), n_jobs=2)._get_default_model().get_params()
+    assert params['tree_method'] == "hist"
+    assert params['n_jobs'] == 2
+
+
+def test_tuner_nthread(sample_df):
+    from predictor.tuning import Tuner
+    features = [c for c in sample_df.columns if c.startswith("lag_")]
+    tuner = Tuner(n_splits=3, min_rounds=5, max_rounds=5, n_candidates=2, early_stopping_rounds=5, nthread=1)
+    folds = tuner._folds(sample_df[features], sample_df["new_cases"])
+    assert all(isinstance(dtrain, xgb.QuantileDMatrix) for dtrain, _ in folds)
+    best_params, _ = tuner.tune(sample_df[features], sample_df["new_cases"])
+    assert best_params is not None
+
+
+@pytest.mark.parametrize("model_format", ["joblib", "ubj"])
+def test_global_model(model_dir, sample_df, model_format):
+    features = [c for c in sample_df.columns if c.startswith("lag_") or c.startswith("rolling_")]
+    dfs = {"France": sample_df, "Spain": sample_df * 2}
+    populations = {"France": 68_000_000, "Spain": 48_000_000}
+    manager = PandemicModel(model_dir=str(model_dir), model_format=model_format)
+    model, metrics = manager.train_global_model(dfs, "new_cases", features, populations=populations)
+    assert metrics['training_mode'] == "global"
+    assert set(metrics['per_country']) == {"France", "Spain"}
+    assert model.get_booster().feature_types[-1] == "c"
+    manager.save_global_model(model, "new_cases")
+    assert (model_dir / f"new_cases_global_model.{'pkl' if model_format == 'joblib' else 'ubj'}").exists()
+
+    # Nouveau processus : un seul chargement de booster pour tous les pays
+    other = PandemicModel(model_dir=str(model_dir), registry=ModelRegistry(), model_format=model_format)
+    preds = other.predict_future_global(dfs, "new_cases", features, populations=populations, days_ahead=5)
+    assert set(preds) == {"France", "Spain"}
+    assert len(preds["France"]) == 5
+    assert other.registry.misses == 1
+
+    # Même résultat pays par pays
+    single = other.predict_future_global({"Spain": dfs["Spain"]}, "new_cases", features,
+                                         populations=populations, days_ahead=5)
+    np.testing.assert_allclose(single["Spain"].values, preds["Spain"].values, rtol=1e-5)
+
+    with pytest.raises(ValueError):
+        other.predict_future_global(dfs, "new_cases", features, days_ahead=5)
+
+
+def test_global_model_metrics_follow_dfs_order(model_dir, sample_df):
+    features = [c for c in sample_df.columns if c.startswith("lag_") or c.startswith("rolling_")]
+    populations = {"Zambia": 20_000_000, "Andorra": 80_000}
+    # Ordre d'insertion non trié (comme load_data_multi avec --countries) et populations très différentes
+    dfs = {"Zambia": sample_df * 250, "Andorra": sample_df}
+    manager = PandemicModel(model_dir=str(model_dir))
+    _, metrics = manager.train_global_model(dfs, "new_cases", features, populations=populations)
+    _, sorted_metrics = manager.train_global_model(dict(sorted(dfs.items())), "new_cases", features,
+                                                   populations=populations)
+    per_country = metrics['per_country']
+    assert per_country["Andorra"]['MAE'] < per_country["Zambia"]['MAE']
+    for country in dfs:
+        assert per_country[country]['MAE'] == pytest.approx(
+            sorted_metrics['per_country'][country]['MAE'], rel=0.2)
+    assert metrics['MAE'] == pytest.approx(sorted_metrics['MAE'], rel=0.2)
+
+
+@pytest.mark.parametrize("model_format", ["joblib", "ubj"])
+def test_direct_model(model_dir, sample_df, model_format):
+    features = [c for c in sample_df.columns if c.startswith("lag_")]
+    manager = PandemicModel(model_dir=str(model_dir), model_format=model_format)
+    model, metrics = manager.train_direct_model(sample_df, "new_cases", features, horizon=5)
+    assert metrics['training_mode'] == "direct"
+    assert all(f"MAE_h{h}" in metrics for h in range(1, 6))
+    manager.save_direct_model(model, "new_cases")
+
+    other = PandemicModel(model_dir=str(model_dir), registry=ModelRegistry(), model_format=model_format)
+    preds = other.predict_future_direct(sample_df, "new_cases", features, days_ahead=3)
+    assert list(preds.index) == list(pd.date_range(sample_df.index[-1] + pd.Timedelta(days=1), periods=3))
+    expected = model.predict(sample_df[features].iloc[-1:])[0, :3]
+    np.testing.assert_allclose(preds["predicted_new_cases"].to_numpy(), expected, rtol=1e-5)
+
+    batch = other.predict_future_direct({"a": sample_df, "b": sample_df.iloc[:-1]}, "new_cases", features, 3)
+    np.testing.assert_allclose(batch["a"].values, preds.values)
+
+    # Horizon demandé plus long que celui du modèle
+    with pytest.raises(ValueError):
+        other.predict_future_direct(sample_df, "new_cases", features, days_ahead=10)
@@ -0,0 +1,127 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import asyncio
+import json
+import threading
+import time
+import urllib.request
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import text
+from predictor.database import dispose_engines, get_engine, load_data, load_db_config
+from predictor.data_processing import create_features_multi, features_frame
+from predictor.model import ModelRegistry, PandemicModel
+from predictor.service import ForecastService, serve
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """Base SQLite avec 90 jours de données pour la France."""
+    engine = get_engine(load_db_config(url=f"sqlite:///{tmp_path / 'service.db'}"))
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE Country (id INTEGER PRIMARY KEY, name TEXT, population BIGINT)"))
+        connection.execute(text(
+            "CREATE TABLE Global_Data (id INTEGER PRIMARY KEY, country_id INT, date DATE, "
+            "new_cases INT, new_deaths INT, new_recovered INT)"
+        ))
+        connection.execute(text("INSERT INTO Country VALUES (1, 'France', 67000000)"))
+        rng = np.random.default_rng(0)
+        connection.execute(
+            text("INSERT INTO Global_Data (country_id, date, new_cases, new_deaths, new_recovered) "
+                 "VALUES (1, :date, :cases, :deaths, 0)"),
+            [{"date": d.date().isoformat(), "cases": int(rng.integers(100, 1000)), "deaths": int(rng.integers(0, 10))}
+             for d in pd.date_range("2023-01-01", periods=90)],
+        )
+    yield engine
+    dispose_engines()
+
+
+@pytest.fixture
+def service(engine, tmp_path):
+    """Service avec un modèle new_cases entraîné dans models/France/."""
+    df = load_data(engine, "France")
+    features = features_frame(create_features_multi(df, ["new_cases"]), "new_cases")
+    manager = PandemicModel(model_dir=str(tmp_path / "models" / "France"), registry=ModelRegistry())
+    feature_names = [c for c in features.columns if c != "new_cases"]
+    model, _ = manager.train_model(features, "new_cases", feature_names)
+    manager.save_model(model, "new_cases")
+    service = ForecastService(engine, model_dir=str(tmp_path / "models"))
+    service.expected = manager.predict_future(features, "new_cases", feature_names, days_ahead=5)
+    yield service
+    service.close()
+
+
+def call(app, path, query=""):
+    """Appelle l'application ASGI et retourne (statut, JSON)."""
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {'type': 'http', 'method': 'GET', 'path': path, 'query_string': query.encode()}
+    asyncio.run(app(scope, receive, send))
+    return messages[0]['status'], json.loads(messages[1]['body'])
+
+
+def test_forecast(service):
+    status, body = call(service, "/forecast", "country=France&target=new_cases&days=5")
+    assert status == 200
+    assert [p['date'] for p in body['predictions']] == [d.date().isoformat() for d in service.expected.index]
+    np.testing.assert_allclose([p['value'] for p in body['predictions']],
+                               service.expected['predicted_new_cases'].clip(lower=0), rtol=1e-5)
+
+
+def test_forecast_errors(service):
+    assert call(service, "/forecast", "target=new_cases")[0] == 400
+    assert call(service, "/forecast", "country=France&days=abc")[0] == 400
+    assert call(service, "/forecast", "country=France&days=1000")[0] == 400
+    assert call(service, "/forecast", "country=Atlantis")[0] == 404
+    # Données présentes mais pas de modèle pour cette cible
+    assert call(service, "/forecast", "country=France&target=new_deaths")[0] == 404
+    assert call(service, "/unknown")[0] == 404
+
+
+def test_forecast_rejects_path_countries(service):
+    from urllib.parse import quote
+    for country in ("..", "../..", "/etc", "France/../..", "..\\models"):
+        assert call(service, "/forecast", f"country={quote(country)}")[0] == 400
+
+
+def test_concurrent_requests_are_coalesced(service):
+    calls = []
+    original = service._forecast_sync
+
+    def slow_forecast(*args):
+        calls.append(args)
+        time.sleep(0.2)
+        return original(*args)
+
+    service._forecast_sync = slow_forecast
+
+    async def run():
+        return await asyncio.gather(*[service.forecast("France", "new_cases", 5) for _ in range(10)])
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert service.coalesced == 9
+    assert all(result == results[0] for result in results)
+
+
+def test_http_server(service):
+    ready = threading.Event()
+    port = []
+
+    def run():
+        asyncio.run(serve(service, port=0, ready=lambda p: (port.append(p), ready.set())))
+
+    threading.Thread(target=run, daemon=True).start()
+    assert ready.wait(5)
+    with urllib.request.urlopen(f"http://127.0.0.1:{port[0]}/forecast?country=France&days=3") as response:
+        body = json.loads(response.read())
+    assert len(body['predictions']) == 3
+    with urllib.request.urlopen(f"http://127.0.0.1:{port[0]}/health") as response:
+        assert json.loads(response.read())['status'] == "ok"
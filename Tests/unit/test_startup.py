@@ -0,0 +1,40 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import json
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+
+# La durée du démarrage est suivie par benchmarks/suite.py (étape import_main)
+HEAVY_MODULES = ["pandas", "numpy", "sqlalchemy", "xgboost", "sklearn", "matplotlib"]
+
+
+def loaded_modules(code):
+    """Exécute code dans un interpréteur neuf et retourne les noms de sys.modules à la fin."""
+    code += "\nimport json, sys\nprint(json.dumps(sorted(sys.modules)))"
+    stdout = subprocess.run([sys.executable, "-c", code], cwd=ROOT,
+                            capture_output=True, text=True, check=True).stdout
+    return set(json.loads(stdout.splitlines()[-1]))
+
+
+def test_import_main_sans_modules_lourds():
+    modules = loaded_modules("import main")
+    assert [module for module in HEAVY_MODULES if module in modules] == []
+
+
+def test_help_sans_modules_lourds():
+    code = ("import sys, main\n"
+            "sys.argv = ['main.py', '--help']\n"
+            "try:\n"
+            "    main.main()\n"
+            "except SystemExit:\n"
+            "    pass")
+    modules = loaded_modules(code)
+    assert [module for module in HEAVY_MODULES if module in modules] == []
+
+
+def test_no_plots_ne_charge_pas_matplotlib():
+    code = ("import sys, main, pandas as pd\n"
+            "main.save_results(pd.DataFrame(), {}, {}, 'X', plots=False)\n"
+            "assert 'matplotlib' not in sys.modules")
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
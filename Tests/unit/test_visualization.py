@@ -14,6 +14,8 @@ from predictor.visualization import (
     save_metrics,
     plot_residuals,
     visualize_all_results,
+    visualize_many,
+    Renderer,
 )
 
 @pytest.fixture
@@ -54,3 +56,48 @@ def test_visualize_all_results(sample_prediction_data, tmp_path):
     found_files = [f.name for f in tmp_path.iterdir()]
     for fname in expected_files:
         assert fname in found_files
+
+@pytest.mark.parametrize("fmt", ["svg", "none"])
+def test_visualize_all_results_formats(sample_prediction_data, tmp_path, fmt):
+    df, preds = sample_prediction_data
+    visualize_all_results(df, preds, "France", output_dir=tmp_path, fmt=fmt)
+    found_files = {f.name for f in tmp_path.iterdir()}
+    assert "France_mortality_stats.txt" in found_files
+    if fmt == "svg":
+        assert "France_combined_predictions.svg" in found_files
+        assert (tmp_path / "France_combined_predictions.svg").read_text().lstrip().startswith("<?xml")
+    else:
+        assert not any(name.endswith((".png", ".svg")) for name in found_files)
+
+def test_renderer_reuse_swaps_data(sample_prediction_data, tmp_path):
+    df, preds = sample_prediction_data
+    renderer = Renderer("png", reuse=True)
+    visualize_all_results(df, preds, "France", output_dir=tmp_path, renderer=renderer)
+    figures = {key: template['fig'] for key, template in renderer._templates.items()}
+    visualize_all_results(df * 10, preds, "Spain", output_dir=tmp_path, renderer=renderer)
+
+    assert {key: template['fig'] for key, template in renderer._templates.items()} == figures
+    template = renderer._templates[('predictions', 'new_cases')]
+    assert template['axes'][0].get_title() == "Prédiction des new_cases pour Spain"
+    assert template['axes'][0].get_ylim()[1] >= 90
+    assert (tmp_path / "Spain_recovery_rate.png").exists()
+
+def test_renderer_reuse_resets_residual_limits(tmp_path):
+    renderer = Renderer("png", reuse=True)
+    renderer.residuals(np.arange(0, 1_000_000, 10_000), np.arange(0, 1_000_000, 10_000) * 0.9,
+                       "Big", "new_cases", output_dir=tmp_path)
+    renderer.residuals(np.arange(10), np.arange(10) + 0.5, "Small", "new_cases", output_dir=tmp_path)
+    ax = renderer._templates[('residuals', 'new_cases')]['ax']
+    assert ax.get_xlim()[1] < 100
+
+
+def test_visualize_many_process_pool(sample_prediction_data, tmp_path):
+    df, preds = sample_prediction_data
+    jobs = [(df, preds, country) for country in ("France", "Spain", "Italy")]
+    assert visualize_many(jobs, output_dir=str(tmp_path), workers=2) == ["France", "Spain", "Italy"]
+    for country in ("France", "Spain", "Italy"):
+        assert (tmp_path / f"{country}_combined_predictions.png").exists()
+
+def test_renderer_rejects_unknown_format():
+    with pytest.raises(ValueError):
+        Renderer("jpg")
@@ -0,0 +1,50 @@
+"""
+Débit du backtest walk-forward (predictor.backtest) selon le nombre de processus.
+
+Pour --countries pays synthétiques × --cutoffs dates de coupure, on mesure la
+construction des features (une fois par pays) puis le backtest avec 1 processus
+et avec --workers processus (un thread XGBoost par fold), et on affiche l'erreur
+par horizon.
+
+    python benchmarks/backtest.py --countries 200 --cutoffs 20 --workers 16
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from global_model import TARGET, make_countries
+from predictor.backtest import backtest, horizon_errors, prepare_frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du backtest walk-forward")
+    parser.add_argument("--countries", type=int, default=20, help="Nombre de pays")
+    parser.add_argument("--days", type=int, default=600, help="Nombre de jours par pays")
+    parser.add_argument("--cutoffs", type=int, default=5, help="Nombre de dates de coupure par pays")
+    parser.add_argument("--horizon", type=int, default=14, help="Nombre de jours prédits par coupure")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Nombre de processus")
+    parser.add_argument("--skip-serial", action="store_true", help="Ne pas mesurer l'exécution à 1 processus")
+    args = parser.parse_args()
+
+    raw = make_countries(args.countries, args.days)
+    start = time.perf_counter()
+    frames = prepare_frames(raw, TARGET)
+    print(f"Features: {time.perf_counter() - start:.2f}s ({args.countries} pays)")
+
+    n_folds = args.countries * args.cutoffs
+    runs = [args.workers] if args.skip_serial or args.workers == 1 else [1, args.workers]
+    for workers in runs:
+        start = time.perf_counter()
+        results = backtest(frames, TARGET, n_cutoffs=args.cutoffs, horizon=args.horizon, workers=workers)
+        elapsed = time.perf_counter() - start
+        print(f"{workers:>3} processus: {elapsed:.2f}s - {n_folds / elapsed:.2f} folds/s")
+
+    print("\nErreur par horizon:")
+    print(horizon_errors(results).to_string(float_format=lambda v: f"{v:.2f}"))
+
+
+if __name__ == "__main__":
+    main()
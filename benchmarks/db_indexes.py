@@ -0,0 +1,132 @@
+"""
+Benchmark de la latence de load_data selon le schéma de la base.
+
+Une table Global_Data synthétique (plusieurs millions de lignes par défaut) est
+créée, puis load_data est chronométré pour un échantillon de pays :
+    1. sans index (schéma d'origine),
+    2. avec les index de docs/database.sql,
+    3. avec la table pré-agrégée Country_Daily_Series.
+
+    python benchmarks/db_indexes.py                                  # SQLite temporaire
+    python benchmarks/db_indexes.py --url mysql+pymysql://u:p@h/bench --reset
+
+À n'utiliser que sur une base dédiée : --reset supprime les tables existantes.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import inspect, text
+from predictor.database import DAILY_SERIES_TABLE, get_engine, load_data, load_db_config, refresh_daily_series
+
+TABLES = (DAILY_SERIES_TABLE, "Global_Data", "Country")
+
+
+def create_schema(engine, reset=False):
+    existing = [table for table in TABLES if inspect(engine).has_table(table)]
+    if existing and not reset:
+        raise SystemExit(f"Tables déjà présentes ({', '.join(existing)}) : utilisez --reset sur une base dédiée.")
+    with engine.begin() as connection:
+        for table in existing:
+            connection.execute(text(f"DROP TABLE {table}"))
+        connection.execute(text("CREATE TABLE Country (id INT PRIMARY KEY, name VARCHAR(255) NOT NULL, population BIGINT)"))
+        connection.execute(text(
+            "CREATE TABLE Global_Data (id INT PRIMARY KEY, country_id INT, disease_id INT, date DATE, "
+            "new_cases INT, new_deaths INT, new_recovered INT)"
+        ))
+
+
+def seed(engine, n_countries, n_days, n_diseases, seed=42):
+    """Insère n_countries × n_days × n_diseases lignes dans Global_Data, dans un ordre non trié."""
+    rng = np.random.default_rng(seed)
+    countries = pd.DataFrame({
+        "id": np.arange(1, n_countries + 1),
+        "name": [f"Country_{i:04d}" for i in range(1, n_countries + 1)],
+        "population": rng.integers(100_000, 1_000_000_000, n_countries),
+    })
+    countries.to_sql("Country", engine, if_exists="append", index=False)
+
+    dates = pd.date_range("2020-01-01", periods=n_days, freq="D").date
+    next_id = 1
+    # Les lignes arrivent jour par jour (tous pays confondus), comme en production
+    days_per_block = max(1, 200_000 // (n_countries * n_diseases))
+    for start in range(0, n_days, days_per_block):
+        day_block = dates[start:start + days_per_block]
+        size = len(day_block) * n_countries * n_diseases
+        block = pd.DataFrame({
+            "id": np.arange(next_id, next_id + size),
+            "date": np.repeat(day_block, n_countries * n_diseases),
+            "country_id": np.tile(np.repeat(countries["id"].to_numpy(), n_diseases), len(day_block)),
+            "disease_id": np.tile(np.arange(1, n_diseases + 1), len(day_block) * n_countries),
+            "new_cases": rng.integers(0, 10_000, size),
+            "new_deaths": rng.integers(0, 100, size),
+            "new_recovered": rng.integers(0, 5_000, size),
+        })
+        block.to_sql("Global_Data", engine, if_exists="append", index=False, chunksize=50_000)
+        next_id += size
+    return countries["name"].tolist()
+
+
+def time_loads(engine, countries, repeat):
+    latencies = []
+    for country in countries:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            load_data(engine, country)
+            latencies.append(time.perf_counter() - start)
+    return np.array(latencies) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des index et de la table pré-agrégée")
+    parser.add_argument("--url", type=str, default=None, help="URL SQLAlchemy (par défaut: SQLite temporaire)")
+    parser.add_argument("--reset", action="store_true", help="Supprimer les tables existantes")
+    parser.add_argument("--countries", type=int, default=200, help="Nombre de pays")
+    parser.add_argument("--days", type=int, default=1500, help="Nombre de jours par pays")
+    parser.add_argument("--diseases", type=int, default=7, help="Nombre de lignes par pays et par jour")
+    parser.add_argument("--sample", type=int, default=20, help="Nombre de pays chronométrés")
+    parser.add_argument("--repeat", type=int, default=3, help="Chargements par pays")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        url = args.url or f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+        engine = get_engine(load_db_config(url=url))
+        create_schema(engine, reset=args.reset or args.url is None)
+
+        start = time.perf_counter()
+        names = seed(engine, args.countries, args.days, args.diseases)
+        total_rows = args.countries * args.days * args.diseases
+        print(f"{total_rows} lignes insérées dans Global_Data en {time.perf_counter() - start:.1f}s")
+        sample = list(np.random.default_rng(0).choice(names, size=min(args.sample, len(names)), replace=False))
+
+        results = {"sans index": time_loads(engine, sample, args.repeat)}
+
+        with engine.begin() as connection:
+            connection.execute(text("CREATE UNIQUE INDEX uq_country_name ON Country (name)"))
+            connection.execute(text("CREATE INDEX idx_global_data_country_date ON Global_Data (country_id, date)"))
+        results["index (country_id, date)"] = time_loads(engine, sample, args.repeat)
+
+        with engine.begin() as connection:
+            connection.execute(text(
+                f"CREATE TABLE {DAILY_SERIES_TABLE} (country_id INT NOT NULL, date DATE NOT NULL, "
+                "new_cases INT, new_deaths INT, new_recovered INT, PRIMARY KEY (country_id, date))"
+            ))
+        start = time.perf_counter()
+        refresh_daily_series(engine)
+        print(f"Table {DAILY_SERIES_TABLE} construite en {time.perf_counter() - start:.1f}s")
+        results["série quotidienne"] = time_loads(engine, sample, args.repeat)
+
+        print(f"\n{'Schéma':<26} {'médiane (ms)':>13} {'p95 (ms)':>10}")
+        for label, latencies in results.items():
+            print(f"{label:<26} {np.median(latencies):>13.1f} {np.percentile(latencies, 95):>10.1f}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
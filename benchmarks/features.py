@@ -0,0 +1,77 @@
+"""
+Benchmark de la construction des features : create_features par cible vs create_features_multi.
+
+Mesure le temps et le pic d'allocation (tracemalloc) pour construire les features
+des trois cibles d'un pays, comme le fait main.py.
+
+    python benchmarks/features.py --rows 1000 5000 20000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+from predictor.data_processing import create_features, create_features_multi
+
+TARGETS = ["new_cases", "new_deaths", "new_recovered"]
+
+
+def make_country_frame(rows, seed=42):
+    """Série synthétique de la forme retournée par load_data."""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2020-01-01", periods=rows, freq="D", name="date")
+    return pd.DataFrame({
+        "population": 67_000_000,
+        "new_cases": rng.integers(0, 10_000, rows),
+        "new_deaths": rng.integers(0, 100, rows),
+        "new_recovered": rng.integers(0, 5_000, rows),
+    }, index=index)
+
+
+def per_target(df):
+    frames = {}
+    for target in TARGETS:
+        df_features = create_features(df.copy(), target, look_back=30)
+        feature_names = [c for c in df_features.columns if c not in TARGETS and c != "population"]
+        frames[target] = (df_features[feature_names], df_features[target])
+    return frames
+
+
+def multi(df):
+    return create_features_multi(df, TARGETS, look_back=30)
+
+
+def measure(func, df, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(df)
+        durations.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func(df)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return np.median(durations) * 1000, peak / 1024 ** 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la construction des features")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 5000, 20000], help="Longueurs de série")
+    parser.add_argument("--repeat", type=int, default=5, help="Répétitions par mesure")
+    args = parser.parse_args()
+
+    print(f"{'Lignes':>8} {'Méthode':<22} {'Temps (ms)':>11} {'Pic mémoire (Mo)':>17}")
+    for rows in args.rows:
+        df = make_country_frame(rows)
+        for label, func in (("create_features x3", per_target), ("create_features_multi", multi)):
+            duration, peak = measure(func, df, args.repeat)
+            print(f"{rows:>8} {label:<22} {duration:>11.2f} {peak:>17.2f}")
+
+
+if __name__ == "__main__":
+    main()
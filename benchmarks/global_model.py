@@ -0,0 +1,96 @@
+"""
+Comparaison modèles par pays / modèle global multi-pays.
+
+Des séries synthétiques (tendance saisonnière commune, niveau proportionnel à la
+population, bruit propre à chaque pays) sont générées pour --countries pays. Pour
+une cible, on compare :
+    1. un modèle par pays (train_model + predict_future_batch),
+    2. un modèle global (train_global_model + predict_future_global),
+sur les mêmes 20 % de dates finales de chaque pays : MAE moyen, temps d'entraînement,
+temps de prévision et nombre de boosters chargés.
+
+    python benchmarks/global_model.py --countries 50 --days 600
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+from predictor.data_processing import create_features_multi, features_frame
+from predictor.model import PandemicModel, ModelRegistry
+
+TARGET = "new_cases"
+
+
+def make_countries(n_countries, n_days, seed=42):
+    """Génère {pays: DataFrame brut} de la forme renvoyée par load_data."""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2020-01-01", periods=n_days, freq="D", name="date")
+    t = np.arange(n_days)
+    trend = 1 + 0.8 * np.sin(2 * np.pi * t / 180) + 0.2 * np.sin(2 * np.pi * t / 7)
+    frames = {}
+    for i in range(n_countries):
+        population = int(rng.integers(1_000_000, 100_000_000))
+        level = population / 100_000 * rng.uniform(5, 20)
+        cases = np.maximum(level * trend * rng.lognormal(0, 0.15, n_days), 0).round()
+        frames[f"Country_{i:03d}"] = pd.DataFrame({TARGET: cases, "population": population}, index=index)
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark modèles par pays vs modèle global")
+    parser.add_argument("--countries", type=int, default=50, help="Nombre de pays")
+    parser.add_argument("--days", type=int, default=600, help="Nombre de jours par pays")
+    parser.add_argument("--horizon", type=int, default=7, help="Nombre de jours prédits")
+    args = parser.parse_args()
+
+    raw = make_countries(args.countries, args.days)
+    dfs = {country: features_frame(create_features_multi(df, [TARGET]), TARGET) for country, df in raw.items()}
+    populations = {country: float(df["population"].iloc[-1]) for country, df in raw.items()}
+    feature_names = [c for c in next(iter(dfs.values())).columns if c != TARGET]
+
+    with tempfile.TemporaryDirectory() as model_dir:
+        # 1. Un modèle par pays
+        start = time.perf_counter()
+        mae = []
+        managers = {}
+        for country, df in dfs.items():
+            manager = PandemicModel(model_dir=os.path.join(model_dir, country), registry=ModelRegistry())
+            model, metrics = manager.train_model(df, TARGET, feature_names)
+            manager.save_model(model, TARGET)
+            managers[country] = manager
+            mae.append(metrics["MAE"])
+        per_country_train = time.perf_counter() - start
+        start = time.perf_counter()
+        for country, manager in managers.items():
+            manager.registry.invalidate()
+            manager.predict_future_batch({country: dfs[country]}, TARGET, feature_names, days_ahead=args.horizon)
+        per_country_predict = time.perf_counter() - start
+        per_country_mae = float(np.mean(mae))
+
+        # 2. Modèle global
+        start = time.perf_counter()
+        manager = PandemicModel(model_dir=os.path.join(model_dir, "global"), registry=ModelRegistry())
+        model, metrics = manager.train_global_model(dfs, TARGET, feature_names, populations=populations)
+        manager.save_global_model(model, TARGET)
+        global_train = time.perf_counter() - start
+        manager.registry.invalidate()
+        start = time.perf_counter()
+        manager.predict_future_global(dfs, TARGET, feature_names, populations=populations, days_ahead=args.horizon)
+        global_predict = time.perf_counter() - start
+        global_mae = float(np.mean([m["MAE"] for m in metrics["per_country"].values()]))
+
+    print(f"\n{args.countries} pays × {args.days} jours, horizon {args.horizon} jours")
+    print(f"{'Mode':<12} {'MAE moyen':>10} {'Entraînement (s)':>17} {'Prévision (s)':>14} {'Boosters':>9}")
+    print(f"{'par pays':<12} {per_country_mae:>10.1f} {per_country_train:>17.2f} {per_country_predict:>14.3f} "
+          f"{args.countries:>9}")
+    print(f"{'global':<12} {global_mae:>10.1f} {global_train:>17.2f} {global_predict:>14.3f} {1:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Pic de mémoire (RSS) de l'entraînement sur les lignes de --countries pays regroupées.
+
+Chaque représentation est mesurée dans un processus neuf (le pic RSS d'un processus
+ne redescend jamais) :
+    dataframe : représentation d'origine, DataFrame create_features (lags et moyennes
+                mobiles float64, calendrier int64), sélection df[feature_names],
+                copie par train_test_split puis conversion par XGBoost ;
+    compact   : matrice float32 C-contiguë de create_features_multi (features_frame),
+                passée à XGBoost sans copie par PandemicModel.train_model.
+On affiche la taille des features et le pic RSS au-delà du RSS mesuré après la
+génération des données brutes.
+
+    python benchmarks/memory.py --countries 200 --days 600
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+MODES = ("dataframe", "compact")
+
+
+def peak_rss():
+    """Pic RSS du processus en octets (ru_maxrss est en Ko sous Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def train(mode, countries, days, rounds):
+    import numpy as np
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
+    from global_model import TARGET, make_countries
+    from predictor.data_processing import create_features, create_features_multi, features_frame
+    from predictor.model import ModelRegistry, PandemicModel
+
+    raw = make_countries(countries, days)
+    base = peak_rss()
+    if mode == "dataframe":
+        df = pd.concat([create_features(frame, TARGET) for frame in raw.values()])
+        feature_names = [c for c in df.columns if c not in (TARGET, "population")]
+        feature_bytes = int(df[feature_names].memory_usage(index=False).sum())
+        X_train, X_test, y_train, y_test = train_test_split(df[feature_names], df[TARGET],
+                                                            test_size=0.2, shuffle=False)
+        model = PandemicModel(registry=ModelRegistry())._get_default_model()
+        model.set_params(n_estimators=rounds)
+        model.fit(X_train, y_train, eval_set=[(X_test, y_test)], verbose=False)
+    else:
+        features = [create_features_multi(frame, [TARGET]) for frame in raw.values()]
+        pooled = {
+            'index': {TARGET: features[0]['index'][TARGET].append([f['index'][TARGET] for f in features[1:]])},
+            'feature_names': features[0]['feature_names'],
+            'X': {TARGET: np.concatenate([f['X'][TARGET] for f in features])},
+            'y': {TARGET: np.concatenate([f['y'][TARGET] for f in features])},
+        }
+        del features
+        df = features_frame(pooled, TARGET)
+        feature_names = pooled['feature_names']
+        feature_bytes = pooled['X'][TARGET].nbytes
+        manager = PandemicModel(registry=ModelRegistry())
+        default_model = manager._get_default_model
+        manager._get_default_model = lambda *a, **k: default_model(*a, **k).set_params(n_estimators=rounds)
+        with open(os.devnull, "w") as devnull:
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                manager.train_model(df, TARGET, feature_names)
+            finally:
+                sys.stdout = stdout
+    print(f"{len(df)} {feature_bytes} {peak_rss() - base} {peak_rss()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pic RSS de l'entraînement selon la représentation des features")
+    parser.add_argument("--countries", type=int, default=200, help="Nombre de pays regroupés")
+    parser.add_argument("--days", type=int, default=600, help="Nombre de jours par pays")
+    parser.add_argument("--rounds", type=int, default=50, help="Nombre d'arbres (la mémoire en dépend peu)")
+    parser.add_argument("--mode", choices=MODES, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        train(args.mode, args.countries, args.days, args.rounds)
+        return
+
+    print(f"{'Représentation':<15} {'Lignes':>9} {'Features (Mo)':>14} {'Pic RSS entraînement (Mo)':>26} "
+          f"{'Pic RSS total (Mo)':>19}")
+    for mode in MODES:
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), "--mode", mode,
+                              "--countries", str(args.countries), "--days", str(args.days),
+                              "--rounds", str(args.rounds)], capture_output=True, text=True, check=True)
+        rows, feature_bytes, train_peak, total_peak = map(int, out.stdout.split()[-4:])
+        mb = 1024 ** 2
+        print(f"{mode:<15} {rows:>9} {feature_bytes / mb:>14.1f} {train_peak / mb:>26.1f} {total_peak / mb:>19.1f}")
+
+
+if __name__ == "__main__":
+    main()
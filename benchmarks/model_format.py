@@ -0,0 +1,80 @@
+"""
+Benchmark du chargement des modèles : pickle joblib vs booster XGBoost natif (UBJSON).
+
+Chaque format est chargé dans un processus Python neuf pour mesurer le temps
+d'import + chargement à froid et la mémoire résidente maximale (ru_maxrss).
+
+    python benchmarks/model_format.py --rows 2000 --repeat 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import pandas as pd
+from predictor.model import PandemicModel, ModelRegistry
+
+CHILD_CODE = """
+import json, resource, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+from predictor.model import PandemicModel, ModelRegistry
+imported = time.perf_counter()
+manager = PandemicModel(model_dir={model_dir!r}, registry=ModelRegistry(), model_format={model_format!r})
+model = manager.load_model("new_cases")
+loaded = time.perf_counter()
+print(json.dumps({{
+    "import_s": imported - start,
+    "load_s": loaded - imported,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}}))
+"""
+
+
+def make_training_frame(rows, n_lags=30, seed=42):
+    """Génère un jeu de features synthétique de la forme produite par create_features."""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2020-01-01", periods=rows, freq="D")
+    df = pd.DataFrame({f"lag_{i}": rng.random(rows) for i in range(1, n_lags + 1)}, index=index)
+    df["new_cases"] = rng.integers(0, 1000, rows)
+    return df
+
+
+def run_child(model_dir, model_format):
+    code = CHILD_CODE.format(root=ROOT, model_dir=model_dir, model_format=model_format)
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark joblib vs UBJSON pour les modèles")
+    parser.add_argument("--rows", type=int, default=2000, help="Nombre de lignes d'entraînement")
+    parser.add_argument("--repeat", type=int, default=5, help="Nombre de chargements à froid par format")
+    args = parser.parse_args()
+
+    df = make_training_frame(args.rows)
+    features = [col for col in df.columns if col.startswith("lag_")]
+    with tempfile.TemporaryDirectory() as model_dir:
+        manager = PandemicModel(model_dir=model_dir, registry=ModelRegistry())
+        model, _ = manager.train_model(df, "new_cases", features)
+        manager.save_model(model, "new_cases")
+        PandemicModel(model_dir=model_dir, registry=ModelRegistry(), model_format="ubj").migrate_models()
+
+        print(f"{'Format':<8} {'Fichier (Ko)':>12} {'Import (s)':>11} {'Chargement (s)':>15} {'RSS max (Mo)':>13}")
+        for model_format, extension in (("joblib", "pkl"), ("ubj", "ubj")):
+            runs = [run_child(model_dir, model_format) for _ in range(args.repeat)]
+            size_kb = os.path.getsize(os.path.join(model_dir, f"new_cases_model.{extension}")) / 1024
+            print(f"{model_format:<8} {size_kb:>12.1f} "
+                  f"{np.median([r['import_s'] for r in runs]):>11.3f} "
+                  f"{np.median([r['load_s'] for r in runs]):>15.4f} "
+                  f"{np.median([r['max_rss_mb'] for r in runs]):>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Test de charge du service de prévision (predictor.service) sur une base SQLite locale.
+
+Une base synthétique de --countries pays est créée, un modèle new_cases est entraîné
+par pays (models/<pays>/), puis le service est lancé dans ce processus et
+--clients clients HTTP (connexions keep-alive) envoient --requests requêtes
+/forecast sur des pays tirés au hasard. Affiche le débit et les latences p50/p99,
+d'abord à froid (premier appel par pays) puis à chaud.
+
+    python benchmarks/service_load.py --countries 20 --clients 16 --requests 2000
+"""
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from predictor.database import get_engine, load_data_multi, load_db_config
+from predictor.data_processing import create_features_multi, features_frame
+from predictor.model import ModelRegistry, PandemicModel
+from predictor.service import ForecastService, serve
+from benchmarks.db_indexes import create_schema, seed
+
+TARGET = "new_cases"
+
+
+def train_models(engine, model_dir):
+    for country, df in load_data_multi(engine, targets=[TARGET]).items():
+        features = features_frame(create_features_multi(df, [TARGET]), TARGET)
+        feature_names = [c for c in features.columns if c != TARGET]
+        manager = PandemicModel(model_dir=os.path.join(model_dir, country), registry=ModelRegistry())
+        model, _ = manager.train_model(features, TARGET, feature_names)
+        manager.save_model(model, TARGET)
+
+
+def start_service(app):
+    ready = threading.Event()
+    port = []
+
+    def run():
+        asyncio.run(serve(app, port=0, ready=lambda p: (port.append(p), ready.set())))
+
+    threading.Thread(target=run, daemon=True).start()
+    ready.wait()
+    return port[0]
+
+
+def run_client(port, paths):
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    latencies = []
+    for path in paths:
+        start = time.perf_counter()
+        connection.request("GET", path)
+        response = connection.getresponse()
+        body = response.read()
+        latencies.append(time.perf_counter() - start)
+        if response.status != 200:
+            raise RuntimeError(f"{path}: {response.status} {body[:200]!r}")
+    connection.close()
+    return latencies
+
+
+def load_test(port, paths, clients):
+    chunks = [paths[i::clients] for i in range(clients)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        latencies = np.concatenate(list(executor.map(run_client, [port] * clients, chunks))) * 1000
+    return latencies, time.perf_counter() - start
+
+
+def report(label, latencies, duration):
+    print(f"{label:<8} {len(latencies):>9} {len(latencies) / duration:>10.1f} "
+          f"{np.percentile(latencies, 50):>9.2f} {np.percentile(latencies, 99):>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge du service de prévision")
+    parser.add_argument("--countries", type=int, default=20, help="Nombre de pays")
+    parser.add_argument("--days", type=int, default=400, help="Nombre de jours par pays")
+    parser.add_argument("--clients", type=int, default=16, help="Clients HTTP simultanés")
+    parser.add_argument("--requests", type=int, default=2000, help="Nombre de requêtes à chaud")
+    parser.add_argument("--horizon", type=int, default=7, help="Jours demandés par requête")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = get_engine(load_db_config(url=f"sqlite:///{os.path.join(tmp_dir, 'service.db')}"))
+        create_schema(engine, reset=True)
+        names = seed(engine, args.countries, args.days, n_diseases=1)
+        model_dir = os.path.join(tmp_dir, "models")
+        print(f"Entraînement de {len(names)} modèles...")
+        train_models(engine, model_dir)
+
+        app = ForecastService(engine, model_dir=model_dir, max_workers=4)
+        port = start_service(app)
+        rng = np.random.default_rng(0)
+        path = "/forecast?country={}&target=" + TARGET + f"&days={args.horizon}"
+
+        print(f"\n{'Phase':<8} {'Requêtes':>9} {'Req/s':>10} {'p50 (ms)':>9} {'p99 (ms)':>9}")
+        report("froid", *load_test(port, [path.format(name) for name in names], args.clients))
+        report("chaud", *load_test(port, [path.format(name) for name in rng.choice(names, args.requests)],
+                                   args.clients))
+        print(f"\nRequêtes regroupées (même clé en cours de calcul) : {app.coalesced}")
+        print(f"Cache des modèles : {json.dumps(app.registry.stats())}")
+        app.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Comparaison des stratégies de prévision récursive et directe.
+
+Sur une série synthétique (saisonnalités hebdomadaire et semestrielle, bruit
+multiplicatif), pour --cutoffs dates de coupure successives : entraînement sur
+l'historique jusqu'à la coupure, prévision de --horizon jours, comparaison aux
+valeurs réelles. Affiche le MAE par horizon et la latence médiane de prévision
+(modèle déjà chargé).
+
+    python benchmarks/strategy.py --horizon 30 --cutoffs 5
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+from predictor.data_processing import create_features_multi, features_frame
+from predictor.model import PandemicModel, ModelRegistry
+
+TARGET = "new_cases"
+
+
+def make_series(n_days, seed=42):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2020-01-01", periods=n_days, freq="D", name="date")
+    t = np.arange(n_days)
+    level = 1000 * (1 + 0.8 * np.sin(2 * np.pi * t / 180)) * (1 + 0.2 * np.sin(2 * np.pi * t / 7))
+    return pd.DataFrame({TARGET: np.maximum(level * rng.lognormal(0, 0.1, n_days), 0).round()}, index=index)
+
+
+def timed(function, repeat=5):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        durations.append(time.perf_counter() - start)
+    return result, float(np.median(durations))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark prévision récursive vs directe")
+    parser.add_argument("--days", type=int, default=900, help="Longueur de la série")
+    parser.add_argument("--horizon", type=int, default=30, help="Nombre de jours prédits")
+    parser.add_argument("--cutoffs", type=int, default=5, help="Nombre de dates de coupure")
+    args = parser.parse_args()
+
+    df = features_frame(create_features_multi(make_series(args.days), [TARGET]), TARGET)
+    feature_names = [c for c in df.columns if c != TARGET]
+    cutoffs = [len(df) - args.horizon * (i + 1) for i in range(args.cutoffs)]
+
+    errors = {"recursive": [], "direct": []}
+    latencies = {"recursive": [], "direct": []}
+    with tempfile.TemporaryDirectory() as model_dir:
+        for cutoff in cutoffs:
+            history = df.iloc[:cutoff]
+            actual = df[TARGET].iloc[cutoff:cutoff + args.horizon].to_numpy()
+            manager = PandemicModel(model_dir=model_dir, registry=ModelRegistry())
+
+            model, _ = manager.train_model(history, TARGET, feature_names)
+            manager.save_model(model, TARGET)
+            preds, latency = timed(lambda: manager.predict_future(history, TARGET, feature_names, args.horizon))
+            errors["recursive"].append(np.abs(preds[f"predicted_{TARGET}"].to_numpy() - actual))
+            latencies["recursive"].append(latency)
+
+            model, _ = manager.train_direct_model(history, TARGET, feature_names, horizon=args.horizon)
+            manager.save_direct_model(model, TARGET)
+            preds, latency = timed(lambda: manager.predict_future_direct(history, TARGET, feature_names,
+                                                                         args.horizon))
+            errors["direct"].append(np.abs(preds[f"predicted_{TARGET}"].to_numpy() - actual))
+            latencies["direct"].append(latency)
+
+    mae = {strategy: np.mean(values, axis=0) for strategy, values in errors.items()}
+    print(f"\nLatence médiane de prévision ({args.horizon} jours) :")
+    for strategy, values in latencies.items():
+        print(f"  {strategy:<10} {np.median(values) * 1000:8.2f} ms")
+    print(f"\n{'Horizon':>8} {'MAE récursif':>13} {'MAE direct':>11}")
+    for h in range(args.horizon):
+        print(f"{h + 1:>8} {mae['recursive'][h]:>13.1f} {mae['direct'][h]:>11.1f}")
+    print(f"{'moyenne':>8} {mae['recursive'].mean():>13.1f} {mae['direct'].mean():>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
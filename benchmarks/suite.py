@@ -0,0 +1,266 @@
+"""
+Suite de benchmarks des chemins critiques, avec résultats JSON comparables entre commits.
+
+Une base SQLite temporaire est remplie de séries synthétiques de la forme de
+Global_Data (--countries pays × --days jours), puis chaque étape est chronométrée
+--repeat fois :
+    load_data, load_data_multi        lecture des séries (un pays / tous les pays)
+    create_features, create_features_multi
+    train_model, train_model_tuned    sans / avec tuning (successive halving borné)
+    predict_7, predict_30, predict_90 prévision récursive (modèle déjà chargé)
+    visualize_all_results             graphiques et statistiques d'un pays
+
+    import_main                       démarrage de la CLI (python -X importtime -c "import main"),
+                                      signalé s'il dépasse PANDEMIA_STARTUP_BUDGET (0,5 s par défaut)
+    instrumentation_disabled          surcoût par appel d'une fonction @timed, instrumentation
+                                      désactivée, signalé s'il dépasse PANDEMIA_INSTRUMENTATION_BUDGET
+                                      (5 µs par défaut)
+
+    python benchmarks/suite.py --countries 20 --days 730 --output avant.json
+    python benchmarks/suite.py --countries 20 --days 730 --output apres.json
+    python benchmarks/suite.py --compare avant.json apres.json
+"""
+from contextlib import redirect_stdout
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from predictor.database import dispose_engines, get_engine, load_data, load_data_multi, load_db_config
+from predictor.data_processing import create_features, create_features_multi, features_frame
+from predictor.model import ModelRegistry, PandemicModel
+from predictor.tuning import get_tuner
+from benchmarks.db_indexes import create_schema, seed
+
+TARGETS = ["new_cases", "new_deaths", "new_recovered"]
+TARGET = "new_cases"
+HORIZONS = (7, 30, 90)
+# Budget du démarrage de la CLI (import de main), en secondes
+STARTUP_BUDGET = float(os.environ.get("PANDEMIA_STARTUP_BUDGET", "0.5"))
+# Budget du surcoût par appel d'une fonction @timed quand l'instrumentation est désactivée, en secondes
+INSTRUMENTATION_BUDGET = float(os.environ.get("PANDEMIA_INSTRUMENTATION_BUDGET", "5e-6"))
+STAGES = ("import_main", "instrumentation_disabled", "load_data", "load_data_multi", "create_features", "create_features_multi", "train_model",
+          "train_model_tuned") + tuple(f"predict_{h}" for h in HORIZONS) + ("visualize_all_results",)
+
+
+def timed(function, repeat):
+    """Durées (s) de repeat appels et résultat du dernier (sorties des entraînements masquées)."""
+    durations = []
+    result = None
+    with redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = function()
+            durations.append(time.perf_counter() - start)
+    return durations, result
+
+
+def import_main_seconds():
+    """Temps cumulé de l'import de main mesuré par -X importtime dans un interpréteur neuf."""
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=ROOT,
+                            capture_output=True, text=True, check=True).stderr
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and line.rsplit("|", 1)[-1].strip() == "main":
+            return int(line.split("|")[1]) / 1e6
+    raise RuntimeError("Import de main absent de la sortie -X importtime.")
+
+
+def instrumentation_overhead_seconds(n=100_000):
+    """Surcoût moyen (s) d'un appel à une fonction @timed, instrumentation désactivée."""
+    from predictor import instrumentation
+    instrumentation.configure(enabled=False)
+
+    def plain():
+        return None
+
+    wrapped = instrumentation.timed("plain")(plain)
+    seconds = []
+    for function in (plain, wrapped):
+        start = time.perf_counter()
+        for _ in range(n):
+            function()
+        seconds.append(time.perf_counter() - start)
+    return max(seconds[1] - seconds[0], 0.0) / n
+
+
+def summarize(durations):
+    return {
+        'median': statistics.median(durations),
+        'min': min(durations),
+        'mean': statistics.fmean(durations),
+        'stdev': statistics.stdev(durations) if len(durations) > 1 else 0.0,
+        'repeat': len(durations),
+    }
+
+
+def environment():
+    """Commit, versions et machine, pour savoir ce que deux fichiers de résultats comparent."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                                    capture_output=True, text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        commit, dirty = None, None
+    return {
+        'commit': commit,
+        'dirty': dirty,
+        'date': pd.Timestamp.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'xgboost': xgb.__version__,
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def run_suite(n_countries=20, n_days=730, repeat=3, stages=None, tune_budget_seconds=30, plot_format="png"):
+    """
+    Exécute les étapes demandées sur une base synthétique temporaire.
+
+    Returns:
+        Dictionnaire {'environment', 'config', 'results': {étape: statistiques des durées}}.
+    """
+    stages = [stage for stage in STAGES if stages is None or stage in stages]
+    results = {}
+
+    def bench(stage, function, stage_repeat=repeat):
+        if stage not in stages:
+            return None
+        durations, result = timed(function, stage_repeat)
+        results[stage] = summarize(durations)
+        print(f"{stage:<24} {results[stage]['median'] * 1000:>12.1f} ms  (min {results[stage]['min'] * 1000:.1f})")
+        return result
+
+    if "import_main" in stages:
+        results["import_main"] = summarize([import_main_seconds() for _ in range(repeat)])
+        median = results["import_main"]["median"]
+        status = "" if median <= STARTUP_BUDGET else f"  DÉPASSE le budget de {STARTUP_BUDGET:.2f} s"
+        print(f"{'import_main':<24} {median * 1000:>12.1f} ms  (min {results['import_main']['min'] * 1000:.1f}){status}")
+
+    if "instrumentation_disabled" in stages:
+        results["instrumentation_disabled"] = summarize([instrumentation_overhead_seconds() for _ in range(repeat)])
+        median = results["instrumentation_disabled"]["median"]
+        status = "" if median <= INSTRUMENTATION_BUDGET else \
+            f"  DÉPASSE le budget de {INSTRUMENTATION_BUDGET * 1e6:.1f} µs"
+        print(f"{'instrumentation_disabled':<24} {median * 1e6:>12.2f} µs/appel{status}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = get_engine(load_db_config(url=f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"))
+        create_schema(engine, reset=True)
+        names = seed(engine, n_countries, n_days, n_diseases=1)
+        with engine.begin() as connection:
+            connection.exec_driver_sql("CREATE UNIQUE INDEX uq_country_name ON Country (name)")
+            connection.exec_driver_sql("CREATE INDEX idx_global_data_country_date ON Global_Data (country_id, date)")
+
+        bench("load_data", lambda: [load_data(engine, name, targets=TARGETS) for name in names])
+        bench("load_data_multi", lambda: load_data_multi(engine, names, targets=TARGETS))
+        df = load_data(engine, names[0], targets=TARGETS)
+        dispose_engines()
+
+        bench("create_features", lambda: [create_features(df.copy(), target) for target in TARGETS])
+        bench("create_features_multi", lambda: create_features_multi(df, TARGETS))
+        features = create_features_multi(df, TARGETS)
+        frames = {target: features_frame(features, target) for target in TARGETS}
+        feature_names = [c for c in frames[TARGET].columns if c != TARGET]
+
+        model_dir = os.path.join(tmp_dir, "models")
+        manager = PandemicModel(model_dir=model_dir, registry=ModelRegistry())
+        bench("train_model", lambda: manager.train_model(frames[TARGET], TARGET, feature_names))
+        tuned = PandemicModel(model_dir=os.path.join(tmp_dir, "tuned"), registry=ModelRegistry(),
+                              tuner=get_tuner("halving", tune_budget_seconds))
+        bench("train_model_tuned",
+              lambda: tuned.train_model(frames[TARGET], TARGET, feature_names, tune_hyperparams=True), 1)
+
+        if not any(stage.startswith("predict_") or stage == "visualize_all_results" for stage in stages):
+            return report(results, n_countries, n_days, repeat, tune_budget_seconds, plot_format)
+
+        # Modèles et prédictions des trois cibles (hors chronométrage)
+        predictions = {}
+        with redirect_stdout(io.StringIO()):
+            for target in TARGETS:
+                target_features = [c for c in frames[target].columns if c != target]
+                model, _ = manager.train_model(frames[target], target, target_features)
+                manager.save_model(model, target)
+                predictions[target] = manager.predict_future(frames[target], target, target_features,
+                                                             days_ahead=HORIZONS[0])
+        for horizon in HORIZONS:
+            bench(f"predict_{horizon}",
+                  lambda: manager.predict_future(frames[TARGET], TARGET, feature_names, days_ahead=horizon))
+
+        if "visualize_all_results" in stages:
+            from predictor.visualization import visualize_all_results
+            output_dir = os.path.join(tmp_dir, "visualization")
+            bench("visualize_all_results",
+                  lambda: visualize_all_results(df, predictions, names[0], output_dir=output_dir, fmt=plot_format))
+
+    return report(results, n_countries, n_days, repeat, tune_budget_seconds, plot_format)
+
+
+def report(results, n_countries, n_days, repeat, tune_budget_seconds, plot_format):
+    return {
+        'environment': environment(),
+        'config': {'countries': n_countries, 'days': n_days, 'repeat': repeat,
+                   'tune_budget_seconds': tune_budget_seconds, 'plot_format': plot_format},
+        'results': results,
+    }
+
+
+def compare(base, new):
+    """Affiche les médianes de deux fichiers de résultats et leur rapport."""
+    print(f"{'Étape':<24} {'Base (ms)':>11} {'Nouveau (ms)':>13} {'Rapport':>8}")
+    for stage in STAGES:
+        if stage not in base['results'] or stage not in new['results']:
+            continue
+        before = base['results'][stage]['median'] * 1000
+        after = new['results'][stage]['median'] * 1000
+        print(f"{stage:<24} {before:>11.1f} {after:>13.1f} {after / before:>7.2f}x")
+    for name, result in (("base", base), ("nouveau", new)):
+        env = result['environment']
+        print(f"{name}: commit {env['commit']}{' (modifié)' if env['dirty'] else ''}, {result['config']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de benchmarks (chargement, features, modèle, graphiques)")
+    parser.add_argument("--countries", type=int, default=20, help="Nombre de pays de la base synthétique")
+    parser.add_argument("--days", type=int, default=730, help="Nombre de jours par pays")
+    parser.add_argument("--repeat", type=int, default=3, help="Répétitions par étape (1 pour le tuning)")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=None, help="Étapes à exécuter")
+    parser.add_argument("--tune-budget-seconds", type=float, default=30, help="Budget du tuning")
+    parser.add_argument("--plot-format", choices=["png", "svg", "none"], default="png",
+                        help="Format des graphiques de visualize_all_results")
+    parser.add_argument("--output", type=str, default=None, help="Fichier JSON des résultats")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NOUVEAU"), default=None,
+                        help="Compare deux fichiers de résultats au lieu d'exécuter la suite")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0], encoding="utf-8") as f_base, open(args.compare[1], encoding="utf-8") as f_new:
+            compare(json.load(f_base), json.load(f_new))
+        return
+
+    print(f"{args.countries} pays × {args.days} jours, {args.repeat} répétitions (médianes)")
+    results = run_suite(args.countries, args.days, args.repeat, args.stages, args.tune_budget_seconds,
+                        args.plot_format)
+    output = args.output or os.path.join("benchmarks", "results", f"{results['environment']['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Résultats enregistrés dans {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark de la répartition des threads entre le pool de processus et XGBoost.
+
+Pour un budget de --threads threads, chaque répartition workers × nthread (produit
+égal au budget) entraîne --fits modèles (tree_method="hist") et affiche le débit en
+entraînements par seconde. La dernière ligne reproduit l'ancien comportement
+(chaque worker utilise tous les cœurs) pour mesurer la sur-souscription.
+
+    python benchmarks/threads.py --threads 8 --fits 32 --rows 2000
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+from predictor.model import PandemicModel, ModelRegistry
+
+
+def make_training_frame(rows, n_lags=30, seed=42):
+    """Génère un jeu de features synthétique de la forme produite par create_features."""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2020-01-01", periods=rows, freq="D")
+    df = pd.DataFrame({f"lag_{i}": rng.random(rows) for i in range(1, n_lags + 1)}, index=index)
+    df["new_cases"] = rng.integers(0, 1000, rows)
+    return df
+
+
+def fit_one(rows, n_jobs, seed):
+    df = make_training_frame(rows, seed=seed)
+    features = [col for col in df.columns if col.startswith("lag_")]
+    manager = PandemicModel(registry=ModelRegistry(), n_jobs=n_jobs)
+    manager.train_model(df, "new_cases", features)
+
+
+def run(workers, nthread, fits, rows):
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(fit_one, [rows] * fits, [nthread] * fits, range(fits)))
+    return fits / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark workers × threads XGBoost")
+    parser.add_argument("--threads", type=int, default=os.cpu_count(), help="Budget total de threads")
+    parser.add_argument("--fits", type=int, default=32, help="Nombre d'entraînements par configuration")
+    parser.add_argument("--rows", type=int, default=2000, help="Nombre de lignes par entraînement")
+    args = parser.parse_args()
+
+    splits = [(w, args.threads // w) for w in range(1, args.threads + 1) if args.threads % w == 0]
+    # Ancien comportement : chaque worker utilise tous les cœurs
+    splits.append((args.threads, args.threads))
+
+    print(f"{'Workers':>8} {'nthread':>8} {'Threads':>8} {'Entraînements/s':>16}")
+    for workers, nthread in splits:
+        rate = run(workers, nthread, args.fits, args.rows)
+        print(f"{workers:>8} {nthread:>8} {workers * nthread:>8} {rate:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -46,4 +46,59 @@ CREATE TABLE Global_Data (
     tests_per_million INT,
     FOREIGN KEY (country_id) REFERENCES Country(id),
     FOREIGN KEY (disease_id) REFERENCES Disease(id)
-);
\ No newline at end of file
+);
+
+-- ---------------------------------------------------------------------------
+-- Index recommandés pour predictor.database.load_data
+-- (WHERE c.name = ... ORDER BY gd.date) : recherche du pays par son nom puis
+-- parcours ordonné de ses lignes, sans full scan ni filesort.
+-- Sur une base existante, ces instructions peuvent être exécutées seules.
+-- ---------------------------------------------------------------------------
+CREATE UNIQUE INDEX uq_country_name ON Country (name);
+CREATE INDEX idx_global_data_country_date ON Global_Data (country_id, date);
+
+-- ---------------------------------------------------------------------------
+-- Table optionnelle : série quotidienne pré-agrégée par pays.
+-- Si elle existe, load_data l'interroge à la place de Global_Data.
+-- Elle est tenue à jour par scripts/refresh_daily_series.py
+-- (predictor.database.refresh_daily_series).
+-- ---------------------------------------------------------------------------
+CREATE TABLE Country_Daily_Series (
+    country_id INT NOT NULL,
+    date DATE NOT NULL,
+    new_cases INT,
+    new_deaths INT,
+    new_recovered INT,
+    PRIMARY KEY (country_id, date),
+    FOREIGN KEY (country_id) REFERENCES Country(id)
+);
+
+-- ---------------------------------------------------------------------------
+-- Résultats des prédictions (predictor.database.save_forecasts).
+-- Une exécution de main.py (run_id) écrit une ligne Model_Run par (pays, cible),
+-- avec ses métriques, et une ligne Forecast par jour prédit, en une transaction.
+-- ---------------------------------------------------------------------------
+CREATE TABLE Model_Run (
+    run_id CHAR(32) NOT NULL,
+    country_id INT NOT NULL,
+    target VARCHAR(32) NOT NULL,
+    created_at DATETIME(6) NOT NULL,
+    strategy VARCHAR(16),
+    mae DOUBLE,
+    rmse DOUBLE,
+    r2 DOUBLE,
+    metrics TEXT,
+    PRIMARY KEY (run_id, country_id, target),
+    FOREIGN KEY (country_id) REFERENCES Country(id)
+);
+CREATE INDEX idx_model_run_created_at ON Model_Run (created_at);
+
+CREATE TABLE Forecast (
+    run_id CHAR(32) NOT NULL,
+    country_id INT NOT NULL,
+    target VARCHAR(32) NOT NULL,
+    date DATE NOT NULL,
+    value DOUBLE NOT NULL,
+    PRIMARY KEY (run_id, country_id, target, date),
+    FOREIGN KEY (run_id, country_id, target) REFERENCES Model_Run(run_id, country_id, target)
+);
@@ -1,115 +1,612 @@
-from predictor.database import create_db_engine, load_data
-from predictor.data_processing import create_features
-from predictor.model import PandemicModel
-from predictor.visualization import visualize_all_results
+# Les modules lourds (pandas, SQLAlchemy, XGBoost, matplotlib) sont importés dans les
+# fonctions qui les utilisent : --help et les runs sans graphiques (--no-plots) ne
+# paient que ce dont ils ont besoin.
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import argparse
 import os
+import sys
+import time
+
+FEATURE_COLUMNS = ['day_of_week', 'day_of_month', 'month',
+                   'cases_per_100k', 'deaths_per_100k', 'recovered_per_100k']
+
+
+def get_feature_names(df_features):
+    """Retourne la liste des features utilisées par le modèle."""
+    return [col for col in df_features.columns
+            if col.startswith('lag_') or
+            col.startswith('rolling_') or
+            col in FEATURE_COLUMNS]
+
+
+def process_target(model_manager, df, country_name, target, days_ahead, no_train=False, tune=False,
+                   df_features=None, feature_cache_dir=None, incremental=False, full_retrain_days=7,
+                   strategy="recursive", write_files=True):
+    """
+    Crée les features, entraîne (ou charge) le modèle et prédit une cible pour un pays.
+
+    df_features permet de fournir des features déjà calculées (ex: par create_features_multi) ;
+    sinon elles sont construites via le cache de features (feature_cache_dir pour le cache disque).
+    strategy="direct" utilise un modèle multi-horizon qui prédit tout l'horizon en un appel.
+    write_files=False n'écrit pas le CSV des prédictions (résultats enregistrés en base).
+
+    Returns:
+        preds: DataFrame des prédictions (None si la cible est absente des données).
+        target_metrics: Métriques d'évaluation (None si aucun entraînement n'a eu lieu).
+    """
+    # Vérifier que la colonne cible existe bien dans les données chargées
+    if target not in df.columns:
+        print(f"Attention: La colonne {target} n'est pas présente dans les données chargées.")
+        return None, None
+
+    # Création des features pour chaque cible
+    if df_features is None:
+        from predictor.data_processing import create_features_cached, features_frame, get_feature_cache
+        features = create_features_cached(df, [target], look_back=30,
+                                          use_lags=True, use_rolling=True, use_calendar=True,
+                                          cache=get_feature_cache(feature_cache_dir))
+        df_features = features_frame(features, target)
+    feature_names = get_feature_names(df_features)
+    target_metrics = None
+
+    if strategy == "direct":
+        model = None if not no_train else model_manager.load_direct_model(target, days_ahead)
+        if model is None:
+            print(f"Entraînement du modèle direct pour {target} (horizon {days_ahead} jours)...")
+            model, target_metrics = model_manager.train_direct_model(
+                df_features, target, feature_names=feature_names, horizon=days_ahead
+            )
+            model_manager.save_direct_model(model, target)
+            print(f"Modèle direct entraîné pour {target} - Métriques: {target_metrics}")
+    elif not no_train:
+        # Entraînement du modèle avec option de tuning
+        print(f"Entraînement du modèle pour {target}...")
+        model, target_metrics = model_manager.train_model(
+            df_features, target, feature_names=feature_names,
+            tune_hyperparams=tune, incremental=incremental,
+            full_retrain_days=full_retrain_days
+        )
+        # Sauvegarde du modèle
+        model_manager.save_model(model, target)
+        print(f"Modèle entraîné pour {target} - Métriques: {target_metrics}")
+    else:
+        # Chargement du modèle existant
+        print(f"Chargement du modèle existant pour {target}...")
+        model = model_manager.load_model(target)
+        if model is None:
+            print(f"Aucun modèle trouvé pour {target}, entraînement d'un nouveau modèle.")
+            model, target_metrics = model_manager.train_model(
+                df_features, target, feature_names=feature_names,
+                tune_hyperparams=tune
+            )
+            model_manager.save_model(model, target)
+
+    # Prédictions futures
+    print(f"Génération des prédictions pour {target}...")
+    if strategy == "direct":
+        preds = model_manager.predict_future_direct(
+            df_features, target, feature_names=feature_names,
+            days_ahead=days_ahead
+        )
+    else:
+        preds = model_manager.predict_future(
+            df_features, target, feature_names=feature_names,
+            days_ahead=days_ahead
+        )
+
+    # On clippe les valeurs prédites pour éviter les valeurs négatives
+    preds[f"predicted_{target}"] = preds[f"predicted_{target}"].clip(lower=0)
+
+    # Sauvegarde des prédictions dans un CSV
+    if write_files:
+        preds.to_csv(f"visualization/{country_name}_{target}_predictions.csv")
+        print(f"Prédictions sauvegardées pour {target}")
+    return preds, target_metrics
+
+
+def save_results(df, predictions, metrics, country_name, plots=True, plot_format="png", write_files=True):
+    """
+    Génère les visualisations (sauf si plots=False) et, si write_files, sauvegarde les
+    métriques et statistiques d'un pays dans des fichiers texte.
+    """
+    if plots:
+        from predictor.visualization import visualize_all_results
+        print("Génération des visualisations...")
+        visualize_all_results(df, predictions, country_name, fmt=plot_format, stats=write_files)
+    if not write_files:
+        return
+
+    # Sauvegarde des métriques
+    for target, target_metrics in metrics.items():
+        with open(f"visualization/{country_name}_{target}_metrics.txt", "w") as f:
+            for key, value in target_metrics.items():
+                f.write(f"{key}: {value}\n")
+
+
+def render_plots(jobs, args, workers=1):
+    """
+    Génère les visualisations de plusieurs pays, réparties sur un pool de processus
+    (les figures sont réutilisées d'un pays à l'autre dans chaque processus).
+
+    Args:
+        jobs: Liste de tuples (df, predictions, country_name).
+    """
+    if args.no_plots or not jobs:
+        return
+    from predictor import instrumentation
+    from predictor.visualization import visualize_many
+    print(f"Génération des visualisations ({len(jobs)} pays, format {args.plot_format})...")
+    with instrumentation.stage("plots", countries=len(jobs)):
+        visualize_many(jobs, fmt=args.plot_format, workers=workers, stats=args.write_files)
+
+
+def store_results(engine, predictions, metrics, args, strategy):
+    """
+    Enregistre en base, en une transaction, les prédictions et métriques de tous les pays
+    (tables Model_Run et Forecast) ; sans effet si la sortie en base est désactivée.
+
+    Args:
+        predictions: {pays: {cible: DataFrame de prédictions}}.
+        metrics: {pays: {cible: métriques}}.
+    """
+    if not args.db_output:
+        return None
+    from predictor.database import save_forecasts
+    run_id = save_forecasts(engine, predictions, metrics, strategy=strategy)
+    print(f"Résultats enregistrés en base (exécution {run_id}).")
+    return run_id
+
+
+def run_job(country_name, df, target, days_ahead, no_train, tune, model_dir, model_format="joblib",
+            feature_cache_dir=None, tuner="halving", tune_budget_seconds=None, hyperparam_store=None,
+            hyperparam_max_age_days=30, incremental=False, full_retrain_days=7, n_jobs=None,
+            strategy="recursive", write_files=True, instrumentation_options=None, df_features=None):
+    """
+    Exécute un job (pays, cible) dans un processus du pool.
+
+    Chaque pays dispose de son propre répertoire de modèles pour que les
+    workers n'écrasent pas les fichiers des autres pays. Avec instrumentation_options,
+    les mesures des étapes du job sont renvoyées dans result['instrumentation'].
+    df_features fournit les features de la cible déjà construites (voir run_batch).
+    """
+    start = time.perf_counter()
+    result = {'country': country_name, 'target': target, 'preds': None,
+              'metrics': None, 'error': None}
+    if instrumentation_options:
+        from predictor import instrumentation
+        instrumentation.configure(**instrumentation_options)
+        instrumentation.reset()
+    try:
+        from predictor.model import PandemicModel
+        from predictor.tuning import HyperparamStore, get_tuner
+        store = HyperparamStore(hyperparam_store, max_age_days=hyperparam_max_age_days) if hyperparam_store else None
+        model_manager = PandemicModel(model_dir=model_dir, model_format=model_format,
+                                      tuner=get_tuner(tuner, tune_budget_seconds, n_jobs),
+                                      hyperparam_store=store, country=country_name, n_jobs=n_jobs)
+        result['preds'], result['metrics'] = process_target(
+            model_manager, df, country_name, target, days_ahead, no_train, tune,
+            df_features=df_features, feature_cache_dir=feature_cache_dir, incremental=incremental,
+            full_retrain_days=full_retrain_days, strategy=strategy, write_files=write_files
+        )
+    except Exception as e:
+        result['error'] = str(e)
+    result['duration'] = time.perf_counter() - start
+    if instrumentation_options:
+        result['instrumentation'] = instrumentation.export()
+    return result
+
+
+def split_threads(threads, workers=None):
+    """
+    Répartit le budget de threads entre le pool de processus (parallélisme externe)
+    et XGBoost dans chaque processus (nthread), pour ne jamais dépasser threads au total.
+
+    Returns:
+        workers: Nombre de processus du pool.
+        nthread: Nombre de threads XGBoost par processus.
+    """
+    threads = max(1, threads or os.cpu_count() or 1)
+    workers = max(1, min(workers or threads, threads))
+    return workers, max(1, threads // workers)
+
+
+def read_countries_file(path):
+    """Lit un fichier contenant un nom de pays par ligne (les lignes vides et # sont ignorées)."""
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
+
+
+def print_timing_summary(results, total_duration):
+    """Affiche le temps d'exécution de chaque job (pays, cible)."""
+    print("\nRésumé des temps d'exécution:")
+    print(f"{'Pays':<30} {'Cible':<15} {'Durée (s)':>10}  Statut")
+    for result in sorted(results, key=lambda r: r['duration'], reverse=True):
+        status = "OK" if result['error'] is None else f"ERREUR: {result['error']}"
+        print(f"{result['country']:<30} {result['target']:<15} {result['duration']:>10.2f}  {status}")
+    job_time = sum(r['duration'] for r in results)
+    print(f"{len(results)} jobs - temps cumulé: {job_time:.2f}s - temps total: {total_duration:.2f}s")
+
+
+def run_batch(engine, country_names, targets, args):
+    """
+    Traite plusieurs pays : une seule requête pour toutes les données, puis les jobs
+    (pays, cible) sont répartis sur un pool de processus.
+
+    Sans cache local, les données sont lues en streaming et les jobs d'un pays sont
+    soumis dès que ses lignes ont été lues. Les features de toutes les cibles d'un pays
+    sont construites en une seule passe (create_features_multi) avant la soumission.
+    """
+    from predictor import instrumentation
+    from predictor.database import load_data_multi, load_data_stream
+    from predictor.data_processing import create_features_cached, features_frame, get_feature_cache
+
+    start = time.perf_counter()
+    workers, nthread = split_threads(args.threads, args.workers)
+    if args.cache_dir:
+        country_frames = load_data_multi(engine, country_names, targets=targets,
+                                         cache_dir=args.cache_dir, refresh=args.refresh).items()
+    else:
+        country_frames = load_data_stream(engine, country_names, targets=targets, per_country=True)
+    print(f"Exécution des jobs avec {workers} workers × {nthread} threads XGBoost...")
+
+    frames = {}
+    futures = []
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Lecture des données (en streaming) et soumission des jobs de chaque pays
+        with instrumentation.stage("load_and_submit"):
+            cache = get_feature_cache(args.feature_cache_dir)
+            for country, df in country_frames:
+                frames[country] = df
+                features = create_features_cached(df, [t for t in targets if t in df.columns], look_back=30,
+                                                  use_lags=True, use_rolling=True, use_calendar=True, cache=cache)
+                futures += [
+                    executor.submit(run_job, country, df, target, args.days, args.no_train, args.tune,
+                                    os.path.join("models", country), args.model_format,
+                                    args.feature_cache_dir, args.tuner, args.tune_budget_seconds,
+                                    args.hyperparam_store, args.hyperparam_max_age_days,
+                                    args.incremental, args.full_retrain_days, nthread, args.strategy,
+                                    args.write_files, args.instrumentation,
+                                    features_frame(features, target) if target in features['X'] else None)
+                    for target in targets
+                ]
+        for future in as_completed(futures):
+            result = future.result()
+            if result.get('instrumentation'):
+                instrumentation.merge(result.pop('instrumentation'), country=result['country'],
+                                      target=result['target'])
+            if result['error'] is not None:
+                print(f"Erreur pour {result['country']} / {result['target']}: {result['error']}")
+            results.append(result)
+
+    if not frames:
+        print("Aucune donnée trouvée pour les pays demandés.")
+    plot_jobs = []
+    all_predictions = {}
+    all_metrics = {}
+    for country, df in frames.items():
+        predictions = {r['target']: r['preds'] for r in results
+                       if r['country'] == country and r['preds'] is not None}
+        metrics = {r['target']: r['metrics'] for r in results
+                   if r['country'] == country and r['metrics'] is not None}
+        if predictions:
+            # Conserver l'ordre des cibles demandé
+            predictions = {t: predictions[t] for t in targets if t in predictions}
+            save_results(df, predictions, metrics, country, plots=False, write_files=args.write_files)
+            plot_jobs.append((df, predictions, country))
+            all_predictions[country] = predictions
+            all_metrics[country] = metrics
+        else:
+            print(f"Aucune prédiction générée pour {country}.")
+    store_results(engine, all_predictions, all_metrics, args, args.strategy)
+    render_plots(plot_jobs, args, workers)
+
+    print_timing_summary(results, time.perf_counter() - start)
+
+
+def country_populations(frames):
+    """Population de chaque pays (None si elle manque pour au moins un pays)."""
+    populations = {}
+    for country, df in frames.items():
+        population = df['population'].dropna() if 'population' in df.columns else []
+        if len(population) == 0 or population.iloc[-1] <= 0:
+            print(f"Population inconnue pour {country} : pas de normalisation par habitant.")
+            return None
+        populations[country] = float(population.iloc[-1])
+    return populations
+
+
+def run_global(engine, country_names, targets, args):
+    """
+    Mode modèle global : pour chaque cible, un seul modèle est entraîné sur les lignes de
+    tous les pays (pays en feature catégorielle, valeurs pour 100 000 habitants), puis
+    tous les pays sont prédits en un seul lot avec ce booster.
+    """
+    from predictor.database import load_data_multi, load_data_stream
+    from predictor.data_processing import create_features_cached, features_frame, get_feature_cache
+    from predictor.model import PandemicModel
+
+    start = time.perf_counter()
+    if args.cache_dir:
+        frames = load_data_multi(engine, country_names, targets=targets,
+                                 cache_dir=args.cache_dir, refresh=args.refresh)
+    else:
+        frames = dict(load_data_stream(engine, country_names, targets=targets, per_country=True))
+    if not frames:
+        print("Aucune donnée trouvée pour les pays demandés.")
+        return
+
+    cache = get_feature_cache(args.feature_cache_dir)
+    features = {
+        country: create_features_cached(df, [t for t in targets if t in df.columns], look_back=30,
+                                        use_lags=True, use_rolling=True, use_calendar=True, cache=cache)
+        for country, df in frames.items()
+    }
+    populations = country_populations(frames)
+    model_manager = PandemicModel(model_format=args.model_format, n_jobs=args.threads)
+    predictions = {country: {} for country in frames}
+    metrics = {country: {} for country in frames}
+    results = []
+
+    for target in targets:
+        job_start = time.perf_counter()
+        result = {'country': "(global)", 'target': target, 'error': None}
+        dfs = {country: features_frame(f, target) for country, f in features.items()
+               if target in f['X'] and len(f['index'][target]) > 0}
+        try:
+            if not dfs:
+                raise ValueError(f"La colonne {target} n'est présente pour aucun pays.")
+            feature_names = get_feature_names(next(iter(dfs.values())))
+            model = model_manager.load_global_model(target) if args.no_train else None
+            if model is None:
+                print(f"Entraînement du modèle global pour {target} ({len(dfs)} pays)...")
+                model, target_metrics = model_manager.train_global_model(dfs, target, feature_names,
+                                                                         populations=populations)
+                model_manager.save_global_model(model, target)
+                print(f"Modèle global entraîné pour {target} - MAE: {target_metrics['MAE']:.2f}, "
+                      f"RMSE: {target_metrics['RMSE']:.2f}")
+                for country, country_metrics in target_metrics['per_country'].items():
+                    metrics[country][target] = country_metrics
+
+            preds = model_manager.predict_future_global(dfs, target, feature_names,
+                                                        populations=populations, days_ahead=args.days)
+            for country, country_preds in preds.items():
+                country_preds[f"predicted_{target}"] = country_preds[f"predicted_{target}"].clip(lower=0)
+                if args.write_files:
+                    country_preds.to_csv(f"visualization/{country}_{target}_predictions.csv")
+                predictions[country][target] = country_preds
+        except Exception as e:
+            result['error'] = str(e)
+            print(f"Erreur pour le modèle global {target}: {e}")
+        result['duration'] = time.perf_counter() - job_start
+        results.append(result)
+
+    plot_jobs = []
+    for country, df in frames.items():
+        if predictions[country]:
+            save_results(df, predictions[country], metrics[country], country, plots=False,
+                         write_files=args.write_files)
+            plot_jobs.append((df, predictions[country], country))
+        else:
+            print(f"Aucune prédiction générée pour {country}.")
+    store_results(engine, {c: p for c, p in predictions.items() if p}, metrics, args, "global")
+    render_plots(plot_jobs, args, split_threads(args.threads, args.workers)[0])
+
+    print_timing_summary(results, time.perf_counter() - start)
+
+
+def run_backtest(engine, country_names, targets, args):
+    """
+    Backtest walk-forward : pour chaque cible, args.backtest dates de coupure par pays,
+    entraînement sur l'historique antérieur et prévision des args.days jours suivants.
+    Affiche l'erreur par horizon (MAE, RMSE, biais) sur tous les pays.
+    """
+    from predictor.backtest import backtest, horizon_errors, prepare_frames
+    from predictor.database import load_data_multi
+
+    start = time.perf_counter()
+    frames = load_data_multi(engine, country_names, targets=targets,
+                             cache_dir=args.cache_dir, refresh=args.refresh)
+    if not frames:
+        print("Aucune donnée trouvée pour les pays demandés.")
+        return
+    workers, nthread = split_threads(args.threads, args.workers)
+    for target in targets:
+        target_frames = prepare_frames(frames, target)
+        if not target_frames:
+            print(f"La colonne {target} n'est présente pour aucun pays.")
+            continue
+        print(f"Backtest de {target} ({len(target_frames)} pays, {args.backtest} coupures, "
+              f"{workers} workers × {nthread} threads XGBoost)...")
+        try:
+            results = backtest(target_frames, target, get_feature_names(next(iter(target_frames.values()))),
+                               n_cutoffs=args.backtest, horizon=args.days, workers=workers, n_jobs=nthread)
+        except ValueError as e:
+            print(f"Erreur pour le backtest de {target}: {e}")
+            continue
+        print(f"\nErreur par horizon pour {target}:")
+        print(horizon_errors(results).to_string(float_format=lambda v: f"{v:.2f}"))
+        if args.write_files:
+            results.to_csv(f"visualization/backtest_{target}.csv", index=False)
+    print(f"Backtest terminé en {time.perf_counter() - start:.2f}s")
+
+
+def report_instrumentation(args, run_seconds):
+    """Affiche la durée et le pic mémoire de chaque étape, écrit le rapport et le profil demandés."""
+    from predictor import instrumentation
+    print("\nDétail par étape:")
+    print(f"{'Étape':<25} {'Appels':>7} {'Total (s)':>10} {'Max (s)':>9} {'Pic (Mo)':>9}")
+    for name, entry in instrumentation.summary().items():
+        peak = f"{entry['peak_bytes'] / 1024 ** 2:.1f}" if entry['peak_bytes'] is not None else "-"
+        print(f"{name:<25} {entry['calls']:>7} {entry['total_seconds']:>10.2f} {entry['max_seconds']:>9.2f} {peak:>9}")
+    if args.report:
+        instrumentation.write_report(args.report, run_seconds, extra={'argv': sys.argv[1:]})
+        print(f"Rapport d'instrumentation écrit dans {args.report}")
+    if args.profile:
+        slowest = instrumentation.dump_profile(args.profile)
+        if slowest is not None:
+            print(f"Profil de l'étape la plus lente ({slowest[0]}, {slowest[1]:.2f}s) écrit dans {args.profile} "
+                  f"(python -m pstats {args.profile})")
+
 
 def main():
     parser = argparse.ArgumentParser(description="Prédiction de cas/décès par IA")
     parser.add_argument("--country", type=str, default="France", help="Nom du pays à prédire")
+    parser.add_argument("--all-countries", action="store_true", help="Prédire tous les pays présents en base")
+    parser.add_argument("--countries-file", type=str, help="Fichier contenant les pays à prédire (un par ligne)")
+    parser.add_argument("--global-model", action="store_true",
+                        help="Mode multi-pays : un modèle par cible entraîné sur tous les pays")
+    parser.add_argument("--threads", type=int, default=os.cpu_count(),
+                        help="Nombre total de threads (partagé entre les workers et XGBoost)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Nombre de processus pour le mode multi-pays (par défaut: --threads, "
+                             "soit un thread XGBoost par processus)")
     parser.add_argument("--days", type=int, default=7, help="Nombre de jours à prédire")
+    parser.add_argument("--strategy", choices=["recursive", "direct"], default="recursive",
+                        help="Prévision récursive (un pas à la fois) ou directe (modèle multi-horizon)")
+    parser.add_argument("--backtest", type=int, default=None, metavar="N",
+                        help="Backtest walk-forward sur N dates de coupure par pays (horizon: --days) au lieu de prédire")
+    parser.add_argument("--no-plots", action="store_true",
+                        help="Ne pas générer les graphiques (matplotlib n'est pas chargé)")
+    parser.add_argument("--plot-format", choices=["png", "svg", "none"], default="png",
+                        help="Format des graphiques (none : aucun graphique)")
+    parser.add_argument("--write-files", action="store_true",
+                        help="Écrire aussi les prédictions (CSV), métriques et statistiques (TXT) dans visualization/")
+    parser.add_argument("--no-db-output", action="store_true",
+                        help="Ne pas enregistrer les résultats dans les tables Model_Run/Forecast (implique --write-files)")
     parser.add_argument("--no-train", action="store_true", help="Utiliser les modèles existants sans ré-entraînement")
     parser.add_argument("--tune", action="store_true", help="Effectuer un tuning des hyperparamètres")
-    parser.add_argument("--targets", nargs="+", 
+    parser.add_argument("--tuner", choices=["halving", "hyperband", "tpe"], default="halving",
+                        help="Stratégie de tuning (successive halving, hyperband ou TPE via optuna)")
+    parser.add_argument("--tune-budget-seconds", type=float, default=None,
+                        help="Durée maximale du tuning par modèle, en secondes")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Poursuivre l'entraînement du modèle sauvegardé au lieu de repartir de zéro")
+    parser.add_argument("--full-retrain-days", type=float, default=7,
+                        help="Délai maximal entre deux entraînements complets en mode --incremental")
+    parser.add_argument("--hyperparam-store", type=str, default=None,
+                        help="Fichier SQLite où conserver et réutiliser les hyperparamètres tunés "
+                             "(ex: models/hyperparams.sqlite ; désactivé par défaut)")
+    parser.add_argument("--hyperparam-max-age-days", type=float, default=30,
+                        help="Âge maximal des hyperparamètres stockés avant un nouveau tuning")
+    parser.add_argument("--db-config", type=str, default=None,
+                        help="Fichier INI de connexion à la base (section [database], par défaut $PANDEMIA_DB_CONFIG)")
+    parser.add_argument("--cache-dir", type=str, default=None,
+                        help="Répertoire du cache local des données (chargement incrémental)")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Ignorer le cache local et recharger tout l'historique depuis la base")
+    parser.add_argument("--feature-cache-dir", type=str, default=None,
+                        help="Répertoire du cache disque des matrices de features")
+    parser.add_argument("--model-format", choices=["joblib", "ubj"], default="joblib",
+                        help="Format de stockage des modèles (pickle joblib ou booster XGBoost natif UBJSON)")
+    parser.add_argument("--targets", nargs="+",
                        choices=["new_cases", "new_deaths", "new_recovered"],
                        default=["new_cases", "new_deaths", "new_recovered"],
                        help="Cibles à prédire (par défaut: toutes)")
+    parser.add_argument("--instrument", action="store_true",
+                        help="Mesurer la durée et le pic mémoire (tracemalloc) de chaque étape")
+    parser.add_argument("--report", type=str, default=None,
+                        help="Rapport d'instrumentation (JSON, ou textfile Prometheus si .prom) ; active --instrument")
+    parser.add_argument("--profile", nargs="?", const="slowest_stage.prof", default=None,
+                        help="Écrire le profil cProfile de l'étape la plus lente (défaut: slowest_stage.prof)")
     args = parser.parse_args()
 
-    # Configuration de la base de données
-    DB_USER = "root"
-    DB_PASSWORD = "root"
-    DB_HOST = "localhost"
-    DB_NAME = "pandemia"
+    instrumented = args.instrument or args.report or args.profile
+    args.instrumentation = {'memory': True, 'profile': bool(args.profile)} if instrumented else None
+    if not instrumented:
+        run(args)
+        return
+    from predictor import instrumentation
+    instrumentation.configure(**args.instrumentation)
+    start = time.perf_counter()
+    try:
+        run(args)
+    finally:
+        report_instrumentation(args, time.perf_counter() - start)
+
+
+def run(args):
+    """Exécute le traitement demandé par la ligne de commande."""
+    from predictor.database import get_engine, has_forecast_tables, load_data, load_db_config
+    from predictor.data_processing import create_features_cached, features_frame, get_feature_cache
+    from predictor.model import PandemicModel
+    from predictor.tuning import HyperparamStore, get_tuner
 
     # S'assurer que les dossiers existent
     os.makedirs("visualization", exist_ok=True)
     os.makedirs("models", exist_ok=True)
 
     # Initialisation
-    engine = create_db_engine(DB_USER, DB_PASSWORD, DB_HOST, DB_NAME)
+    # Configuration de la base de données (fichier INI et/ou variables PANDEMIA_DB_*)
+    engine = get_engine(load_db_config(args.db_config))
+
+    # Sortie des résultats : tables Model_Run/Forecast, fichiers sur demande (ou si les tables manquent)
+    args.db_output = not args.no_db_output and has_forecast_tables(engine)
+    if not args.no_db_output and not args.db_output:
+        print("Tables Model_Run/Forecast absentes (voir docs/database.sql) : résultats écrits dans visualization/.")
+    args.write_files = args.write_files or not args.db_output
     country_name = args.country
     days_ahead = args.days
     targets = args.targets
 
+    # Backtest walk-forward (pays demandé, ou tous les pays en mode multi-pays)
+    if args.backtest:
+        if args.all_countries or args.countries_file:
+            country_names = None if args.all_countries else read_countries_file(args.countries_file)
+        else:
+            country_names = [country_name]
+        run_backtest(engine, country_names, targets, args)
+        return
+
+    # Mode multi-pays
+    if args.all_countries or args.countries_file:
+        country_names = None if args.all_countries else read_countries_file(args.countries_file)
+        if args.global_model:
+            run_global(engine, country_names, targets, args)
+        else:
+            run_batch(engine, country_names, targets, args)
+        print("Traitement terminé avec succès!")
+        return
+
     # Chargement des données (en passant les targets)
-    df = load_data(engine, country_name, targets=targets)
+    df = load_data(engine, country_name, targets=targets,
+                   cache_dir=args.cache_dir, refresh=args.refresh)
 
-    model_manager = PandemicModel()
+    store = (HyperparamStore(args.hyperparam_store, max_age_days=args.hyperparam_max_age_days)
+             if args.hyperparam_store else None)
+    model_manager = PandemicModel(model_format=args.model_format,
+                                  tuner=get_tuner(args.tuner, args.tune_budget_seconds, args.threads),
+                                  hyperparam_store=store, country=country_name, n_jobs=args.threads)
     predictions = {}
     metrics = {}
 
-    for target in targets:
-        # Vérifier que la colonne cible existe bien dans les données chargées
-        if target not in df.columns:
-            print(f"Attention: La colonne {target} n'est pas présente dans les données chargées.")
-            continue
+    # Features de toutes les cibles construites en une seule passe
+    features = create_features_cached(df, [t for t in targets if t in df.columns], look_back=30,
+                                      use_lags=True, use_rolling=True, use_calendar=True,
+                                      cache=get_feature_cache(args.feature_cache_dir))
 
-        # Création des features pour chaque cible
-        df_features = create_features(df.copy(), target, look_back=30, 
-                                    use_lags=True, use_rolling=True, use_calendar=True)
-
-        # Définition de la liste des features
-        feature_names = [col for col in df_features.columns 
-            if col.startswith('lag_') or 
-            col.startswith('rolling_') or 
-            col in ['day_of_week', 'day_of_month', 'month', 
-                    'cases_per_100k', 'deaths_per_100k', 'recovered_per_100k']
-            and col in df_features.columns]
-
-        if not args.no_train:
-            # Entraînement du modèle avec option de tuning
-            print(f"Entraînement du modèle pour {target}...")
-            model, target_metrics = model_manager.train_model(
-                df_features, target, feature_names=feature_names, 
-                tune_hyperparams=args.tune
-            )
-            # Sauvegarde du modèle
-            model_manager.save_model(model, target)
-            metrics[target] = target_metrics
-            print(f"Modèle entraîné pour {target} - Métriques: {target_metrics}")
-        else:
-            # Chargement du modèle existant
-            print(f"Chargement du modèle existant pour {target}...")
-            model = model_manager.load_model(target)
-            if model is None:
-                print(f"Aucun modèle trouvé pour {target}, entraînement d'un nouveau modèle.")
-                model, target_metrics = model_manager.train_model(
-                    df_features, target, feature_names=feature_names, 
-                    tune_hyperparams=args.tune
-                )
-                model_manager.save_model(model, target)
-                metrics[target] = target_metrics
-
-        # Prédictions futures
-        print(f"Génération des prédictions pour {target}...")
-        preds = model_manager.predict_future(
-            df_features, target, feature_names=feature_names, 
-            days_ahead=days_ahead
+    for target in targets:
+        preds, target_metrics = process_target(
+            model_manager, df, country_name, target, days_ahead,
+            no_train=args.no_train, tune=args.tune,
+            df_features=features_frame(features, target) if target in features['X'] else None,
+            incremental=args.incremental, full_retrain_days=args.full_retrain_days,
+            strategy=args.strategy, write_files=args.write_files
         )
-        
-        # On clippe les valeurs prédites pour éviter les valeurs négatives
-        preds[f"predicted_{target}"] = preds[f"predicted_{target}"].clip(lower=0)
+        if preds is None:
+            continue
         predictions[target] = preds
-
-        # Sauvegarde des prédictions dans un CSV
-        preds.to_csv(f"visualization/{country_name}_{target}_predictions.csv")
-        print(f"Prédictions sauvegardées pour {target}")
+        if target_metrics is not None:
+            metrics[target] = target_metrics
 
     # Génération de toutes les visualisations
     if predictions:  # Vérifie si le dictionnaire n'est pas vide
-        print("Génération des visualisations...")
-        visualize_all_results(df, predictions, country_name)
-        
-        # Sauvegarde des métriques
-        for target, target_metrics in metrics.items():
-            with open(f"visualization/{country_name}_{target}_metrics.txt", "w") as f:
-                for key, value in target_metrics.items():
-                    f.write(f"{key}: {value}\n")
+        store_results(engine, {country_name: predictions}, {country_name: metrics}, args, args.strategy)
+        save_results(df, predictions, metrics, country_name, plots=not args.no_plots,
+                     plot_format=args.plot_format, write_files=args.write_files)
         print("Traitement terminé avec succès!")
     else:
         print("Aucune prédiction générée. Vérifiez les données chargées et les targets spécifiées.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,158 @@
+"""
+Évaluation walk-forward (rolling origin) du pipeline train_model → prévision récursive.
+
+Pour chaque date de coupure, le modèle est entraîné sur l'historique antérieur puis
+prédit les horizon jours suivants, comparés aux valeurs observées. Contrairement aux
+métriques de train_model (un seul découpage 80/20 qui sert aussi à l'early stopping),
+les erreurs sont mesurées sur des données jamais vues, pour chaque horizon.
+
+Les features de chaque pays sont construites une seule fois ; chaque fold en prend une
+vue (iloc[:coupure], sans copie). Les folds sont répartis sur un pool de processus qui
+reçoit les matrices une fois par processus (héritées sans copie avec fork).
+
+    frames = prepare_frames(load_data_multi(engine, targets=["new_cases"]), "new_cases")
+    results = backtest(frames, "new_cases", n_cutoffs=20, horizon=14, workers=8)
+    print(horizon_errors(results))
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+import logging
+import os
+import numpy as np
+import pandas as pd
+from predictor.data_processing import create_features_multi, features_frame
+from predictor.model import ModelRegistry, PandemicModel, _recursive_forecast
+
+logger = logging.getLogger(__name__)
+
+# Matrices de features du processus courant {pays: DataFrame}, partagées par tous ses folds
+_frames = {}
+
+
+def prepare_frames(raw_frames, target, look_back=30):
+    """
+    Construit une fois les features de chaque pays.
+
+    Args:
+        raw_frames: {pays: DataFrame brut} (ex: load_data_multi).
+        target: Cible évaluée.
+        look_back: Nombre de lags.
+
+    Returns:
+        {pays: DataFrame de features (features_frame)} pour les pays contenant la cible.
+    """
+    frames = {}
+    for country, df in raw_frames.items():
+        if target not in df.columns:
+            continue
+        features = create_features_multi(df, [target], look_back=look_back)
+        if len(features['index'][target]) > 0:
+            frames[country] = features_frame(features, target)
+    return frames
+
+
+def make_cutoffs(n_rows, n_cutoffs, horizon, step=None, min_train=100):
+    """
+    Positions des dates de coupure, de la plus ancienne à la plus récente.
+
+    La dernière coupure laisse horizon lignes à prédire ; les précédentes reculent de
+    step lignes (par défaut horizon). Les coupures laissant moins de min_train lignes
+    d'entraînement sont ignorées.
+    """
+    step = step or horizon
+    last = n_rows - horizon
+    return [cutoff for cutoff in (last - i * step for i in reversed(range(n_cutoffs))) if cutoff >= min_train]
+
+
+def _init_worker(frames):
+    global _frames
+    _frames = frames
+
+
+def _run_fold(country, target, feature_names, cutoff, horizon, n_jobs, look_back):
+    """Entraîne sur les lignes [0, cutoff) d'un pays et prédit les horizon jours suivants."""
+    df = _frames[country]
+    history = df.iloc[:cutoff]
+    manager = PandemicModel(registry=ModelRegistry(), n_jobs=n_jobs)
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        model, _ = manager.train_model(history, target, feature_names)
+    dates, predictions = _recursive_forecast(model, [history], target, feature_names, horizon, look_back)
+    actual = df[target].reindex(dates[0]).to_numpy(dtype=np.float64)
+    return pd.DataFrame({
+        'country': country,
+        'cutoff': history.index[-1],
+        'horizon': np.arange(1, horizon + 1),
+        'date': dates[0],
+        'actual': actual,
+        'predicted': predictions[0].astype(np.float64),
+    })
+
+
+def backtest(frames, target, feature_names=None, n_cutoffs=5, horizon=7, step=None, min_train=100,
+             workers=None, n_jobs=1, look_back=30):
+    """
+    Évalue le pipeline sur n_cutoffs dates de coupure par pays.
+
+    Args:
+        frames: {pays: DataFrame de features} (voir prepare_frames).
+        target: Cible évaluée.
+        feature_names: Features du modèle (par défaut toutes les colonnes sauf la cible).
+        n_cutoffs: Nombre de dates de coupure par pays.
+        horizon: Nombre de jours prédits à chaque coupure.
+        step: Écart (en lignes) entre deux coupures, par défaut horizon.
+        min_train: Nombre minimal de lignes d'entraînement.
+        workers: Nombre de processus (1 pour rester dans le processus courant).
+        n_jobs: Threads XGBoost par fold.
+        look_back: Nombre de lags maintenus dans l'état récursif.
+
+    Returns:
+        DataFrame (country, cutoff, horizon, date, actual, predicted, error), une ligne par jour prédit.
+    """
+    if not frames:
+        raise ValueError("Aucune série à évaluer.")
+    if feature_names is None:
+        feature_names = [c for c in next(iter(frames.values())).columns if c != target]
+    folds = [(country, cutoff) for country, df in frames.items()
+             for cutoff in make_cutoffs(len(df), n_cutoffs, horizon, step, min_train)]
+    if not folds:
+        raise ValueError("Historique trop court pour les coupures demandées.")
+    logger.info(f"Backtest de {target}: {len(folds)} folds ({len(frames)} pays), horizon {horizon} jours.")
+
+    if workers == 1 or len(folds) == 1:
+        _init_worker(frames)
+        results = [_run_fold(country, target, feature_names, cutoff, horizon, n_jobs, look_back)
+                   for country, cutoff in folds]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(frames,)) as executor:
+            futures = [executor.submit(_run_fold, country, target, feature_names, cutoff, horizon, n_jobs, look_back)
+                       for country, cutoff in folds]
+            results = [future.result() for future in as_completed(futures)]
+
+    results = pd.concat(results, ignore_index=True).sort_values(['country', 'cutoff', 'horizon'], ignore_index=True)
+    results['error'] = results['predicted'] - results['actual']
+    return results
+
+
+def horizon_errors(results, by_country=False):
+    """
+    Erreurs par horizon (MAE, RMSE, biais) sur tous les folds.
+
+    Args:
+        results: Sortie de backtest.
+        by_country: Détailler par pays.
+
+    Returns:
+        DataFrame indexé par horizon (ou par pays et horizon).
+    """
+    results = results.dropna(subset=['actual'])
+    keys = ['country', 'horizon'] if by_country else ['horizon']
+    errors = results[keys].assign(abs_error=results['error'].abs(), squared_error=results['error'] ** 2,
+                                  error=results['error'])
+    grouped = errors.groupby(keys)
+    summary = pd.DataFrame({
+        'MAE': grouped['abs_error'].mean(),
+        'RMSE': np.sqrt(grouped['squared_error'].mean()),
+        'bias': grouped['error'].mean(),
+        'folds': grouped['error'].count(),
+    })
+    return summary
@@ -1,4 +1,19 @@
+from collections import OrderedDict
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import as_strided, sliding_window_view
+from predictor.instrumentation import timed
+
+logger = logging.getLogger(__name__)
+
+# Fenêtres (en jours) des moyennes mobiles rolling_<w>_mean
+ROLLING_WINDOWS = (7, 30)
 
 def _create_lag_features(df: pd.DataFrame, target: str, look_back: int) -> pd.DataFrame:
     """Crée les features de décalage temporel."""
@@ -8,8 +23,8 @@ def _create_lag_features(df: pd.DataFrame, target: str, look_back: int) -> pd.Da
 
 def _create_rolling_features(df: pd.DataFrame, target: str) -> pd.DataFrame:
     """Crée les moyennes mobiles."""
-    df['rolling_7_mean'] = df[target].rolling(7).mean()
-    df['rolling_30_mean'] = df[target].rolling(30).mean()
+    for window in ROLLING_WINDOWS:
+        df[f'rolling_{window}_mean'] = df[target].rolling(window).mean()
     return df
 
 def _create_calendar_features(df: pd.DataFrame) -> pd.DataFrame:
@@ -19,6 +34,14 @@ def _create_calendar_features(df: pd.DataFrame) -> pd.DataFrame:
     df['month'] = df.index.month
     return df
 
+# Types compacts des features temporelles (create_features(compact=True))
+CALENDAR_DTYPES = {'day_of_week': np.int8, 'day_of_month': np.int8, 'month': np.int8}
+
+def _compact_features(df: pd.DataFrame, feature_cols: list) -> pd.DataFrame:
+    """Convertit les features en float32, et les features temporelles en entiers 8 bits."""
+    dtypes = {col: CALENDAR_DTYPES.get(col, np.float32) for col in feature_cols if col in df.columns}
+    return df.astype(dtypes, copy=False)
+
 def _create_population_features(df: pd.DataFrame) -> pd.DataFrame:
     """Crée les ratios basés sur la population."""
     if 'population' in df.columns:
@@ -30,7 +53,8 @@ def _create_population_features(df: pd.DataFrame) -> pd.DataFrame:
             df['recovered_per_100k'] = (pd.to_numeric(df['new_recovered'], errors='coerce') / (pd.to_numeric(df['population'], errors='coerce') / 100000)).fillna(0)
     return df
 
-def create_features(df: pd.DataFrame, target: str, look_back: int = 30,use_lags: bool = True, use_rolling: bool = True, use_calendar: bool = True) -> pd.DataFrame:
+@timed()
+def create_features(df: pd.DataFrame, target: str, look_back: int = 30,use_lags: bool = True, use_rolling: bool = True, use_calendar: bool = True, compact: bool = False) -> pd.DataFrame:
     """
     Fonction pour créer des features à partir des données historiques.
 
@@ -41,6 +65,8 @@ def create_features(df: pd.DataFrame, target: str, look_back: int = 30,use_lags:
         use_lags: Si les features de décalage temporel doivent être créées.
         use_rolling: Si les moyennes mobiles doivent être créées.
         use_calendar: Si les features temporelles doivent être créées.
+        compact: Si True, lags, moyennes mobiles et ratios sont en float32 et les features
+            temporelles en int8 (au lieu de float64/int64).
 
     Returns:
         DataFrame avec les nouvelles features ajoutées.
@@ -50,7 +76,7 @@ def create_features(df: pd.DataFrame, target: str, look_back: int = 30,use_lags:
     if use_lags:
         feature_cols += [f'lag_{i}' for i in range(1, look_back + 1)]
     if use_rolling:
-        feature_cols += ['rolling_7_mean', 'rolling_30_mean']
+        feature_cols += [f'rolling_{window}_mean' for window in ROLLING_WINDOWS]
     if use_calendar:
         feature_cols += ['day_of_week', 'day_of_month', 'month']
     if 'population' in df.columns:
@@ -77,4 +103,341 @@ def create_features(df: pd.DataFrame, target: str, look_back: int = 30,use_lags:
 
     # Suppression des lignes avec valeurs manquantes
     cols_to_check = [col for col in [target] + feature_cols if col in df.columns]
-    return df.dropna(subset=cols_to_check)
\ No newline at end of file
+    df = df.dropna(subset=cols_to_check)
+    return _compact_features(df, feature_cols) if compact else df
+
+# Colonnes sources des ratios pour 100 000 habitants
+POPULATION_FEATURES = [
+    ('new_cases', 'cases_per_100k'),
+    ('new_deaths', 'deaths_per_100k'),
+    ('new_recovered', 'recovered_per_100k'),
+]
+
+
+def _feature_names(columns, look_back: int, use_lags: bool, use_rolling: bool, use_calendar: bool) -> list:
+    """Liste des features dans l'ordre produit par create_features."""
+    names = []
+    if use_lags:
+        names += [f'lag_{i}' for i in range(1, look_back + 1)]
+    if use_rolling:
+        names += [f'rolling_{window}_mean' for window in ROLLING_WINDOWS]
+    if use_calendar:
+        names += ['day_of_week', 'day_of_month', 'month']
+    if 'population' in columns:
+        names += [name for column, name in POPULATION_FEATURES if column in columns]
+    return names
+
+
+@timed()
+def create_features_multi(df: pd.DataFrame, targets: list, look_back: int = 30, use_lags: bool = True,
+                          use_rolling: bool = True, use_calendar: bool = True) -> dict:
+    """
+    Crée en une seule passe les matrices de features de plusieurs cibles.
+
+    Les lags sont construits par fenêtre glissante NumPy (sans colonne ajoutée une à une),
+    les moyennes mobiles de toutes les cibles en un seul appel rolling, et les features
+    calendaires et de population ne sont calculées qu'une fois pour toutes les cibles.
+    Les lignes et les valeurs de chaque cible sont identiques à celles de create_features
+    pour cette cible (lignes sans valeur manquante pour cette cible), converties en float32.
+
+    Args:
+        df: DataFrame contenant les données historiques (index de dates).
+        targets: Liste des colonnes cibles.
+        look_back: Nombre de jours pour les features de décalage temporel.
+        use_lags: Si les features de décalage temporel doivent être créées.
+        use_rolling: Si les moyennes mobiles doivent être créées.
+        use_calendar: Si les features temporelles doivent être créées.
+
+    Returns:
+        Dictionnaire avec :
+            index: {cible: dates des lignes sans valeur manquante pour cette cible},
+            feature_names: noms des colonnes des matrices (mêmes noms pour chaque cible),
+            X: {cible: matrice float32 (n_lignes, n_features)},
+            y: {cible: valeurs de la cible sur son index}.
+    """
+    feature_names = _feature_names(df.columns, look_back, use_lags, use_rolling, use_calendar)
+    n_rows = len(df)
+    values = {target: pd.to_numeric(df[target], errors='coerce').to_numpy(dtype=np.float64) for target in targets}
+
+    # Features partagées, calculées une seule fois
+    shared = []
+    if use_calendar:
+        shared += [df.index.dayofweek.to_numpy(), df.index.day.to_numpy(), df.index.month.to_numpy()]
+    if 'population' in df.columns:
+        population = pd.to_numeric(df['population'], errors='coerce').to_numpy(dtype=np.float64) / 100000
+        for column, _ in POPULATION_FEATURES:
+            if column in df.columns:
+                ratio = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=np.float64) / population
+                shared.append(np.where(np.isnan(ratio), 0, ratio))
+    shared = np.column_stack(shared) if shared else np.empty((n_rows, 0))
+
+    rolling = None
+    if use_rolling:
+        frame = pd.DataFrame(values, index=df.index)
+        rolling = {window: frame.rolling(window).mean() for window in ROLLING_WINDOWS}
+
+    blocks = {}
+    valid = {}
+    for target in targets:
+        columns = []
+        if use_lags:
+            # lag_k à la ligne i = y[i - k] : fenêtres glissantes sur la série précédée de NaN
+            padded = np.concatenate([np.full(look_back, np.nan), values[target]])
+            columns.append(sliding_window_view(padded, look_back)[:n_rows, ::-1])
+        if use_rolling:
+            columns += [rolling[window][target].to_numpy()[:, None] for window in ROLLING_WINDOWS]
+        columns.append(shared)
+        block = np.empty((n_rows, len(feature_names)), dtype=np.float32)
+        np.concatenate(columns, axis=1, out=block, casting='same_kind')
+        blocks[target] = block
+        valid[target] = ~np.isnan(block).any(axis=1) & ~np.isnan(values[target])
+
+    return {
+        'index': {target: df.index[valid[target]] for target in targets},
+        'feature_names': feature_names,
+        'X': {target: np.ascontiguousarray(block[valid[target]]) for target, block in blocks.items()},
+        'y': {target: df[target].to_numpy()[valid[target]] for target in targets},
+    }
+
+
+def features_frame(features: dict, target: str) -> pd.DataFrame:
+    """
+    Construit le DataFrame (features + cible) d'une cible à partir de create_features_multi,
+    utilisable par PandemicModel.train_model et predict_future.
+
+    Les colonnes de features sont une vue sur la matrice float32 (sans copie), que
+    feature_matrix retrouve telle quelle.
+    """
+    df = pd.DataFrame(features['X'][target], index=features['index'][target], columns=features['feature_names'],
+                      copy=False)
+    df[target] = features['y'][target]
+    return df
+
+
+def feature_matrix(df: pd.DataFrame, feature_names: list) -> np.ndarray:
+    """
+    Matrice float32 C-contiguë (n_lignes, n_features) des features de df, passée telle
+    quelle à XGBoost.
+
+    Si les colonnes sont des vues adjacentes d'un même bloc float32 C-contigu (DataFrame
+    de features_frame, ou tranche de lignes de celui-ci), ce bloc est retourné sans copie
+    (en lecture seule). Sinon les colonnes sont copiées une à une dans la matrice, sans
+    matrice float64 intermédiaire.
+    """
+    columns = [df[name].to_numpy() for name in feature_names]
+    itemsize = np.dtype(np.float32).itemsize
+    if len(df) > 1 and columns and all(
+            column.dtype == np.float32 and column.strides[0] == itemsize * len(columns)
+            and column.__array_interface__['data'][0] == columns[0].__array_interface__['data'][0] + i * itemsize
+            for i, column in enumerate(columns)):
+        return as_strided(columns[0], shape=(len(df), len(columns)), strides=(itemsize * len(columns), itemsize),
+                          writeable=False)
+    block = np.empty((len(df), len(columns)), dtype=np.float32)
+    for i, column in enumerate(columns):
+        block[:, i] = column
+    return block
+
+
+class FeatureCache:
+    """
+    Cache des matrices de features produites par create_features_multi.
+
+    Une entrée est adressée par son contenu : empreinte des données d'entrée (valeurs,
+    dates et colonnes) et de la configuration des features. Les entrées sont conservées
+    en mémoire (LRU) et, si cache_dir est fourni, sur disque au format NPZ.
+
+    Quand de nouvelles lignes sont ajoutées à une série déjà en cache (même début,
+    mêmes valeurs passées), seules les dernières lignes couvertes par les fenêtres de
+    lags/moyennes mobiles sont recalculées.
+    """
+
+    def __init__(self, max_entries=16, cache_dir=None):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.partial_hits = 0
+        self.misses = 0
+        self.time_saved = 0.0
+        self._entries = OrderedDict()
+        # Dernière entrée connue par série (configuration + première date) pour les ajouts de lignes
+        self._lineage = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _row_hashes(df: pd.DataFrame) -> np.ndarray:
+        return pd.util.hash_pandas_object(df, index=True).to_numpy()
+
+    @staticmethod
+    def _digest(config_key: str, row_hashes: np.ndarray) -> str:
+        digest = hashlib.sha256(config_key.encode())
+        digest.update(row_hashes.tobytes())
+        return digest.hexdigest()
+
+    def get(self, df: pd.DataFrame, targets: list, look_back: int = 30, use_lags: bool = True,
+            use_rolling: bool = True, use_calendar: bool = True) -> dict:
+        """Retourne les features de create_features_multi, depuis le cache si possible."""
+        start = time.perf_counter()
+        config = {'targets': list(targets), 'look_back': look_back, 'use_lags': use_lags,
+                  'use_rolling': use_rolling, 'use_calendar': use_calendar, 'columns': list(map(str, df.columns))}
+        config_key = json.dumps(config, sort_keys=True)
+        row_hashes = self._row_hashes(df)
+        key = self._digest(config_key, row_hashes)
+        lineage_key = hashlib.sha256(f"{config_key}|{df.index[0] if len(df) else ''}".encode()).hexdigest()
+
+        with self._lock:
+            entry = self._entries.get(key) or self._read_entry(key)
+            if entry is not None:
+                self._remember(key, lineage_key, entry)
+                self.hits += 1
+                self.time_saved += max(entry['build_time'] - (time.perf_counter() - start), 0)
+                self._log("hit")
+                return entry['features']
+
+            previous = self._find_prefix(lineage_key, config_key, row_hashes)
+
+        if previous is not None:
+            features = self._extend(previous, df, targets, look_back, use_lags, use_rolling, use_calendar)
+        else:
+            features = create_features_multi(df, targets, look_back, use_lags, use_rolling, use_calendar)
+        elapsed = time.perf_counter() - start
+        entry = {'features': features, 'n_rows': len(df), 'last_date': str(df.index[-1]) if len(df) else None,
+                 'build_time': elapsed if previous is None else previous['build_time'], 'key': key}
+
+        with self._lock:
+            if previous is not None:
+                self.partial_hits += 1
+                self.time_saved += max(previous['build_time'] - elapsed, 0)
+                self._log(f"mise à jour incrémentale (+{len(df) - previous['n_rows']} lignes)")
+            else:
+                self.misses += 1
+                self._log("miss")
+            self._remember(key, lineage_key, entry)
+            self._write_entry(key, lineage_key, entry)
+        return features
+
+    def _find_prefix(self, lineage_key: str, config_key: str, row_hashes: np.ndarray):
+        """Cherche une entrée dont les données sont un préfixe strict des données actuelles."""
+        previous_key = self._lineage.get(lineage_key) or self._read_lineage(lineage_key)
+        if previous_key is None:
+            return None
+        previous = self._entries.get(previous_key) or self._read_entry(previous_key)
+        if previous is None or not 0 < previous['n_rows'] < len(row_hashes):
+            return None
+        if self._digest(config_key, row_hashes[:previous['n_rows']]) != previous_key:
+            return None
+        return previous
+
+    def _extend(self, previous: dict, df: pd.DataFrame, targets: list, look_back: int,
+                use_lags: bool, use_rolling: bool, use_calendar: bool) -> dict:
+        """Recalcule uniquement les lignes ajoutées (avec la fenêtre d'historique nécessaire)."""
+        n_old = previous['n_rows']
+        window = max(look_back if use_lags else 0, max(ROLLING_WINDOWS) if use_rolling else 0)
+        tail = create_features_multi(df.iloc[max(n_old - window, 0):], targets, look_back,
+                                     use_lags, use_rolling, use_calendar)
+        new_rows = {t: tail['index'][t] > df.index[n_old - 1] for t in targets}
+        old = previous['features']
+        return {
+            'index': {t: old['index'][t].append(tail['index'][t][new_rows[t]]) for t in targets},
+            'feature_names': old['feature_names'],
+            'X': {t: np.concatenate([old['X'][t], tail['X'][t][new_rows[t]]]) for t in targets},
+            'y': {t: np.concatenate([old['y'][t], tail['y'][t][new_rows[t]]]) for t in targets},
+        }
+
+    def _remember(self, key: str, lineage_key: str, entry: dict):
+        # Les matrices sont partagées entre appelants : lecture seule
+        for arrays in (entry['features']['X'], entry['features']['y']):
+            for array in arrays.values():
+                array.flags.writeable = False
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        self._lineage[lineage_key] = key
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _log(self, event: str):
+        total = self.hits + self.partial_hits + self.misses
+        hit_rate = (self.hits + self.partial_hits) / total if total else 0
+        logger.info(f"Cache des features: {event} - taux de hit {hit_rate:.0%} sur {total} appels, "
+                    f"{self.time_saved:.3f}s économisées")
+
+    def stats(self) -> dict:
+        """Retourne les compteurs du cache."""
+        with self._lock:
+            return {'hits': self.hits, 'partial_hits': self.partial_hits, 'misses': self.misses,
+                    'entries': len(self._entries), 'time_saved': self.time_saved}
+
+    # Stockage sur disque (optionnel)
+
+    def _write_entry(self, key: str, lineage_key: str, entry: dict):
+        if not self.cache_dir:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        features = entry['features']
+        arrays = {'feature_names': np.array(features['feature_names'])}
+        for target in features['X']:
+            arrays[f'index__{target}'] = features['index'][target].asi8
+            arrays[f'X__{target}'] = features['X'][target]
+            arrays[f'y__{target}'] = features['y'][target]
+        meta = {k: entry[k] for k in ('n_rows', 'last_date', 'build_time')}
+        meta['index_name'] = next(iter(features['index'].values())).name if features['index'] else None
+        arrays['meta'] = np.array(json.dumps(meta))
+        path = os.path.join(self.cache_dir, f"{key}.npz")
+        with open(f"{path}.tmp", "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(f"{path}.tmp", path)
+        with open(os.path.join(self.cache_dir, f"lineage_{lineage_key}.json"), "w", encoding="utf-8") as f:
+            json.dump({'key': key, **meta}, f)
+
+    def _read_entry(self, key: str):
+        if not self.cache_dir:
+            return None
+        path = os.path.join(self.cache_dir, f"{key}.npz")
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                meta = json.loads(str(data['meta']))
+                targets = [name[len('X__'):] for name in data.files if name.startswith('X__')]
+                index_name = meta.pop('index_name', None)
+                features = {
+                    'index': {t: pd.DatetimeIndex(data[f'index__{t}'], name=index_name) for t in targets},
+                    'feature_names': data['feature_names'].tolist(),
+                    'X': {t: data[f'X__{t}'] for t in targets},
+                    'y': {t: data[f'y__{t}'] for t in targets},
+                }
+        except Exception as e:
+            logger.warning(f"Entrée de cache illisible {path}: {e}")
+            return None
+        return {'features': features, 'key': key, **meta}
+
+    def _read_lineage(self, lineage_key: str):
+        if not self.cache_dir:
+            return None
+        path = os.path.join(self.cache_dir, f"lineage_{lineage_key}.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)['key']
+
+
+_default_feature_cache = FeatureCache()
+_feature_caches = {}
+
+
+def get_feature_cache(cache_dir: str = None) -> FeatureCache:
+    """Retourne le cache partagé du processus (un par répertoire disque, None pour la mémoire seule)."""
+    if cache_dir is None:
+        return _default_feature_cache
+    if cache_dir not in _feature_caches:
+        _feature_caches[cache_dir] = FeatureCache(cache_dir=cache_dir)
+    return _feature_caches[cache_dir]
+
+
+def create_features_cached(df: pd.DataFrame, targets: list, look_back: int = 30, use_lags: bool = True,
+                           use_rolling: bool = True, use_calendar: bool = True, cache: FeatureCache = None) -> dict:
+    """
+    Équivalent de create_features_multi passant par un FeatureCache
+    (par défaut le cache en mémoire partagé du processus).
+    """
+    cache = cache if cache is not None else _default_feature_cache
+    return cache.get(df, targets, look_back, use_lags, use_rolling, use_calendar)
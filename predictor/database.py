@@ -1,10 +1,42 @@
 import pandas as pd
-from sqlalchemy import create_engine
+from sqlalchemy import bindparam, create_engine, inspect, text
+from sqlalchemy.exc import NoInspectionAvailable
+from predictor.instrumentation import timed
+import configparser
+from datetime import datetime, timezone
+import json
 import logging
+import os
+import re
+import threading
+import uuid
+import weakref
 
 logger = logging.getLogger(__name__)
 
-def create_db_engine(user: str, password: str, host: str, database: str):
+# Configuration par défaut, surchargée par le fichier de configuration puis par
+# les variables d'environnement PANDEMIA_DB_<CLE> (ex: PANDEMIA_DB_HOST)
+DEFAULT_DB_CONFIG = {
+    "url": None,
+    "user": "root",
+    "password": "root",
+    "host": "localhost",
+    "database": "pandemia",
+    "pool_size": 5,
+    "max_overflow": 10,
+    "pool_timeout": 30,
+    "pool_recycle": 3600,
+    "pool_pre_ping": True,
+}
+DB_ENV_PREFIX = "PANDEMIA_DB_"
+DB_CONFIG_ENV = "PANDEMIA_DB_CONFIG"
+
+_INT_OPTIONS = ("pool_size", "max_overflow", "pool_timeout", "pool_recycle")
+
+
+def create_db_engine(user: str, password: str, host: str, database: str, url: str = None,
+                     pool_size: int = 5, max_overflow: int = 10, pool_timeout: int = 30,
+                     pool_recycle: int = 3600, pool_pre_ping: bool = True):
     """
     Fonctions pour interagir avec la base de données MySQL. (la bdd est mariadb mais le connecteur pymsql est compatible avec mariaDB)
 
@@ -13,79 +45,626 @@ def create_db_engine(user: str, password: str, host: str, database: str):
         password (str): Mot de passe de la base de données.
         host (str): Adresse de l'hôte de la base de données.
         database (str): Nom de la base de données.
+        url (str): URL SQLAlchemy complète (ex: sqlite:///test.db), prioritaire sur les identifiants.
+        pool_size (int): Nombre de connexions conservées dans le pool.
+        max_overflow (int): Connexions supplémentaires autorisées au-delà de pool_size.
+        pool_timeout (int): Délai d'attente (s) d'une connexion libre.
+        pool_recycle (int): Durée de vie maximale (s) d'une connexion (wait_timeout de MariaDB).
+        pool_pre_ping (bool): Vérifie la connexion avant de la réutiliser.
 
     Returns: 
         engine (sqlalchemy.engine.base.Engine): Moteur SQLAlchemy pour la connexion à la base de données.
     """
-    connection_string = f"mysql+pymysql://{user}:{password}@{host}/{database}"
-    return create_engine(connection_string)
+    connection_string = url or f"mysql+pymysql://{user}:{password}@{host}/{database}"
+    options = {"pool_pre_ping": pool_pre_ping, "pool_recycle": pool_recycle}
+    if not connection_string.startswith("sqlite"):
+        # Les pools SQLite (SingletonThreadPool/NullPool) ne prennent pas ces options
+        options.update(pool_size=pool_size, max_overflow=max_overflow, pool_timeout=pool_timeout)
+    return create_engine(connection_string, **options)
 
 
-def load_data(engine, country_name: str, targets: list = None) -> pd.DataFrame:
+def load_db_config(config_file: str = None, **overrides) -> dict:
     """
-    Fonction pour charger les données d'un pays spécifique depuis la base de données.
+    Construit la configuration de connexion à la base de données.
+
+    Ordre de priorité : valeurs par défaut < fichier INI (section [database]) <
+    variables d'environnement PANDEMIA_DB_<CLE> < arguments overrides.
 
     Args:
-        engine (sqlalchemy.engine.base.Engine): Moteur SQLAlchemy pour la connexion à la base de données.
-        country_name (str): Nom du pays pour lequel charger les données.
-        targets (list): Liste des colonnes à récupérer (new_cases, new_deaths, new_recovered)
+        config_file (str): Fichier INI de configuration (par défaut $PANDEMIA_DB_CONFIG).
+        overrides: Valeurs explicites (les valeurs None sont ignorées).
 
     Returns:
-        df (pd.DataFrame): DataFrame contenant les données du pays spécifié.
+        config (dict): Paramètres acceptés par create_db_engine.
+    """
+    config = dict(DEFAULT_DB_CONFIG)
+    config_file = config_file or os.environ.get(DB_CONFIG_ENV)
+    if config_file:
+        parser = configparser.ConfigParser()
+        if not parser.read(config_file, encoding="utf-8"):
+            raise FileNotFoundError(f"Fichier de configuration introuvable: {config_file}")
+        if parser.has_section("database"):
+            config.update({key: value for key, value in parser.items("database") if key in config})
+    for key in config:
+        value = os.environ.get(DB_ENV_PREFIX + key.upper())
+        if value is not None:
+            config[key] = value
+    config.update({key: value for key, value in overrides.items() if value is not None})
+
+    for key in _INT_OPTIONS:
+        config[key] = int(config[key])
+    if isinstance(config["pool_pre_ping"], str):
+        config["pool_pre_ping"] = config["pool_pre_ping"].strip().lower() in ("1", "true", "yes", "on")
+    return config
+
+
+# Moteurs partagés du processus courant, un par configuration
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(config: dict = None):
+    """
+    Retourne le moteur partagé du processus pour cette configuration (créé au premier appel).
+
+    Tous les points d'entrée d'un même processus partagent ainsi un seul pool de
+    connexions, ce qui borne le nombre de connexions ouvertes vers MariaDB
+    à pool_size + max_overflow par processus.
+    """
+    config = config if config is not None else load_db_config()
+    key = tuple(sorted(config.items()))
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine = create_db_engine(**config)
+            _engines[key] = engine
+            logger.debug(f"Moteur créé pour {engine.url} (pool_size={config['pool_size']}, max_overflow={config['max_overflow']})")
+        return engine
+
+
+def dispose_engines(close: bool = True):
+    """
+    Libère les moteurs partagés du processus.
+
+    Args:
+        close (bool): Si False, les connexions sont abandonnées sans être fermées :
+            à utiliser dans un processus enfant pour ne pas fermer celles du parent.
     """
-    # Définir les targets par défaut si non spécifiées
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.dispose(close=close)
+        _engines.clear()
+
+
+def _reset_engines_after_fork():
+    """Après un fork, l'enfant oublie les connexions héritées du parent."""
+    global _engines_lock
+    _engines_lock = threading.Lock()
+    dispose_engines(close=False)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_engines_after_fork)
+
+
+VALID_TARGETS = ["new_cases", "new_deaths", "new_recovered"]
+
+
+def _validate_targets(targets: list = None) -> list:
+    """Retourne la liste des targets (par défaut toutes) après vérification."""
     if targets is None:
-        targets = ["new_cases", "new_deaths", "new_recovered"]
-    
-    # Vérifier que les targets sont valides
-    valid_targets = ["new_cases", "new_deaths", "new_recovered"]
+        targets = list(VALID_TARGETS)
     for target in targets:
-        if target not in valid_targets:
-            raise ValueError(f"Target '{target}' invalide. Les targets valides sont: {valid_targets}")
-
-    # Construire la requête dynamiquement
-    select_columns = ["gd.date", "c.population"]
-    
-    if "new_cases" in targets:
-        select_columns.append("gd.new_cases")
-    if "new_deaths" in targets:
-        select_columns.append("gd.new_deaths")
-    if "new_recovered" in targets:
-        select_columns.append("gd.new_recovered")
-    
+        if target not in VALID_TARGETS:
+            raise ValueError(f"Target '{target}' invalide. Les targets valides sont: {VALID_TARGETS}")
+    return targets
+
+
+# Table pré-agrégée (une ligne par pays et par jour), optionnelle : voir docs/database.sql
+DAILY_SERIES_TABLE = "Country_Daily_Series"
+_source_tables = weakref.WeakKeyDictionary()
+
+
+def _source_table(engine) -> str:
+    """
+    Retourne la table à interroger : Country_Daily_Series si elle existe dans la base,
+    sinon Global_Data. La détection est faite une fois par moteur.
+    """
+    table = _source_tables.get(engine)
+    if table is None:
+        try:
+            has_daily_series = inspect(engine).has_table(DAILY_SERIES_TABLE)
+        except NoInspectionAvailable:
+            # Objet qui n'est pas un moteur SQLAlchemy (ex: objet factice) : table brute.
+            # Les erreurs de connexion ou d'inspection de la base sont propagées.
+            logger.debug(f"Moteur non inspectable ({type(engine).__name__}) : lecture de Global_Data.")
+            return "Global_Data"
+        table = DAILY_SERIES_TABLE if has_daily_series else "Global_Data"
+        _source_tables[engine] = table
+        logger.debug(f"Table source des séries pour {engine.url}: {table}")
+    return table
+
+
+def refresh_daily_series(engine, since=None) -> int:
+    """
+    Recalcule la table Country_Daily_Series à partir de Global_Data (une transaction).
+
+    Args:
+        engine (sqlalchemy.engine.base.Engine): Moteur SQLAlchemy.
+        since: Date (incluse) à partir de laquelle recalculer ; None pour tout recalculer.
+
+    Returns:
+        Nombre de lignes (pays, jour) écrites.
+    """
+    condition = ""
+    params = {}
+    if since is not None:
+        condition = " AND date >= :since"
+        params["since"] = pd.Timestamp(since).date().isoformat()
+    with engine.begin() as connection:
+        delete_where = " WHERE date >= :since" if since is not None else ""
+        connection.execute(text(f"DELETE FROM {DAILY_SERIES_TABLE}{delete_where}"), params)
+        result = connection.execute(text(f"""
+            INSERT INTO {DAILY_SERIES_TABLE} (country_id, date, new_cases, new_deaths, new_recovered)
+            SELECT country_id, date, SUM(new_cases), SUM(new_deaths), SUM(new_recovered)
+            FROM Global_Data
+            WHERE country_id IS NOT NULL AND date IS NOT NULL{condition}
+            GROUP BY country_id, date
+        """), params)
+    _source_tables.pop(engine, None)
+    logger.info(f"{result.rowcount} lignes écrites dans {DAILY_SERIES_TABLE}.")
+    return result.rowcount
+
+
+def _build_query(targets: list, extra_columns: list = None, where: str = None, table: str = "Global_Data") -> str:
+    """
+    Construit la requête SELECT sur Global_Data (ou la table pré-agrégée) jointe à Country.
+
+    Args:
+        targets (list): Colonnes cibles à récupérer (déjà validées).
+        extra_columns (list): Colonnes supplémentaires à sélectionner.
+        where (str): Condition supplémentaire de filtrage (ex: sur c.name).
+        table (str): Table des séries (Global_Data ou Country_Daily_Series).
+
+    Returns:
+        query (str): Requête SQL sans clause ORDER BY.
+    """
+    select_columns = (extra_columns or []) + ["gd.date", "c.population"]
+    select_columns += [f"gd.{target}" for target in VALID_TARGETS if target in targets]
+
     query = f"""
     SELECT 
         {', '.join(select_columns)}
-    FROM Global_Data gd
+    FROM {table} gd
     JOIN Country c ON gd.country_id = c.id
-    WHERE c.name = %s
-    AND gd.date IS NOT NULL
+    WHERE gd.date IS NOT NULL
     """
-    
+    if where:
+        query += f" AND {where}"
+
     # Ajouter les conditions NOT NULL pour les colonnes sélectionnées
-    conditions = []
-    if "new_cases" in targets:
-        conditions.append("gd.new_cases IS NOT NULL")
-    if "new_deaths" in targets:
-        conditions.append("gd.new_deaths IS NOT NULL")
-    if "new_recovered" in targets:
-        conditions.append("gd.new_recovered IS NOT NULL")
-    
+    conditions = [f"gd.{target} IS NOT NULL" for target in VALID_TARGETS if target in targets]
     if conditions:
         query += " AND " + " AND ".join(conditions)
-    
-    query += " ORDER BY gd.date"
+    return query
+
+
+def _cache_path(cache_dir: str, country_name: str, targets: list) -> str:
+    """Chemin du cache Parquet d'un pays (un fichier par combinaison de targets)."""
+    safe_name = re.sub(r"[^\w-]+", "_", country_name)
+    return os.path.join(cache_dir, f"{safe_name}__{'+'.join(sorted(targets))}.parquet")
+
+
+def _read_cache(path: str):
+    """Lit le cache local d'un pays (None s'il n'existe pas ou est illisible)."""
+    if not os.path.exists(path):
+        return None
+    try:
+        return pd.read_parquet(path)
+    except Exception as e:
+        logger.warning(f"Cache illisible {path}, rechargement complet: {e}")
+        return None
+
+
+def _write_cache(path: str, df: pd.DataFrame):
+    """Écrit le cache local d'un pays (écriture atomique)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    df.to_parquet(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _merge_cached(cached: pd.DataFrame, new_rows: pd.DataFrame) -> pd.DataFrame:
+    """Ajoute les nouvelles lignes au cache (les dates déjà présentes sont ignorées)."""
+    if new_rows is None or new_rows.empty:
+        return cached
+    new_rows = new_rows[new_rows.index > cached.index.max()]
+    return pd.concat([cached, new_rows[cached.columns]])
+
+
+@timed()
+def load_data(engine, country_name: str, targets: list = None, cache_dir: str = None, refresh: bool = False) -> pd.DataFrame:
+    """
+    Fonction pour charger les données d'un pays spécifique depuis la base de données.
+
+    Si cache_dir est fourni, l'historique du pays est conservé localement au format
+    Parquet : seules les lignes postérieures à la dernière date en cache (watermark)
+    sont demandées à la base, puis ajoutées au cache.
+
+    Args:
+        engine (sqlalchemy.engine.base.Engine): Moteur SQLAlchemy pour la connexion à la base de données.
+        country_name (str): Nom du pays pour lequel charger les données.
+        targets (list): Liste des colonnes à récupérer (new_cases, new_deaths, new_recovered)
+        cache_dir (str): Répertoire du cache local (None pour désactiver le cache).
+        refresh (bool): Si True, ignore le cache et recharge tout l'historique.
+
+    Returns:
+        df (pd.DataFrame): DataFrame contenant les données du pays spécifié.
+    """
+    targets = _validate_targets(targets)
+    cache_path = _cache_path(cache_dir, country_name, targets) if cache_dir else None
+    cached = _read_cache(cache_path) if cache_path and not refresh else None
+
+    where = "c.name = :country"
+    params = {"country": country_name}
+    if cached is not None:
+        watermark = cached.index.max()
+        where += " AND gd.date > :since"
+        params["since"] = watermark.date().isoformat()
+    query = text(_build_query(targets, where=where, table=_source_table(engine)) + " ORDER BY gd.date")
 
     try:
         logger.debug(f"Exécution de la requête SQL pour {country_name} avec targets: {targets}")
-        df = pd.read_sql(query, engine, params=(country_name,))
-        if df.empty:
-            logger.warning(f"Aucune donnée trouvée pour {country_name}.")
-            raise ValueError(f"Aucune donnée trouvée pour {country_name}.")
-        df['date'] = pd.to_datetime(df['date'])
-        df.set_index('date', inplace=True)
-        logger.info(f"Données chargées avec {len(df)} enregistrements pour {country_name}.")
-        return df
+        df = pd.read_sql(query, engine, params=params)
+        if cached is not None:
+            if not df.empty:
+                df['date'] = pd.to_datetime(df['date'])
+                df.set_index('date', inplace=True)
+            logger.info(f"{len(df)} nouveaux enregistrements depuis le {watermark.date()} pour {country_name}.")
+            new_rows = len(df)
+            df = _merge_cached(cached, df)
+        else:
+            if df.empty:
+                logger.warning(f"Aucune donnée trouvée pour {country_name}.")
+                raise ValueError(f"Aucune donnée trouvée pour {country_name}.")
+            df['date'] = pd.to_datetime(df['date'])
+            df.set_index('date', inplace=True)
+            logger.info(f"Données chargées avec {len(df)} enregistrements pour {country_name}.")
+            new_rows = len(df)
     except Exception as e:
         logger.error(f"Erreur lors du chargement des données: {e}")
-        raise
\ No newline at end of file
+        raise
+
+    if cache_path and new_rows:
+        _write_cache(cache_path, df)
+    return df
+
+
+def _bulk_query(targets: list, country_names: list = None, since=None, table: str = "Global_Data"):
+    """Construit la requête groupée (plusieurs pays) triée par pays puis par date."""
+    conditions = []
+    params = {}
+    if country_names is not None:
+        conditions.append("c.name IN :names")
+        params["names"] = list(country_names)
+    if since is not None:
+        conditions.append("gd.date > :since")
+        params["since"] = since.date().isoformat()
+    query = _build_query(targets, extra_columns=["c.name AS country"],
+                         where=" AND ".join(conditions) if conditions else None, table=table)
+    query = text(query + " ORDER BY c.name, gd.date")
+    if country_names is not None:
+        query = query.bindparams(bindparam("names", expanding=True))
+    return query, params or None
+
+
+def _load_frames(engine, targets: list, country_names: list = None, since=None) -> dict:
+    """
+    Exécute une requête groupée et sépare le résultat par pays.
+
+    Args:
+        engine (sqlalchemy.engine.base.Engine): Moteur SQLAlchemy.
+        targets (list): Targets validées.
+        country_names (list): Pays à charger (None pour tous les pays).
+        since (pd.Timestamp): Si fourni, seules les lignes postérieures à cette date sont chargées.
+
+    Returns:
+        frames (dict): Dictionnaire {nom du pays: DataFrame indexé par date}.
+    """
+    query, params = _bulk_query(targets, country_names, since, table=_source_table(engine))
+    logger.debug(f"Exécution de la requête SQL groupée pour {len(country_names) if country_names else 'tous les'} pays avec targets: {targets}")
+    df = pd.read_sql(query, engine, params=params)
+    if df.empty:
+        return {}
+    df['date'] = pd.to_datetime(df['date'])
+    return {
+        country: group.drop(columns='country').set_index('date')
+        for country, group in df.groupby('country', sort=False)
+    }
+
+
+@timed()
+def load_data_multi(engine, country_names: list = None, targets: list = None, cache_dir: str = None, refresh: bool = False) -> dict:
+    """
+    Charge les données de plusieurs pays en une seule requête, puis les sépare par pays.
+
+    Avec cache_dir, les pays déjà en cache sont mis à jour par une seule requête
+    incrémentale (lignes postérieures au plus ancien watermark), les autres par une
+    requête complète : au plus deux requêtes, quel que soit le nombre de pays.
+
+    Args:
+        engine (sqlalchemy.engine.base.Engine): Moteur SQLAlchemy pour la connexion à la base de données.
+        country_names (list): Noms des pays à charger (None pour tous les pays).
+        targets (list): Liste des colonnes à récupérer (new_cases, new_deaths, new_recovered)
+        cache_dir (str): Répertoire du cache local (None pour désactiver le cache).
+        refresh (bool): Si True, ignore le cache et recharge tout l'historique.
+
+    Returns:
+        frames (dict): Dictionnaire {nom du pays: DataFrame indexé par date}.
+    """
+    targets = _validate_targets(targets)
+    if country_names is not None and not country_names:
+        raise ValueError("La liste des pays à charger est vide.")
+
+    try:
+        if not cache_dir:
+            frames = _load_frames(engine, targets, country_names)
+        else:
+            names = country_names
+            if names is None:
+                names = pd.read_sql(text("SELECT DISTINCT c.name FROM Country c"), engine)['name'].tolist()
+            cached = {} if refresh else {
+                name: df for name in names
+                if (df := _read_cache(_cache_path(cache_dir, name, targets))) is not None
+            }
+            uncached = [name for name in names if name not in cached]
+
+            frames = _load_frames(engine, targets, uncached) if uncached else {}
+            new_frames = {}
+            if cached:
+                since = min(df.index.max() for df in cached.values())
+                new_frames = _load_frames(engine, targets, list(cached), since=since)
+                logger.info(f"{sum(len(df) for df in new_frames.values())} nouveaux enregistrements depuis le {since.date()} pour {len(cached)} pays en cache.")
+                for name, df in cached.items():
+                    frames[name] = _merge_cached(df, new_frames.get(name))
+            for name, df in frames.items():
+                if name not in cached or name in new_frames:
+                    _write_cache(_cache_path(cache_dir, name, targets), df)
+            frames = {name: frames[name] for name in names if name in frames}
+
+        if not frames:
+            logger.warning("Aucune donnée trouvée pour les pays demandés.")
+            raise ValueError("Aucune donnée trouvée pour les pays demandés.")
+    except Exception as e:
+        logger.error(f"Erreur lors du chargement des données: {e}")
+        raise
+
+    if country_names is not None:
+        for country in country_names:
+            if country not in frames:
+                logger.warning(f"Aucune donnée trouvée pour {country}.")
+    logger.info(f"Données chargées avec {sum(len(df) for df in frames.values())} enregistrements pour {len(frames)} pays.")
+    return frames
+
+
+# Types compacts appliqués à chaque bloc lu en streaming
+COUNT_DTYPE = "int32"
+
+
+def _compact_dtypes(chunk: pd.DataFrame, targets: list) -> pd.DataFrame:
+    """Convertit un bloc brut en types compacts (int32, category, datetime64)."""
+    chunk['date'] = pd.to_datetime(chunk['date'])
+    if 'country' in chunk.columns:
+        chunk['country'] = chunk['country'].astype('category')
+    population = pd.to_numeric(chunk['population'], errors='coerce')
+    # Les populations tiennent sur 32 bits non signés ; float64 seulement si des valeurs manquent
+    chunk['population'] = population.astype('uint32') if population.notna().all() else population.astype('float64')
+    for target in targets:
+        chunk[target] = chunk[target].astype(COUNT_DTYPE)
+    return chunk
+
+
+def _iter_chunks(engine, query: str, params, targets: list, chunksize: int):
+    """Lit le résultat par blocs via un curseur côté serveur (stream_results)."""
+    with engine.connect() as connection:
+        connection = connection.execution_options(stream_results=True)
+        for chunk in pd.read_sql(query, connection, params=params, chunksize=chunksize):
+            yield _compact_dtypes(chunk, targets)
+
+
+def _concat_chunks(chunks: list) -> pd.DataFrame:
+    """Concatène des blocs en conservant une colonne country catégorielle commune."""
+    categories = sorted(set().union(*(chunk['country'].cat.categories for chunk in chunks)))
+    for chunk in chunks:
+        chunk['country'] = chunk['country'].cat.set_categories(categories)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def _iter_country_frames(chunks):
+    """Regroupe des blocs triés par pays en un DataFrame par pays, dès qu'un pays est complet."""
+    current = None
+    pending = []
+    for chunk in chunks:
+        for country, group in chunk.groupby('country', sort=False, observed=True):
+            if current is not None and country != current:
+                yield current, _finish_country(pending)
+                pending = []
+            current = country
+            pending.append(group)
+    if current is not None:
+        yield current, _finish_country(pending)
+
+
+def _finish_country(groups: list) -> pd.DataFrame:
+    df = pd.concat(groups) if len(groups) > 1 else groups[0]
+    return df.drop(columns='country').set_index('date')
+
+
+def load_data_stream(engine, country_names: list = None, targets: list = None,
+                     chunksize: int = 50000, per_country: bool = False):
+    """
+    Variante de load_data_multi qui lit Global_Data par blocs pour borner la mémoire.
+
+    Le résultat est lu avec un curseur côté serveur (stream_results) par blocs de
+    chunksize lignes ; chaque bloc est converti en types compacts (comptages int32,
+    pays en category, date en datetime64) avant d'être conservé.
+
+    Args:
+        engine (sqlalchemy.engine.base.Engine): Moteur SQLAlchemy pour la connexion à la base de données.
+        country_names (list): Noms des pays à charger (None pour tous les pays).
+        targets (list): Liste des colonnes à récupérer (new_cases, new_deaths, new_recovered)
+        chunksize (int): Nombre de lignes par bloc.
+        per_country (bool): Si True, retourne un générateur de (pays, DataFrame indexé par date),
+            chaque pays étant produit dès que ses lignes ont été lues.
+
+    Returns:
+        DataFrame concaténé (colonne country catégorielle) ou générateur de (pays, DataFrame).
+    """
+    targets = _validate_targets(targets)
+    if country_names is not None and not country_names:
+        raise ValueError("La liste des pays à charger est vide.")
+    query, params = _bulk_query(targets, country_names, table=_source_table(engine))
+    chunks = _iter_chunks(engine, query, params, targets, chunksize)
+    if per_country:
+        return _iter_country_frames(chunks)
+
+    try:
+        chunks = list(chunks)
+    except Exception as e:
+        logger.error(f"Erreur lors du chargement des données: {e}")
+        raise
+    if not chunks:
+        logger.warning("Aucune donnée trouvée pour les pays demandés.")
+        raise ValueError("Aucune donnée trouvée pour les pays demandés.")
+    df = _concat_chunks(chunks).set_index('date')
+    logger.info(f"Données chargées avec {len(df)} enregistrements pour {df['country'].nunique()} pays.")
+    return df
+
+# Tables des résultats (voir docs/database.sql) : une ligne Model_Run par (exécution, pays,
+# cible) avec ses métriques, une ligne Forecast par jour prédit
+MODEL_RUN_TABLE = "Model_Run"
+FORECAST_TABLE = "Forecast"
+_METRIC_COLUMNS = {"mae": "MAE", "rmse": "RMSE", "r2": "R2"}
+
+
+def has_forecast_tables(engine) -> bool:
+    """Indique si les tables Model_Run et Forecast existent dans la base."""
+    try:
+        inspector = inspect(engine)
+        return inspector.has_table(MODEL_RUN_TABLE) and inspector.has_table(FORECAST_TABLE)
+    except Exception as e:
+        logger.warning(f"Impossible de vérifier la présence des tables de résultats: {e}")
+        return False
+
+
+@timed()
+def save_forecasts(engine, predictions: dict, metrics: dict = None, run_id: str = None,
+                   strategy: str = None) -> str:
+    """
+    Enregistre les prédictions et métriques de toute une exécution en une transaction.
+
+    Chaque table est écrite par un seul executemany (INSERT multi-lignes avec pymysql),
+    quel que soit le nombre de pays : un lot de 200 pays coûte une requête de recherche
+    des pays et un aller-retour par table.
+
+    Args:
+        engine (sqlalchemy.engine.base.Engine): Moteur SQLAlchemy.
+        predictions (dict): {pays: {cible: DataFrame indexé par date avec predicted_<cible>}}.
+        metrics (dict): {pays: {cible: dict des métriques}} (absent si le modèle n'a pas été entraîné).
+        run_id (str): Identifiant de l'exécution (généré si absent).
+        strategy (str): Stratégie de prévision (recursive, direct, global).
+
+    Returns:
+        run_id (str): Identifiant de l'exécution enregistrée.
+    """
+    run_id = run_id or uuid.uuid4().hex
+    metrics = metrics or {}
+    created_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    countries = [country for country, country_preds in predictions.items() if country_preds]
+    if not countries:
+        logger.warning("Aucune prédiction à enregistrer.")
+        return run_id
+
+    with engine.begin() as connection:
+        query = text("SELECT name, id FROM Country WHERE name IN :names").bindparams(
+            bindparam("names", expanding=True))
+        country_ids = dict(connection.execute(query, {"names": countries}).all())
+        missing = [country for country in countries if country not in country_ids]
+        if missing:
+            logger.warning(f"Pays absents de la table Country, prédictions ignorées: {missing}")
+
+        run_rows = []
+        forecast_rows = []
+        for country in countries:
+            if country not in country_ids:
+                continue
+            for target, preds in predictions[country].items():
+                target_metrics = metrics.get(country, {}).get(target)
+                run_row = {"run_id": run_id, "country_id": country_ids[country], "target": target,
+                           "created_at": created_at, "strategy": strategy,
+                           "metrics": json.dumps(target_metrics, default=str) if target_metrics else None}
+                for column, key in _METRIC_COLUMNS.items():
+                    value = (target_metrics or {}).get(key)
+                    run_row[column] = float(value) if value is not None else None
+                run_rows.append(run_row)
+                values = preds[f"predicted_{target}"]
+                forecast_rows += [
+                    {"run_id": run_id, "country_id": country_ids[country], "target": target,
+                     "date": date.date().isoformat(), "value": float(value)}
+                    for date, value in zip(values.index, values.to_numpy())
+                ]
+        if not run_rows:
+            return run_id
+
+        connection.execute(text(
+            f"INSERT INTO {MODEL_RUN_TABLE} (run_id, country_id, target, created_at, strategy, "
+            "mae, rmse, r2, metrics) "
+            "VALUES (:run_id, :country_id, :target, :created_at, :strategy, :mae, :rmse, :r2, :metrics)"
+        ), run_rows)
+        connection.execute(text(
+            f"INSERT INTO {FORECAST_TABLE} (run_id, country_id, target, date, value) "
+            "VALUES (:run_id, :country_id, :target, :date, :value)"
+        ), forecast_rows)
+    logger.info(f"Exécution {run_id}: {len(run_rows)} modèles et {len(forecast_rows)} prévisions enregistrés.")
+    return run_id
+
+
+def load_forecasts(engine, run_id: str = None, country_names: list = None) -> pd.DataFrame:
+    """
+    Lit les prévisions d'une exécution (par défaut la plus récente).
+
+    La plus récente est celle de created_at maximal (à la microseconde avec DATETIME(6)) ;
+    à created_at égal, celle de plus grand run_id. Passer run_id pour lire une exécution
+    précise quand plusieurs peuvent être enregistrées en même temps.
+
+    Args:
+        engine (sqlalchemy.engine.base.Engine): Moteur SQLAlchemy.
+        run_id (str): Identifiant de l'exécution (celui renvoyé par save_forecasts).
+        country_names (list): Pays à lire (None pour tous).
+
+    Returns:
+        DataFrame avec les colonnes run_id, country, target, date et value.
+    """
+    params = {}
+    if run_id is None:
+        # Dernière exécution ; run_id départage de façon déterministe deux exécutions de même
+        # created_at (horodatages identiques, ou base sans fractions de seconde malgré DATETIME(6))
+        run_filter = f"(SELECT run_id FROM {MODEL_RUN_TABLE} ORDER BY created_at DESC, run_id DESC LIMIT 1)"
+    else:
+        run_filter = ":run_id"
+        params["run_id"] = run_id
+    query = f"""
+    SELECT f.run_id, c.name AS country, f.target, f.date, f.value
+    FROM {FORECAST_TABLE} f
+    JOIN Country c ON f.country_id = c.id
+    WHERE f.run_id = {run_filter}
+    """
+    if country_names is not None:
+        query += " AND c.name IN :names"
+        params["names"] = list(country_names)
+    query = text(query + " ORDER BY c.name, f.target, f.date")
+    if country_names is not None:
+        query = query.bindparams(bindparam("names", expanding=True))
+    df = pd.read_sql(query, engine, params=params)
+    df['date'] = pd.to_datetime(df['date'])
+    return df
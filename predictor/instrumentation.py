@@ -0,0 +1,272 @@
+"""
+Instrumentation légère des étapes du pipeline : durée, pic mémoire (tracemalloc) et,
+en option, profil cProfile de l'étape la plus lente.
+
+Désactivée par défaut : stage() renvoie alors un context manager vide partagé et les
+fonctions décorées par @timed n'ajoutent qu'un test de booléen.
+
+    from predictor import instrumentation
+    instrumentation.configure(memory=True, profile=True)
+    with instrumentation.stage("plots", country="France"):
+        ...
+    instrumentation.write_report("run.json")      # ou run.prom (textfile Prometheus)
+    instrumentation.dump_profile("slowest.prof")
+"""
+import cProfile
+import functools
+import json
+import logging
+import marshal
+import threading
+import time
+import tracemalloc
+
+logger = logging.getLogger(__name__)
+
+
+class _State:
+    def __init__(self):
+        self.enabled = False
+        self.memory = False
+        self.profile = False
+        self.records = []
+        self.slowest = None
+
+
+_state = _State()
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def configure(enabled=True, memory=True, profile=False):
+    """
+    Active (ou désactive) l'instrumentation pour le processus courant.
+
+    Args:
+        enabled: Mesurer la durée des étapes.
+        memory: Mesurer le pic mémoire de chaque étape avec tracemalloc (ralentit les allocations).
+        profile: Profiler les étapes de premier niveau avec cProfile et garder la plus lente.
+    """
+    _state.enabled = enabled
+    _state.memory = enabled and memory
+    _state.profile = enabled and profile
+    if _state.memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not _state.memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def is_enabled():
+    return _state.enabled
+
+
+def reset():
+    """Oublie les mesures déjà enregistrées."""
+    with _lock:
+        _state.records = []
+        _state.slowest = None
+
+
+def _stack():
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ('name', 'labels', 'depth', 'start', 'base', 'max_peak', 'profiler')
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+        self.profiler = None
+
+    def __enter__(self):
+        stack = _stack()
+        self.depth = len(stack)
+        if _state.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1].max_peak = max(stack[-1].max_peak, peak)
+            tracemalloc.reset_peak()
+            self.base = current
+            self.max_peak = current
+        # Un seul profileur actif à la fois : seules les étapes de premier niveau sont profilées
+        if _state.profile and self.depth == 0:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        if self.profiler is not None:
+            self.profiler.disable()
+        stack = _stack()
+        stack.pop()
+        record = {'stage': self.name, 'seconds': seconds, 'depth': self.depth, **self.labels}
+        if _state.memory:
+            peak = max(tracemalloc.get_traced_memory()[1], self.max_peak)
+            record['peak_bytes'] = peak - self.base
+            if stack:
+                stack[-1].max_peak = max(stack[-1].max_peak, peak)
+        if exc_type is not None:
+            record['error'] = exc_type.__name__
+        _record(record, self.profiler)
+        return False
+
+
+def _record(record, profiler=None):
+    with _lock:
+        _state.records.append(record)
+        if profiler is not None and (_state.slowest is None or record['seconds'] > _state.slowest['seconds']):
+            profiler.create_stats()
+            labels = {k: v for k, v in record.items() if k not in ('stage', 'seconds', 'depth', 'peak_bytes')}
+            _state.slowest = {'stage': record['stage'], 'seconds': record['seconds'], 'labels': labels,
+                              'stats': marshal.dumps(profiler.stats)}
+    memory = f", pic {record['peak_bytes'] / 1024 ** 2:.1f} Mo" if 'peak_bytes' in record else ""
+    logger.info(f"Étape {record['stage']}: {record['seconds']:.3f}s{memory}",
+                extra={'stage': record['stage'], 'seconds': record['seconds'],
+                       'peak_bytes': record.get('peak_bytes')})
+
+
+def stage(name, **labels):
+    """
+    Context manager mesurant une étape ; les labels (ex: country, target) sont ajoutés à la mesure.
+    """
+    if not _state.enabled:
+        return _NULL_STAGE
+    return _Stage(name, labels)
+
+
+def timed(name=None):
+    """Décorateur mesurant chaque appel de la fonction comme une étape (par défaut son nom)."""
+    def decorate(func):
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _state.enabled:
+                return func(*args, **kwargs)
+            with _Stage(stage_name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def records():
+    with _lock:
+        return list(_state.records)
+
+
+def export():
+    """Mesures et profil le plus lent du processus, sous une forme sérialisable (pool de processus)."""
+    with _lock:
+        return {'records': list(_state.records), 'slowest': _state.slowest}
+
+
+def merge(exported, **labels):
+    """Ajoute les mesures d'un autre processus (voir export), complétées par des labels."""
+    if not exported:
+        return
+    with _lock:
+        _state.records += [{**record, **labels} for record in exported['records']]
+        slowest = exported.get('slowest')
+        if slowest is not None and (_state.slowest is None or slowest['seconds'] > _state.slowest['seconds']):
+            _state.slowest = {**slowest, 'labels': {**slowest['labels'], **labels}}
+
+
+def summary():
+    """
+    Agrège les mesures par étape.
+
+    Returns:
+        Dictionnaire {étape: {calls, total_seconds, max_seconds, peak_bytes}} trié par durée totale décroissante.
+    """
+    stages = {}
+    for record in records():
+        entry = stages.setdefault(record['stage'], {'calls': 0, 'total_seconds': 0.0, 'max_seconds': 0.0,
+                                                    'peak_bytes': None})
+        entry['calls'] += 1
+        entry['total_seconds'] += record['seconds']
+        entry['max_seconds'] = max(entry['max_seconds'], record['seconds'])
+        if record.get('peak_bytes') is not None:
+            entry['peak_bytes'] = max(entry['peak_bytes'] or 0, record['peak_bytes'])
+    return dict(sorted(stages.items(), key=lambda item: item[1]['total_seconds'], reverse=True))
+
+
+def _prometheus(stages, run_seconds=None, prefix="pandemia"):
+    metrics = [
+        ('stage_seconds', 'total_seconds', "Durée cumulée des appels de l'étape (s)."),
+        ('stage_max_seconds', 'max_seconds', "Durée de l'appel le plus long de l'étape (s)."),
+        ('stage_calls', 'calls', "Nombre d'appels de l'étape."),
+        ('stage_peak_bytes', 'peak_bytes', "Pic mémoire alloué pendant l'étape (octets, tracemalloc)."),
+    ]
+    lines = []
+    for metric, key, help_text in metrics:
+        values = [(name, entry[key]) for name, entry in stages.items() if entry[key] is not None]
+        if not values:
+            continue
+        lines += [f"# HELP {prefix}_{metric} {help_text}", f"# TYPE {prefix}_{metric} gauge"]
+        lines += [f'{prefix}_{metric}{{stage="{name}"}} {value}' for name, value in values]
+    if run_seconds is not None:
+        lines += [f"# HELP {prefix}_run_seconds Durée totale de l'exécution (s).",
+                  f"# TYPE {prefix}_run_seconds gauge", f"{prefix}_run_seconds {run_seconds}"]
+    return "\n".join(lines) + "\n"
+
+
+def write_report(path, run_seconds=None, extra=None):
+    """
+    Écrit le rapport de l'exécution : textfile Prometheus si path se termine par .prom, JSON sinon.
+
+    Args:
+        path: Fichier de sortie.
+        run_seconds: Durée totale de l'exécution.
+        extra: Informations ajoutées au rapport JSON (ex: arguments de la ligne de commande).
+    """
+    stages = summary()
+    if path.endswith(".prom"):
+        content = _prometheus(stages, run_seconds)
+    else:
+        slowest = _state.slowest
+        content = json.dumps({
+            'run_seconds': run_seconds,
+            **(extra or {}),
+            'stages': stages,
+            'slowest_profiled_stage': (None if slowest is None else
+                                       {'stage': slowest['stage'], 'seconds': slowest['seconds'], **slowest['labels']}),
+            'records': records(),
+        }, indent=2, default=str)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return path
+
+
+def dump_profile(path):
+    """
+    Écrit le profil cProfile (format pstats) de l'étape profilée la plus lente.
+
+    Returns:
+        (étape, durée) ou None si aucune étape n'a été profilée.
+    """
+    slowest = _state.slowest
+    if slowest is None:
+        return None
+    with open(path, "wb") as f:
+        f.write(slowest['stats'])
+    return slowest['stage'], slowest['seconds']
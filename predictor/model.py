@@ -1,24 +1,324 @@
-from sklearn.model_selection import train_test_split, TimeSeriesSplit, GridSearchCV
+from sklearn.model_selection import train_test_split, TimeSeriesSplit
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-from datetime import timedelta
+from predictor.tuning import HyperparamStore, get_tuner
+from predictor.instrumentation import timed
+from predictor.data_processing import ROLLING_WINDOWS, feature_matrix
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+import hashlib
+import json
 import logging
+import math
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 import joblib
 import os
+import threading
+import time
 import pandas as pd
 import xgboost as xgb
 
 logger = logging.getLogger(__name__)
 
+
+def _booster_predict(model, X):
+    """
+    Prédit directement sur un tableau NumPy via le booster XGBoost,
+    sans passer par la construction d'un DataFrame.
+    """
+    if isinstance(model, xgb.XGBModel):
+        booster = model.get_booster()
+    elif isinstance(model, xgb.Booster):
+        booster = model
+    else:
+        return model.predict(X)
+    best_iteration = booster.attr('best_iteration')
+    iteration_range = (0, int(best_iteration) + 1) if best_iteration is not None else (0, 0)
+    return booster.inplace_predict(X, iteration_range=iteration_range, validate_features=False)
+
+
+def _split_rows(X, y, test_size):
+    """
+    Découpage chronologique entraînement/test (comme train_test_split(shuffle=False)),
+    par tranches de lignes : les matrices NumPy ne sont pas copiées.
+    """
+    n_train = len(X) - math.ceil(test_size * len(X))
+    return X[:n_train], X[n_train:], y[:n_train], y[n_train:]
+
+
+def _set_feature_names(model, feature_names):
+    """Nomme les features du booster entraîné sur une matrice NumPy (sans noms de colonnes)."""
+    model.get_booster().feature_names = list(feature_names)
+    return model
+
+
+def _recursive_forecast(model, frames, target, feature_names, days_ahead, look_back=30):
+    """
+    Prévision récursive vectorisée de plusieurs séries avec le même modèle.
+
+    L'état de chaque série est une ligne de buffers circulaires préalloués :
+    lag_k = lag_buffer[:, (lag_head - k) % look_back] et les dernières valeurs
+    (observées puis prédites) servent aux moyennes mobiles. La première
+    prédiction reprend les lags et moyennes mobiles de la dernière ligne observée ;
+    les features calendaires sont celles de la date prédite à chaque pas.
+
+    Args:
+        model: Modèle XGBoost (ou tout objet exposant predict).
+        frames: Liste de DataFrames de features, une par série.
+        target: Nom de la colonne cible.
+        feature_names: Liste des noms de colonnes utilisées comme features.
+        days_ahead: Nombre de jours à prédire.
+        look_back: Nombre de lags maintenus dans l'état récursif.
+
+    Returns:
+        dates: Liste des DatetimeIndex prédits, un par série.
+        predictions: Tableau (n_séries, days_ahead) des prédictions.
+
+    Raises:
+        ValueError: Si une série a moins de lignes que la plus grande fenêtre de
+            moyenne mobile utilisée par le modèle.
+    """
+    feature_names = list(feature_names)
+    positions = {name: i for i, name in enumerate(feature_names)}
+    n_series = len(frames)
+    rolling_windows = [w for w in ROLLING_WINDOWS if f'rolling_{w}_mean' in positions]
+    # Valeurs récentes nécessaires aux moyennes mobiles (au moins une pour le buffer)
+    window = max(rolling_windows, default=1)
+    for df in frames:
+        if len(df) < window:
+            raise ValueError(f"Historique trop court pour la prévision récursive : {len(df)} lignes, "
+                             f"{window} nécessaires (moyenne mobile sur {window} jours).")
+    offsets = np.arange(1, days_ahead + 1)
+
+    dates = []
+    for df in frames:
+        series_dates = df.index.max() + pd.to_timedelta(offsets, unit='D')
+        series_dates.name = 'date'
+        dates.append(series_dates)
+
+    # Matrice de features réutilisée à chaque pas (une ligne par série)
+    X = np.vstack([df[feature_names].iloc[-1:].to_numpy(dtype=np.float64) for df in frames])
+
+    lag_buffer = np.full((n_series, look_back), np.nan)
+    value_buffer = np.full((n_series, window), np.nan)
+    for i, df in enumerate(frames):
+        last_row = df.iloc[-1]
+        for k in range(1, look_back + 1):
+            if f'lag_{k}' in df.columns:
+                lag_buffer[i, look_back - k] = last_row[f'lag_{k}']
+        history = df[target].to_numpy(dtype=np.float64)[-window:]
+        value_buffer[i, window - len(history):] = history
+    lag_head = 0
+    value_head = 0
+
+    lag_ks = np.array([k for k in range(1, look_back + 1) if f'lag_{k}' in positions], dtype=np.intp)
+    lag_cols = np.array([positions[f'lag_{k}'] for k in lag_ks], dtype=np.intp)
+    rolling = [(positions[f'rolling_{w}_mean'], np.arange(1, w + 1)) for w in rolling_windows]
+
+    # Features calendaires précalculées pour toutes les dates prédites
+    calendar = [(positions[name], np.vstack([getter(d).to_numpy() for d in dates])) for name, getter in (
+        ('day_of_week', lambda d: d.dayofweek),
+        ('day_of_month', lambda d: d.day),
+        ('month', lambda d: d.month),
+    ) if name in positions]
+
+    predictions = np.empty((n_series, days_ahead), dtype=np.float32)
+    for step in range(days_ahead):
+        if step > 0:
+            X[:, lag_cols] = lag_buffer[:, (lag_head - lag_ks) % look_back]
+            for col, window_offsets in rolling:
+                X[:, col] = value_buffer[:, (value_head - window_offsets) % window].mean(axis=1)
+        for col, values in calendar:
+            X[:, col] = values[:, step]
+
+        pred = _booster_predict(model, X)
+        predictions[:, step] = pred
+
+        # Mise à jour de l'état récursif pour la prochaine prédiction
+        lag_buffer[:, lag_head] = pred
+        lag_head = (lag_head + 1) % look_back
+        value_buffer[:, value_head] = pred
+        value_head = (value_head + 1) % window
+
+    return dates, predictions
+
+
+# Feature catégorielle (native XGBoost) du modèle global multi-pays
+COUNTRY_FEATURE = 'country'
+
+
+def _per_capita_columns(feature_names, target):
+    """Colonnes exprimées dans l'unité de la cible (cible, lags, moyennes mobiles)."""
+    return [target] + [name for name in feature_names if name.startswith('lag_') or name.startswith('rolling_')]
+
+
+class ModelRegistry:
+    """
+    Cache en mémoire des modèles chargés, partagé par les instances de PandemicModel.
+
+    Les entrées sont indexées par (répertoire des modèles, cible) ; le pays est
+    porté par le répertoire (ex: models/<pays>/). Un modèle est rechargé si la date
+    de modification ou la taille du fichier changent (et, si check_hash est activé,
+    seulement si le contenu a réellement changé). L'éviction suit l'ordre LRU avec
+    un plafond sur le nombre d'entrées et, optionnellement, sur la taille cumulée
+    des fichiers chargés.
+    """
+
+    def __init__(self, max_entries=32, max_bytes=None, check_hash=False):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.check_hash = check_hash
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _file_hash(path):
+        """Calcule l'empreinte SHA-256 du fichier."""
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _signature(self, path):
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self, key, path, loader):
+        """
+        Retourne le modèle en cache pour key, ou le charge avec loader(path).
+
+        Raises:
+            FileNotFoundError: si le fichier du modèle n'existe pas.
+        """
+        signature = self._signature(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry['path'] == path:
+                if entry['signature'] == signature:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry['model']
+                if self.check_hash and entry['hash'] == self._file_hash(path):
+                    # Fichier touché mais contenu identique
+                    entry['signature'] = signature
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry['model']
+                logger.info(f"Modèle modifié sur disque, rechargement de {path}")
+
+            self.misses += 1
+            model = loader(path)
+            self._store(key, path, model, signature)
+            return model
+
+    def put(self, key, path, model):
+        """Enregistre un modèle qui vient d'être sauvegardé dans path."""
+        with self._lock:
+            self._store(key, path, model, self._signature(path))
+
+    def _store(self, key, path, model, signature):
+        self._entries[key] = {
+            'path': path,
+            'model': model,
+            'signature': signature,
+            'size': signature[1],
+            'hash': self._file_hash(path) if self.check_hash else None,
+        }
+        self._entries.move_to_end(key)
+        self._evict()
+
+    def _evict(self):
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries
+            or (self.max_bytes is not None and self.total_bytes() > self.max_bytes)
+        ):
+            key, _ = self._entries.popitem(last=False)
+            self.evictions += 1
+            logger.debug(f"Modèle {key} évincé du cache.")
+
+    def total_bytes(self):
+        """Taille cumulée (fichiers sur disque) des modèles en cache."""
+        return sum(entry['size'] for entry in self._entries.values())
+
+    def invalidate(self, key=None):
+        """Supprime une entrée (ou tout le cache si key est None)."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        """Retourne les compteurs du cache."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self.total_bytes(),
+            }
+
+
+_default_registry = ModelRegistry()
+
+# Formats de stockage : pickle joblib du XGBRegressor ou booster natif XGBoost (UBJSON)
+MODEL_FORMATS = ("joblib", "ubj")
+
+
+def _load_native_booster(path):
+    """
+    Charge un booster UBJSON directement depuis son fichier (lu par XGBoost),
+    sans passer par le wrapper scikit-learn.
+    """
+    booster = xgb.Booster()
+    booster.load_model(path)
+    manifest_path = os.path.splitext(path)[0] + ".json"
+    if booster.feature_names is None and os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            booster.feature_names = json.load(f).get("feature_names")
+    return booster
+
+
 class PandemicModel:
-    def __init__(self, model_dir="models"):
+    def __init__(self, model_dir="models", registry=None, model_format="joblib", tuner=None,
+                 hyperparam_store=None, country=None, n_jobs=None):
+        if model_format not in MODEL_FORMATS:
+            raise ValueError(f"Format '{model_format}' invalide. Les formats valides sont: {list(MODEL_FORMATS)}")
         self.model_dir = model_dir
         self.best_params = None
+        self.registry = registry if registry is not None else _default_registry
+        self.model_format = model_format
+        self.tuner = tuner
+        self.hyperparam_store = hyperparam_store
+        self.country = country
+        self.n_jobs = n_jobs
+        self.training_states = {}
+
+    def _stored_params(self, target, feature_names, window):
+        """Hyperparamètres encore valides dans le store pour ce pays et cette cible (None sinon)."""
+        if self.hyperparam_store is None:
+            return None
+        entry = self.hyperparam_store.get(self.country or "", target, feature_names, window)
+        return entry['params'] if entry is not None else None
 
-    def _get_default_model(self):
-        """Retourne un modèle XGBoost avec des paramètres par défaut."""
-        return xgb.XGBRegressor(
+    def _get_default_model(self, target=None, feature_names=None, window=None):
+        """
+        Retourne un modèle XGBoost avec des paramètres par défaut, remplacés par les
+        hyperparamètres du store s'il en contient de valides pour (pays, cible, features).
+
+        L'algorithme "hist" fait construire au wrapper scikit-learn une QuantileDMatrix
+        pour l'entraînement, réutilisée (ref) pour le jeu de validation ; n_jobs fixe le
+        nombre de threads XGBoost (tous les cœurs si None).
+        """
+        model = xgb.XGBRegressor(
             objective='reg:squarederror',
+            tree_method='hist',
+            n_jobs=self.n_jobs,
             n_estimators=1000,
             learning_rate=0.05,
             max_depth=6,
@@ -27,6 +327,12 @@ class PandemicModel:
             early_stopping_rounds=50,
             random_state=42
         )
+        if target is not None:
+            params = self._stored_params(target, feature_names, window)
+            if params is not None:
+                self.best_params = params
+                model.set_params(**params)
+        return model
 
     def _time_series_split(self, X, y, n_splits=5):
         """Effectue une validation croisée temporelle."""
@@ -34,7 +340,10 @@ class PandemicModel:
         for train_index, test_index in tscv.split(X):
             yield X.iloc[train_index], X.iloc[test_index], y.iloc[train_index], y.iloc[test_index]
 
-    def train_model(self, df, target, feature_names, test_size=0.2, tune_hyperparams=False):
+    @timed()
+    def train_model(self, df, target, feature_names, test_size=0.2, tune_hyperparams=False,
+                    incremental=False, extra_rounds=100, full_retrain_days=7, drift_threshold=0.25,
+                    incremental_window=180):
         """
         Entraîne un modèle XGBoost pour prédire les nouveaux cas ou décès.
 
@@ -43,116 +352,533 @@ class PandemicModel:
             target: Nom de la colonne cible à prédire.
             feature_names: Liste des noms de colonnes à utiliser comme features.
             test_size: Proportion des données à utiliser pour le test.
-            tune_hyperparams: Si True, effectue un tuning des hyperparamètres.
+            tune_hyperparams: Si True, effectue un tuning des hyperparamètres (ignoré si le
+                store contient des paramètres encore valides pour ce pays et cette cible).
+            incremental: Si True, poursuit le boosting du modèle sauvegardé (extra_rounds arbres
+                au plus, sur les incremental_window dernières lignes d'entraînement) au lieu de
+                repartir de zéro. Un entraînement complet est effectué si le dernier date de plus
+                de full_retrain_days jours ou si l'erreur de validation du modèle sauvegardé
+                dépasse de plus de drift_threshold celle mesurée lors de cet entraînement complet.
 
         Returns:
             model: Modèle entraîné.
             metrics: Dictionnaire contenant les métriques d'évaluation.
         """
-        X = df[feature_names]
-        y = df[target]
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, shuffle=False)
-
-        if tune_hyperparams:
-            logger.info("Début du tuning des hyperparamètres...")
-            param_grid = {
-                'max_depth': [3, 6, 9],
-                'learning_rate': [0.01, 0.05, 0.1],
-                'subsample': [0.8, 0.9, 1.0],
-                'colsample_bytree': [0.8, 0.9, 1.0]
-            }
-            
-            tscv = TimeSeriesSplit(n_splits=5)
-            grid_search = GridSearchCV(
-                estimator=self._get_default_model(),
-                param_grid=param_grid,
-                cv=tscv,
-                scoring='neg_mean_squared_error',
-                n_jobs=-1,
-                verbose=1
-            )
-            
-            grid_search.fit(X_train, y_train)
-            self.best_params = grid_search.best_params_
-            model = grid_search.best_estimator_
-            logger.info(f"Meilleurs paramètres trouvés: {self.best_params}")
-        else:
-            model = self._get_default_model()
-            logger.info("Début de l'entraînement du modèle avec paramètres par défaut.")
+        # Matrice float32 C-contiguë passée telle quelle à XGBoost (sans copie depuis features_frame)
+        X = feature_matrix(df, feature_names)
+        y = df[target].to_numpy()
+        X_train, X_test, y_train, y_test = _split_rows(X, y, test_size)
+
+        window = HyperparamStore.window(df, target) if self.hyperparam_store is not None else None
+        start = time.perf_counter()
+        model = None
+        if incremental:
+            model = self._continue_training(target, feature_names, X_train, y_train, X_test, y_test, window,
+                                            extra_rounds, full_retrain_days, drift_threshold, incremental_window)
+        mode = "full" if model is None else "incremental"
+        if model is None:
+            self.best_params = None
+            model = self._get_default_model(target, feature_names, window)
+            if self.best_params is not None:
+                logger.info(f"Hyperparamètres stockés réutilisés (pas de tuning): {self.best_params}")
+            elif tune_hyperparams:
+                logger.info("Début du tuning des hyperparamètres...")
+                tuner = self.tuner if self.tuner is not None else get_tuner(nthread=self.n_jobs)
+                best_params, summary = tuner.tune(X_train, y_train)
+                if best_params is not None:
+                    self.best_params = best_params
+                    model.set_params(**best_params)
+                    logger.info(f"Meilleurs paramètres trouvés: {self.best_params}")
+                    if self.hyperparam_store is not None:
+                        self.hyperparam_store.put(self.country or "", target, feature_names, best_params,
+                                                  window, summary, mode=tuner.mode)
+            else:
+                logger.info("Début de l'entraînement du modèle avec paramètres par défaut.")
             model.fit(
                 X_train, y_train,
                 eval_set=[(X_test, y_test)],
                 verbose=10
             )
+            _set_feature_names(model, feature_names)
+
+        train_seconds = time.perf_counter() - start
+        preds = model.predict(X_test)
+        metrics = {
+            'MAE': mean_absolute_error(y_test, preds),
+            'RMSE': np.sqrt(mean_squared_error(y_test, preds)),
+            'R2': r2_score(y_test, preds),
+            'training_mode': mode,
+            'train_seconds': train_seconds,
+        }
+        if mode == "full":
+            self.training_states[target] = {
+                'country': self.country,
+                'feature_names': list(feature_names),
+                'last_full_at': datetime.now(timezone.utc).isoformat(),
+                'full_RMSE': float(metrics['RMSE']),
+                'full_train_seconds': train_seconds,
+            }
+        else:
+            # Comparaison avec le dernier entraînement complet
+            state = self.training_states[target]
+            metrics['full_RMSE'] = state['full_RMSE']
+            metrics['full_train_seconds'] = state['full_train_seconds']
+        logger.info(f"Modèle entraîné pour {target} ({mode}, {train_seconds:.2f}s) - MAE: {metrics['MAE']:.2f}, "
+                    f"RMSE: {metrics['RMSE']:.2f}, R2: {metrics['R2']:.2f}")
+        return model, metrics
+
+    def _training_state_path(self, target):
+        return f"{self.model_dir}/{target}_training.json"
+
+    def _load_training_state(self, target):
+        """État du dernier entraînement complet (en mémoire, sinon depuis le fichier du modèle)."""
+        if target not in self.training_states:
+            path = self._training_state_path(target)
+            if not os.path.exists(path):
+                return None
+            with open(path, encoding="utf-8") as f:
+                self.training_states[target] = json.load(f)
+        return self.training_states[target]
+
+    def _continue_training(self, target, feature_names, X_train, y_train, X_test, y_test, window,
+                           extra_rounds, full_retrain_days, drift_threshold, incremental_window):
+        """
+        Poursuit le boosting du modèle sauvegardé sur la fenêtre récente.
+
+        Returns:
+            Le modèle mis à jour, ou None si un entraînement complet est nécessaire.
+        """
+        state = self._load_training_state(target)
+        previous = self.load_model(target)
+        if state is None or previous is None:
+            logger.info(f"Pas de modèle précédent pour {target} : entraînement complet.")
+            return None
+        if state.get('country') != self.country or state.get('feature_names') != list(feature_names):
+            logger.info(f"Le modèle sauvegardé pour {target} ne correspond pas (pays ou features) : entraînement complet.")
+            return None
+        if datetime.now(timezone.utc) - datetime.fromisoformat(state['last_full_at']) > timedelta(days=full_retrain_days):
+            logger.info(f"Dernier entraînement complet de {target} trop ancien : entraînement complet planifié.")
+            return None
+        rmse = float(np.sqrt(mean_squared_error(y_test, _booster_predict(previous, X_test))))
+        if rmse > state['full_RMSE'] * (1 + drift_threshold):
+            logger.info(f"Dérive de l'erreur pour {target} (RMSE {rmse:.2f} contre {state['full_RMSE']:.2f}) : "
+                        "entraînement complet.")
+            return None
+
+        booster = previous.get_booster() if isinstance(previous, xgb.XGBModel) else previous
+        best_iteration = booster.attr('best_iteration')
+        # On repart des arbres retenus par l'early stopping (copie : le cache n'est pas modifié)
+        booster = booster[:int(best_iteration) + 1] if best_iteration is not None else booster.copy()
+        # Les matrices NumPy n'ont pas de noms de colonnes : noms remis après l'entraînement
+        booster.feature_names = None
+        model = self._get_default_model(target, feature_names, window)
+        model.set_params(n_estimators=extra_rounds, early_stopping_rounds=min(50, extra_rounds))
+        logger.info(f"Entraînement incrémental de {target} : {extra_rounds} rounds au plus "
+                    f"à partir de {booster.num_boosted_rounds()} arbres.")
+        model.fit(
+            X_train[-incremental_window:], y_train[-incremental_window:],
+            eval_set=[(X_test, y_test)],
+            xgb_model=booster,
+            verbose=False
+        )
+        return _set_feature_names(model, feature_names)
+
+    @staticmethod
+    def _direct_name(target):
+        return f"{target}_direct"
+
+    @timed()
+    def train_direct_model(self, df, target, feature_names, horizon=7, test_size=0.2):
+        """
+        Entraîne un modèle de prévision directe multi-horizon : un seul booster multi-sorties
+        (multi_strategy="multi_output_tree") prédit depuis la ligne du jour t les valeurs
+        de la cible de t+1 à t+horizon.
+
+        Args:
+            df: DataFrame contenant les données d'entraînement.
+            target: Nom de la colonne cible à prédire.
+            feature_names: Liste des noms de colonnes à utiliser comme features.
+            horizon: Nombre de jours prédits.
+            test_size: Proportion des données à utiliser pour le test.
+
+        Returns:
+            model: Modèle entraîné (horizon dans les attributs du booster).
+            metrics: Métriques globales et MAE par horizon (MAE_h1, MAE_h2...).
+        """
+        if len(df) <= horizon + 1:
+            raise ValueError(f"Pas assez de lignes ({len(df)}) pour un horizon de {horizon} jours.")
+        start = time.perf_counter()
+        values = df[target].to_numpy(dtype=np.float64)
+        # Ligne i : cible de i+1 à i+horizon (les horizon dernières lignes n'ont pas de futur connu)
+        Y = sliding_window_view(values[1:], horizon)
+        X = feature_matrix(df, feature_names)[:len(Y)]
+        X_train, X_test, Y_train, Y_test = _split_rows(X, Y, test_size)
+
+        model = self._get_default_model()
+        model.set_params(multi_strategy="multi_output_tree")
+        logger.info(f"Entraînement du modèle direct pour {target} (horizon {horizon} jours).")
+        model.fit(
+            X_train, Y_train,
+            eval_set=[(X_test, Y_test)],
+            verbose=10
+        )
+        _set_feature_names(model, feature_names)
+        model.get_booster().set_attr(horizon=str(horizon))
+        train_seconds = time.perf_counter() - start
 
         preds = model.predict(X_test)
+        metrics = {
+            'MAE': mean_absolute_error(Y_test, preds),
+            'RMSE': np.sqrt(mean_squared_error(Y_test, preds)),
+            'R2': r2_score(Y_test, preds),
+            'training_mode': "direct",
+            'train_seconds': train_seconds,
+        }
+        for h in range(horizon):
+            metrics[f'MAE_h{h + 1}'] = mean_absolute_error(Y_test[:, h], preds[:, h])
+        logger.info(f"Modèle direct entraîné pour {target} ({train_seconds:.2f}s) - MAE: {metrics['MAE']:.2f}, "
+                    f"RMSE: {metrics['RMSE']:.2f}")
+        return model, metrics
+
+    def save_direct_model(self, model, target):
+        """Sauvegarde le modèle direct d'une cible (<target>_direct_model.*)."""
+        self.save_model(model, self._direct_name(target))
+
+    def load_direct_model(self, target, horizon=None):
+        """Charge le modèle direct d'une cible (None s'il n'existe pas ou couvre moins de horizon jours)."""
+        model = self.load_model(self._direct_name(target))
+        if model is not None and horizon is not None and self._direct_horizon(model) < horizon:
+            logger.info(f"Le modèle direct de {target} couvre moins de {horizon} jours.")
+            return None
+        return model
+
+    @staticmethod
+    def _direct_horizon(model):
+        booster = model.get_booster() if isinstance(model, xgb.XGBModel) else model
+        return int(booster.attr('horizon'))
+
+    def _global_frames(self, dfs, target, feature_names, countries, populations=None, categorical=True):
+        """
+        Prépare les séries de chaque pays pour le modèle global : colonnes de la cible
+        ramenées pour 100 000 habitants si populations est fourni, et ajout de la colonne
+        pays (catégorielle pour l'entraînement, code numérique pour la prévision).
+        """
+        frames = []
+        for country, df in dfs.items():
+            frame = df[list(feature_names) + [target]].astype('float32')
+            if populations is not None:
+                columns = _per_capita_columns(feature_names, target)
+                frame[columns] = frame[columns] * (100000 / populations[country])
+            if categorical:
+                frame[COUNTRY_FEATURE] = pd.Categorical([country] * len(frame), categories=countries)
+            else:
+                frame[COUNTRY_FEATURE] = float(countries.index(country)) if country in countries else np.nan
+            frames.append(frame)
+        return frames
+
+    @timed()
+    def train_global_model(self, dfs, target, feature_names, populations=None, test_size=0.2):
+        """
+        Entraîne un seul modèle pour une cible sur les lignes de tous les pays, le pays
+        étant une feature catégorielle native XGBoost (enable_categorical).
+
+        Args:
+            dfs: Dictionnaire {pays: DataFrame de features}.
+            target: Nom de la colonne cible à prédire.
+            feature_names: Liste des noms de colonnes à utiliser comme features.
+            populations: Dictionnaire {pays: population} ; si fourni, la cible, les lags et les
+                moyennes mobiles sont exprimés pour 100 000 habitants pendant l'entraînement.
+            test_size: Proportion des dernières dates de chaque pays utilisée pour le test.
+
+        Returns:
+            model: Modèle entraîné (liste des pays et normalisation dans les attributs du booster).
+            metrics: Métriques globales (dans l'unité d'origine) et métriques par pays (per_country).
+        """
+        start = time.perf_counter()
+        countries = sorted(dfs)
+        frames = self._global_frames(dfs, target, feature_names, countries, populations)
+        splits = [train_test_split(frame, test_size=test_size, shuffle=False) for frame in frames]
+        train = pd.concat([train for train, _ in splits])
+        test = pd.concat([test for _, test in splits])
+        columns = list(feature_names) + [COUNTRY_FEATURE]
+
+        model = self._get_default_model()
+        model.set_params(enable_categorical=True)
+        logger.info(f"Entraînement du modèle global pour {target} sur {len(countries)} pays ({len(train)} lignes).")
+        model.fit(
+            train[columns], train[target],
+            eval_set=[(test[columns], test[target])],
+            verbose=10
+        )
+        model.get_booster().set_attr(countries=json.dumps(countries),
+                                     per_capita="1" if populations is not None else "0")
+        train_seconds = time.perf_counter() - start
+
+        # Retour à l'unité d'origine pour les métriques (splits suit l'ordre de dfs, pas celui de countries)
+        scale = np.ones(len(test)) if populations is None else \
+            np.concatenate([np.full(len(t), populations[c] / 100000) for c, (_, t) in zip(dfs, splits)])
+        preds = model.predict(test[columns]) * scale
+        y_test = test[target].to_numpy() * scale
         metrics = {
             'MAE': mean_absolute_error(y_test, preds),
             'RMSE': np.sqrt(mean_squared_error(y_test, preds)),
-            'R2': r2_score(y_test, preds)
+            'R2': r2_score(y_test, preds),
+            'training_mode': "global",
+            'train_seconds': train_seconds,
+            'per_country': {},
         }
-        logger.info(f"Modèle entraîné pour {target} - MAE: {metrics['MAE']:.2f}, RMSE: {metrics['RMSE']:.2f}, R2: {metrics['R2']:.2f}")
+        codes = test[COUNTRY_FEATURE].cat.codes.to_numpy()
+        for i, country in enumerate(countries):
+            mask = codes == i
+            metrics['per_country'][country] = {
+                'MAE': mean_absolute_error(y_test[mask], preds[mask]),
+                'RMSE': np.sqrt(mean_squared_error(y_test[mask], preds[mask])),
+            }
+        logger.info(f"Modèle global entraîné pour {target} ({train_seconds:.2f}s) - MAE: {metrics['MAE']:.2f}, "
+                    f"RMSE: {metrics['RMSE']:.2f}, R2: {metrics['R2']:.2f}")
         return model, metrics
 
+    @staticmethod
+    def _global_name(target):
+        return f"{target}_global"
+
+    def save_global_model(self, model, target):
+        """Sauvegarde le modèle global d'une cible (<target>_global_model.*)."""
+        self.save_model(model, self._global_name(target))
+
+    def load_global_model(self, target):
+        """Charge le modèle global d'une cible (None s'il n'existe pas)."""
+        return self.load_model(self._global_name(target))
+
+    @timed()
+    def predict_future_global(self, dfs, target, feature_names, populations=None, days_ahead=7, look_back=30):
+        """
+        Prédit les valeurs futures de plusieurs pays avec le modèle global (un seul booster
+        chargé, un appel au modèle par pas de l'horizon pour l'ensemble des pays).
+
+        Args:
+            dfs: Dictionnaire {pays: DataFrame de features}.
+            target: Nom de la colonne cible à prédire.
+            feature_names: Liste des noms de colonnes utilisées comme features (sans le pays).
+            populations: Dictionnaire {pays: population}, requis si le modèle est normalisé.
+            days_ahead: Nombre de jours à prédire.
+            look_back: Nombre de lags maintenus dans l'état récursif.
+
+        Returns:
+            Dictionnaire {pays: DataFrame des prédictions}.
+        """
+        if not dfs:
+            return {}
+        model = self.load_global_model(target)
+        if model is None:
+            raise ValueError(f"Aucun modèle global trouvé pour {target} dans {self.model_dir}.")
+        booster = model.get_booster() if isinstance(model, xgb.XGBModel) else model
+        countries = json.loads(booster.attr('countries'))
+        if booster.attr('per_capita') == "1":
+            if populations is None:
+                raise ValueError(f"Le modèle global de {target} est normalisé par habitant : populations requis.")
+        else:
+            populations = None
+
+        keys = list(dfs)
+        frames = self._global_frames(dfs, target, feature_names, countries, populations, categorical=False)
+        dates, predictions = _recursive_forecast(
+            model, frames, target, list(feature_names) + [COUNTRY_FEATURE], days_ahead, look_back
+        )
+        if populations is not None:
+            predictions *= np.array([populations[key] / 100000 for key in keys], dtype=np.float32)[:, None]
+        return {
+            key: pd.DataFrame({f'predicted_{target}': predictions[i]}, index=dates[i])
+            for i, key in enumerate(keys)
+        }
+
+    def _cache_key(self, target):
+        return (os.path.abspath(self.model_dir), target)
+
+    def _model_path(self, target, model_format=None):
+        extension = "pkl" if (model_format or self.model_format) == "joblib" else "ubj"
+        return f"{self.model_dir}/{target}_model.{extension}"
+
+    def _manifest_path(self, target):
+        return f"{self.model_dir}/{target}_model.json"
+
+    def _save_native(self, model, target):
+        """Sauvegarde le booster au format UBJSON et ses métadonnées dans un manifeste JSON."""
+        booster = model.get_booster() if isinstance(model, xgb.XGBModel) else model
+        model_path = self._model_path(target, "ubj")
+        booster.save_model(model_path)
+        best_iteration = booster.attr('best_iteration')
+        manifest = {
+            "target": target,
+            "format": "ubj",
+            "feature_names": booster.feature_names,
+            "best_iteration": int(best_iteration) if best_iteration is not None else None,
+            "num_boosted_rounds": booster.num_boosted_rounds(),
+            "params": model.get_xgb_params() if isinstance(model, xgb.XGBModel) else None,
+            "xgboost_version": xgb.__version__,
+            "saved_at": datetime.now(timezone.utc).isoformat(),
+        }
+        with open(self._manifest_path(target), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, default=str)
+        return model_path, booster
+
     def save_model(self, model, target):
         """Sauvegarde le modèle entraîné."""
         if not os.path.exists(self.model_dir):
             os.makedirs(self.model_dir)
             logger.info(f"Répertoire {self.model_dir} créé.")
-        model_path = f"{self.model_dir}/{target}_model.pkl"
-        joblib.dump(model, model_path)
+        if self.model_format == "ubj":
+            model_path, model = self._save_native(model, target)
+        else:
+            model_path = self._model_path(target)
+            joblib.dump(model, model_path)
+        self.registry.put(self._cache_key(target), model_path, model)
+        if target in self.training_states:
+            with open(self._training_state_path(target), "w", encoding="utf-8") as f:
+                json.dump(self.training_states[target], f, indent=2)
         logger.info(f"Modèle sauvegardé dans {model_path}")
 
     def load_model(self, target):
-        """Charge le modèle XGBoost sauvegardé."""
-        model_path = f"{self.model_dir}/{target}_model.pkl"
-        try:
-            model = joblib.load(model_path)
-            logger.info(f"Modèle chargé depuis {model_path}")
+        """
+        Charge le modèle XGBoost sauvegardé (depuis le cache si le fichier n'a pas changé).
+
+        Au format "ubj", retourne un xgb.Booster ; si seul l'ancien pickle existe,
+        il est converti au format natif au passage.
+        """
+        model_path = self._model_path(target)
+        if self.model_format == "ubj" and not os.path.exists(model_path) \
+                and os.path.exists(self._model_path(target, "joblib")):
+            self._migrate(target)
+
+        def _load(path):
+            model = _load_native_booster(path) if self.model_format == "ubj" else joblib.load(path)
+            logger.info(f"Modèle chargé depuis {path}")
             return model
+
+        try:
+            return self.registry.get(self._cache_key(target), model_path, _load)
         except FileNotFoundError:
             logger.warning(f"Aucun modèle trouvé pour {target} dans {model_path}.")
             return None
 
+    def _migrate(self, target):
+        pickle_path = self._model_path(target, "joblib")
+        model_path, _ = self._save_native(joblib.load(pickle_path), target)
+        logger.info(f"Modèle {pickle_path} migré au format natif dans {model_path}")
+
+    def migrate_models(self):
+        """
+        Convertit tous les pickles joblib (<target>_model.pkl) du répertoire des modèles
+        au format natif UBJSON. Les fichiers .pkl sont conservés.
+
+        Returns:
+            Liste des cibles migrées.
+        """
+        if not os.path.isdir(self.model_dir):
+            return []
+        migrated = []
+        for file_name in sorted(os.listdir(self.model_dir)):
+            if file_name.endswith("_model.pkl"):
+                target = file_name[:-len("_model.pkl")]
+                self._migrate(target)
+                migrated.append(target)
+        return migrated
+
+    @timed()
     def predict_future(self, df, target, feature_names, days_ahead=7, look_back=30):
-        """Prédit les valeurs futures pour la cible spécifiée."""
+        """
+        Prédit les valeurs futures pour la cible spécifiée (prévision récursive).
+
+        L'état récursif est conservé dans des buffers circulaires NumPy préalloués :
+        les lags reprennent exactement le décalage de la dernière ligne observée,
+        les moyennes mobiles sont recalculées sur les valeurs observées puis prédites,
+        et les features calendaires correspondent à la date prédite.
+
+        Args:
+            df: DataFrame contenant les features (sortie de create_features).
+            target: Nom de la colonne cible à prédire.
+            feature_names: Liste des noms de colonnes utilisées comme features.
+            days_ahead: Nombre de jours à prédire.
+            look_back: Nombre de lags maintenus dans l'état récursif.
+
+        Returns:
+            DataFrame indexé par date contenant la colonne predicted_<target>.
+        """
         model = self.load_model(target)
         if model is None:
             logger.info(f"Entraînement d'un nouveau modèle pour {target}.")
             model, _ = self.train_model(df, target, feature_names)
             self.save_model(model, target)
-        
-        predictions = []
-        current_date = df.index.max()
-        last_data = df.iloc[-1:].copy()
-        
-        for i in range(1, days_ahead + 1):
-            current_date = current_date + timedelta(days=1)
-            X_pred = last_data[feature_names]
-            pred = model.predict(X_pred)[0]
-            predictions.append({
-                'date': current_date,
-                f'predicted_{target}': pred
-            })
-            
-            # Mise à jour des features pour la prochaine prédiction
-            new_row = last_data.copy()
-            new_row[target] = pred
-            for lag in range(look_back, 1, -1):
-                new_row[f'lag_{lag}'] = new_row[f'lag_{lag-1}']
-            if 'lag_1' in new_row.columns:
-                new_row['lag_1'] = pred
-            if 'rolling_7_mean' in new_row.columns:
-                vals = list(last_data[target].values[-6:]) + [pred]
-                new_row['rolling_7_mean'] = np.mean(vals)
-            if 'rolling_30_mean' in new_row.columns:
-                vals = list(last_data[target].values[-29:]) + [pred]
-                new_row['rolling_30_mean'] = np.mean(vals)
-            
-            new_row.index = [current_date]
-            last_data = pd.concat([last_data, new_row]).iloc[1:]
-        
-        return pd.DataFrame(predictions).set_index('date')
+
+        dates, predictions = _recursive_forecast(model, [df], target, feature_names, days_ahead, look_back)
+        return pd.DataFrame({f'predicted_{target}': predictions[0]}, index=dates[0])
+
+    @timed()
+    def predict_future_batch(self, dfs, target, feature_names, days_ahead=7, look_back=30):
+        """
+        Prédit les valeurs futures de plusieurs séries (ex: plusieurs pays) avec le même modèle.
+
+        Les lignes de features de toutes les séries sont empilées dans une seule matrice :
+        chaque pas de l'horizon ne fait qu'un appel au modèle pour l'ensemble des séries.
+
+        Args:
+            dfs: Dictionnaire {clé de la série (ex: pays): DataFrame de features}.
+            target: Nom de la colonne cible à prédire.
+            feature_names: Liste des noms de colonnes utilisées comme features.
+            days_ahead: Nombre de jours à prédire.
+            look_back: Nombre de lags maintenus dans l'état récursif.
+
+        Returns:
+            Dictionnaire {clé de la série: DataFrame des prédictions}.
+        """
+        if not dfs:
+            return {}
+        model = self.load_model(target)
+        if model is None:
+            raise ValueError(f"Aucun modèle trouvé pour {target} dans {self.model_dir}.")
+
+        keys = list(dfs)
+        dates, predictions = _recursive_forecast(
+            model, [dfs[key] for key in keys], target, feature_names, days_ahead, look_back
+        )
+        return {
+            key: pd.DataFrame({f'predicted_{target}': predictions[i]}, index=dates[i])
+            for i, key in enumerate(keys)
+        }
+
+    @timed()
+    def predict_future_direct(self, dfs, target, feature_names, days_ahead=7):
+        """
+        Prévision directe : l'horizon complet de toutes les séries est prédit en un seul
+        appel au modèle multi-sorties, depuis la dernière ligne observée de chaque série.
+
+        Args:
+            dfs: DataFrame de features, ou dictionnaire {clé de la série: DataFrame}.
+            target: Nom de la colonne cible à prédire.
+            feature_names: Liste des noms de colonnes utilisées comme features.
+            days_ahead: Nombre de jours à prédire (au plus l'horizon du modèle).
+
+        Returns:
+            DataFrame des prédictions (ou dictionnaire {clé: DataFrame} si dfs est un dictionnaire).
+        """
+        single = isinstance(dfs, pd.DataFrame)
+        frames = {None: dfs} if single else dfs
+        if not frames:
+            return {}
+        model = self.load_direct_model(target, days_ahead)
+        if model is None:
+            raise ValueError(f"Aucun modèle direct couvrant {days_ahead} jours pour {target} dans {self.model_dir}.")
+
+        keys = list(frames)
+        X = np.vstack([frames[key][feature_names].iloc[-1:].to_numpy(dtype=np.float64) for key in keys])
+        predictions = np.asarray(_booster_predict(model, X), dtype=np.float32).reshape(len(keys), -1)
+        offsets = pd.to_timedelta(np.arange(1, days_ahead + 1), unit='D')
+        results = {}
+        for i, key in enumerate(keys):
+            dates = frames[key].index.max() + offsets
+            dates.name = 'date'
+            results[key] = pd.DataFrame({f'predicted_{target}': predictions[i, :days_ahead]}, index=dates)
+        return results[None] if single else results
 
     def predict_multiple_targets(self, df, targets=None, feature_names=None, days_ahead=7, look_back=30):
         """
@@ -0,0 +1,295 @@
+"""
+Service de prévision longue durée (HTTP/JSON).
+
+Les boosters (via le ModelRegistry) et les séries récentes de chaque pays restent
+en mémoire entre les requêtes ; seules les prévisions sont calculées à la demande,
+dans un pool de threads. Les requêtes simultanées portant sur la même clé
+(pays, cible, jours) sont regroupées en un seul calcul.
+
+L'application est un callable ASGI (utilisable avec uvicorn si installé) ; un
+petit serveur HTTP/1.1 asyncio sans dépendance est fourni pour la lancer :
+
+    python -m predictor.service --port 8000 --db-config database.ini
+    curl "http://localhost:8000/forecast?country=France&target=new_cases&days=7"
+"""
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+import argparse
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from predictor.data_processing import create_features_cached, features_frame
+from predictor.database import VALID_TARGETS, get_engine, load_data, load_db_config
+from predictor.model import MODEL_FORMATS, ModelRegistry, PandemicModel
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPError(Exception):
+    """Erreur renvoyée au client avec un code HTTP."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class ForecastService:
+    """
+    Application ASGI exposant /forecast?country=&target=&days= et /health.
+
+    Les modèles sont cherchés dans <model_dir>/<pays>/ (mode multi-pays) puis dans
+    <model_dir>/ ; les séries d'un pays sont rechargées au plus toutes les
+    series_ttl secondes.
+    """
+
+    # Lignes conservées par série : fenêtre de la moyenne mobile la plus longue
+    TAIL_ROWS = 30
+
+    def __init__(self, engine, model_dir="models", model_format="joblib", max_days=90, series_ttl=300,
+                 max_workers=4, cache_dir=None, registry=None):
+        self.engine = engine
+        self.model_dir = model_dir
+        self.model_format = model_format
+        self.max_days = max_days
+        self.series_ttl = series_ttl
+        self.cache_dir = cache_dir
+        self.registry = registry if registry is not None else ModelRegistry()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="forecast")
+        self._series = {}
+        self._series_locks = {}
+        self._locks_guard = threading.Lock()
+        self._inflight = {}
+        self.requests = 0
+        self.coalesced = 0
+
+    def _country_lock(self, country):
+        with self._locks_guard:
+            return self._series_locks.setdefault(country, threading.Lock())
+
+    def _series_frames(self, country):
+        """
+        Noms des features et dernières lignes de features de chaque cible d'un pays
+        (assez pour l'état récursif), gardées en mémoire series_ttl secondes.
+        """
+        with self._country_lock(country):
+            entry = self._series.get(country)
+            if entry is None or time.monotonic() - entry[0] > self.series_ttl:
+                try:
+                    df = load_data(self.engine, country, cache_dir=self.cache_dir)
+                except ValueError as e:
+                    raise HTTPError(404, str(e)) from e
+                targets = [target for target in VALID_TARGETS if target in df.columns]
+                features = create_features_cached(df, targets)
+                frames = {target: features_frame(features, target).iloc[-self.TAIL_ROWS:]
+                          for target in targets if len(features['index'][target]) > 0}
+                entry = (time.monotonic(), features['feature_names'], frames)
+                self._series[country] = entry
+            return entry[1], entry[2]
+
+    def _manager(self, country, target):
+        """PandemicModel du répertoire contenant un modèle pour ce pays et cette cible."""
+        # Au format "ubj", un ancien pickle est converti à la volée par load_model
+        formats = MODEL_FORMATS if self.model_format == "ubj" else (self.model_format,)
+        root = os.path.realpath(self.model_dir)
+        country_dir = os.path.realpath(os.path.join(root, country))
+        if os.path.dirname(country_dir) != root:
+            raise HTTPError(400, f"Pays '{country}' invalide.")
+        for model_dir in (country_dir, self.model_dir):
+            manager = PandemicModel(model_dir=model_dir, registry=self.registry, model_format=self.model_format)
+            if any(os.path.exists(manager._model_path(target, model_format)) for model_format in formats):
+                return manager
+        raise HTTPError(404, f"Aucun modèle trouvé pour {target} ({country}).")
+
+    def _forecast_sync(self, country, target, days):
+        feature_names, frames = self._series_frames(country)
+        if target not in frames:
+            raise HTTPError(404, f"Pas de données {target} pour {country}.")
+        manager = self._manager(country, target)
+        # Les features du modèle dépendent des cibles chargées à l'entraînement (ratios par habitant)
+        model = manager.load_model(target)
+        booster = model.get_booster() if hasattr(model, 'get_booster') else model
+        model_features = getattr(booster, 'feature_names', None) or feature_names
+        missing = [name for name in model_features if name not in frames[target].columns]
+        if missing:
+            raise HTTPError(500, f"Features absentes des données de {country}: {missing}")
+        preds = manager.predict_future_batch({country: frames[target]}, target, model_features, days_ahead=days)
+        values = preds[country][f"predicted_{target}"].clip(lower=0)
+        return {
+            'country': country,
+            'target': target,
+            'days': days,
+            'predictions': [{'date': date.date().isoformat(), 'value': float(value)} for date, value in values.items()],
+        }
+
+    async def forecast(self, country, target, days):
+        """Prévision (pays, cible, jours) ; les appels simultanés sur la même clé partagent le calcul."""
+        key = (country, target, days)
+        self.requests += 1
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, self._forecast_sync, country, target, days)
+        self._inflight[key] = future
+        try:
+            return await asyncio.shield(future)
+        finally:
+            self._inflight.pop(key, None)
+
+    def _parse_query(self, query_string):
+        params = {key: values[-1] for key, values in parse_qs(query_string).items()}
+        country = params.get('country')
+        target = params.get('target', 'new_cases')
+        if not country:
+            raise HTTPError(400, "Paramètre 'country' manquant.")
+        # Le pays sert de nom de sous-répertoire de model_dir : pas de chemin
+        if (os.path.basename(country) != country or country in (".", "..")
+                or any(sep in country for sep in ("/", "\\", "\0"))):
+            raise HTTPError(400, f"Pays '{country}' invalide.")
+        if target not in VALID_TARGETS:
+            raise HTTPError(400, f"Cible '{target}' invalide. Les cibles valides sont: {VALID_TARGETS}")
+        try:
+            days = int(params.get('days', 7))
+        except ValueError:
+            raise HTTPError(400, "Le paramètre 'days' doit être un entier.")
+        if not 1 <= days <= self.max_days:
+            raise HTTPError(400, f"Le paramètre 'days' doit être compris entre 1 et {self.max_days}.")
+        return country, target, days
+
+    async def handle(self, method, path, query_string):
+        """Traite une requête et retourne (statut, corps JSON)."""
+        if method != "GET":
+            return 405, {'error': "Méthode non autorisée."}
+        try:
+            if path == "/health":
+                return 200, {'status': "ok", 'requests': self.requests, 'coalesced': self.coalesced,
+                             'models': self.registry.stats()}
+            if path == "/forecast":
+                return 200, await self.forecast(*self._parse_query(query_string))
+            return 404, {'error': f"Chemin inconnu: {path}"}
+        except HTTPError as e:
+            return e.status, {'error': e.message}
+        except Exception as e:
+            logger.exception(f"Erreur lors du traitement de {path}: {e}")
+            return 500, {'error': str(e)}
+
+    async def __call__(self, scope, receive, send):
+        """Point d'entrée ASGI."""
+        if scope['type'] == 'lifespan':
+            while True:
+                message = await receive()
+                if message['type'] == 'lifespan.startup':
+                    await send({'type': 'lifespan.startup.complete'})
+                elif message['type'] == 'lifespan.shutdown':
+                    self.close()
+                    await send({'type': 'lifespan.shutdown.complete'})
+                    return
+        status, payload = await self.handle(scope['method'], scope['path'], scope.get('query_string', b'').decode())
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': [(b'content-type', b'application/json; charset=utf-8'),
+                                (b'content-length', str(len(body)).encode())]})
+        await send({'type': 'http.response.body', 'body': body})
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           500: "Internal Server Error"}
+
+
+async def _handle_connection(app, reader, writer):
+    """Connexion HTTP/1.1 (keep-alive) : chaque requête est transmise à l'application ASGI."""
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            method, target, version = request_line.decode('latin-1').split()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            if int(headers.get('content-length', 0)):
+                await reader.readexactly(int(headers['content-length']))
+            url = urlsplit(target)
+            scope = {'type': 'http', 'method': method, 'path': url.path, 'query_string': url.query.encode(),
+                     'headers': [(k.encode(), v.encode()) for k, v in headers.items()]}
+            response = {}
+
+            async def receive():
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    response['status'] = message['status']
+                    response['headers'] = message['headers']
+                else:
+                    response['body'] = message.get('body', b'')
+
+            await app(scope, receive, send)
+            keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+            head = [f"HTTP/1.1 {response['status']} {REASONS.get(response['status'], '')}"]
+            head += [f"{k.decode()}: {v.decode()}" for k, v in response['headers']]
+            head.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode('latin-1') + response['body'])
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(app, host="127.0.0.1", port=8000, ready=None):
+    """
+    Lance le serveur HTTP asyncio.
+
+    Args:
+        ready: Callback optionnel appelé avec le port effectif une fois le serveur prêt.
+    """
+    server = await asyncio.start_server(lambda r, w: _handle_connection(app, r, w), host, port)
+    actual_port = server.sockets[0].getsockname()[1]
+    logger.info(f"Service de prévision à l'écoute sur http://{host}:{actual_port}")
+    if ready is not None:
+        ready(actual_port)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Service HTTP de prévision")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Adresse d'écoute")
+    parser.add_argument("--port", type=int, default=8000, help="Port d'écoute")
+    parser.add_argument("--db-config", type=str, default=None, help="Fichier INI de connexion à la base")
+    parser.add_argument("--model-dir", type=str, default="models", help="Répertoire des modèles")
+    parser.add_argument("--model-format", choices=["joblib", "ubj"], default="joblib", help="Format des modèles")
+    parser.add_argument("--cache-dir", type=str, default=None, help="Répertoire du cache local des données")
+    parser.add_argument("--series-ttl", type=float, default=300, help="Durée de conservation des séries (s)")
+    parser.add_argument("--workers", type=int, default=4, help="Threads de calcul des prévisions")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    app = ForecastService(get_engine(load_db_config(args.db_config)), model_dir=args.model_dir,
+                          model_format=args.model_format, series_ttl=args.series_ttl,
+                          max_workers=args.workers, cache_dir=args.cache_dir)
+    try:
+        asyncio.run(serve(app, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        app.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+from sklearn.model_selection import TimeSeriesSplit
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+import hashlib
+import itertools
+import json
+import logging
+import math
+import os
+import sqlite3
+import time
+import numpy as np
+import xgboost as xgb
+
+logger = logging.getLogger(__name__)
+
+# Espace de recherche (mêmes valeurs que l'ancienne grille GridSearchCV)
+PARAM_SPACE = {
+    'max_depth': [3, 6, 9],
+    'learning_rate': [0.01, 0.05, 0.1],
+    'subsample': [0.8, 0.9, 1.0],
+    'colsample_bytree': [0.8, 0.9, 1.0],
+}
+
+TUNER_MODES = ("halving", "hyperband", "tpe")
+
+
+class _Deadline(xgb.callback.TrainingCallback):
+    """Arrête l'entraînement en cours dès que le budget de temps est dépassé."""
+
+    def __init__(self, deadline):
+        super().__init__()
+        self.deadline = deadline
+
+    def after_iteration(self, model, epoch, evals_log):
+        return time.perf_counter() >= self.deadline
+
+
+class BudgetExceeded(Exception):
+    """Levée quand le budget de temps du tuning est épuisé."""
+
+
+class Tuner:
+    """
+    Recherche d'hyperparamètres XGBoost sur validation croisée temporelle.
+
+    Modes :
+        - "halving" : successive halving, la ressource étant le nombre de rounds de boosting ;
+          à chaque palier seul le meilleur tiers (eta=3) des candidats continue avec eta fois
+          plus de rounds.
+        - "hyperband" : plusieurs brackets de successive halving avec des compromis
+          nombre de candidats / rounds initiaux différents.
+        - "tpe" : optimisation bayésienne TPE (nécessite optuna).
+
+    Dans chaque fold, l'early stopping est appliqué sur le fold de validation. Le budget
+    budget_seconds est une limite stricte : l'entraînement en cours est interrompu et le
+    meilleur candidat évalué jusque-là est retenu. Les meilleurs paramètres trouvés sont
+    conservés et proposés en premier lors des tunings suivants (ex: pays suivants).
+    """
+
+    def __init__(self, mode="halving", budget_seconds=None, n_splits=5, min_rounds=50, max_rounds=1000,
+                 eta=3, n_candidates=27, early_stopping_rounds=50, random_state=42, warm_start=None,
+                 max_warm_start=3, nthread=None):
+        if mode not in TUNER_MODES:
+            raise ValueError(f"Mode de tuning '{mode}' invalide. Les modes valides sont: {list(TUNER_MODES)}")
+        self.mode = mode
+        self.budget_seconds = budget_seconds
+        self.n_splits = n_splits
+        self.min_rounds = min_rounds
+        self.max_rounds = max_rounds
+        self.eta = eta
+        self.n_candidates = n_candidates
+        self.early_stopping_rounds = early_stopping_rounds
+        self.random_state = random_state
+        self.warm_start = list(warm_start or [])
+        self.max_warm_start = max_warm_start
+        self.nthread = nthread
+
+    def _candidates(self, n, rng):
+        """Candidats : paramètres de warm start puis tirage sans remise dans la grille."""
+        grid = [dict(zip(PARAM_SPACE, values)) for values in itertools.product(*PARAM_SPACE.values())]
+        order = rng.permutation(len(grid))
+        candidates = [dict(params) for params in self.warm_start]
+        for i in order:
+            if len(candidates) >= n:
+                break
+            if grid[i] not in candidates:
+                candidates.append(grid[i])
+        return candidates[:max(n, len(self.warm_start))]
+
+    def _folds(self, X, y):
+        """
+        QuantileDMatrix de chaque fold, construites une seule fois et réutilisées par tous les
+        candidats ; le fold de validation partage les quantiles (ref) de son fold d'entraînement.
+        """
+        X = np.asarray(X, dtype=np.float32)
+        y = np.asarray(y, dtype=np.float32)
+        n_splits = min(self.n_splits, len(X) - 1)
+        folds = []
+        for train_index, valid_index in TimeSeriesSplit(n_splits=n_splits).split(X):
+            # Plages de lignes consécutives : tranches sans copie de X
+            train = slice(train_index[0], train_index[-1] + 1)
+            valid = slice(valid_index[0], valid_index[-1] + 1)
+            dtrain = xgb.QuantileDMatrix(X[train], label=y[train], nthread=self.nthread or -1)
+            dvalid = xgb.QuantileDMatrix(X[valid], label=y[valid], ref=dtrain, nthread=self.nthread or -1)
+            folds.append((dtrain, dvalid))
+        return folds
+
+    def _evaluate(self, params, rounds, folds, deadline):
+        """Score moyen (RMSE) et nombre moyen de rounds utiles sur les folds."""
+        if deadline is not None and time.perf_counter() >= deadline:
+            raise BudgetExceeded()
+        booster_params = {
+            'objective': 'reg:squarederror',
+            'eval_metric': 'rmse',
+            'tree_method': 'hist',
+            'eta': params['learning_rate'],
+            'max_depth': params['max_depth'],
+            'subsample': params['subsample'],
+            'colsample_bytree': params['colsample_bytree'],
+            'seed': self.random_state,
+        }
+        if self.nthread:
+            booster_params['nthread'] = self.nthread
+        callbacks = [_Deadline(deadline)] if deadline is not None else []
+        scores, best_rounds = [], []
+        for dtrain, dvalid in folds:
+            booster = xgb.train(booster_params, dtrain, num_boost_round=rounds, evals=[(dvalid, 'valid')],
+                                early_stopping_rounds=self.early_stopping_rounds, callbacks=callbacks,
+                                verbose_eval=False)
+            if deadline is not None and time.perf_counter() >= deadline:
+                # Évaluation incomplète (éventuellement arrêtée avant le premier score) : non retenue
+                raise BudgetExceeded()
+            scores.append(booster.best_score)
+            best_rounds.append(booster.best_iteration + 1)
+        return float(np.mean(scores)), int(np.mean(best_rounds))
+
+    def _successive_halving(self, candidates, min_rounds, folds, deadline, results):
+        rounds = min_rounds
+        while candidates:
+            scored = []
+            for params in candidates:
+                score, best_rounds = self._evaluate(params, rounds, folds, deadline)
+                results.append({'params': params, 'rounds': rounds, 'score': score, 'best_rounds': best_rounds})
+                scored.append((score, params))
+            if len(candidates) == 1 or rounds >= self.max_rounds:
+                break
+            scored.sort(key=lambda item: item[0])
+            candidates = [params for _, params in scored[:max(1, len(scored) // self.eta)]]
+            rounds = min(rounds * self.eta, self.max_rounds)
+
+    def _run_halving(self, folds, deadline, results, rng):
+        self._successive_halving(self._candidates(self.n_candidates, rng), self.min_rounds, folds, deadline, results)
+
+    def _run_hyperband(self, folds, deadline, results, rng):
+        s_max = int(math.floor(math.log(self.max_rounds / self.min_rounds, self.eta)))
+        for s in range(s_max, -1, -1):
+            n = int(math.ceil((s_max + 1) / (s + 1) * self.eta ** s))
+            min_rounds = max(self.min_rounds, int(self.max_rounds * self.eta ** -s))
+            self._successive_halving(self._candidates(n, rng), min_rounds, folds, deadline, results)
+
+    def _run_tpe(self, folds, deadline, results, rng):
+        try:
+            import optuna
+        except ImportError as e:
+            raise ImportError("Le mode de tuning 'tpe' nécessite optuna (pip install optuna).") from e
+        optuna.logging.set_verbosity(optuna.logging.WARNING)
+        study = optuna.create_study(direction="minimize", sampler=optuna.samplers.TPESampler(seed=self.random_state))
+        for params in self.warm_start:
+            study.enqueue_trial(params)
+
+        def objective(trial):
+            params = {name: trial.suggest_categorical(name, values) for name, values in PARAM_SPACE.items()}
+            score, best_rounds = self._evaluate(params, self.max_rounds, folds, deadline)
+            results.append({'params': params, 'rounds': self.max_rounds, 'score': score, 'best_rounds': best_rounds})
+            return score
+
+        study.optimize(objective, n_trials=self.n_candidates,
+                       timeout=None if deadline is None else max(deadline - time.perf_counter(), 0))
+
+    def tune(self, X, y):
+        """
+        Recherche les meilleurs hyperparamètres sur (X, y).
+
+        Returns:
+            best_params: Meilleurs paramètres (noms de l'API scikit-learn de XGBoost).
+            summary: Détails de la recherche (évaluations, rounds conseillés, durée).
+        """
+        start = time.perf_counter()
+        deadline = start + self.budget_seconds if self.budget_seconds else None
+        rng = np.random.default_rng(self.random_state)
+        folds = self._folds(X, y)
+        results = []
+        try:
+            getattr(self, f"_run_{self.mode}")(folds, deadline, results, rng)
+        except BudgetExceeded:
+            logger.warning(f"Budget de tuning de {self.budget_seconds}s atteint après {len(results)} évaluations.")
+
+        duration = time.perf_counter() - start
+        if not results:
+            logger.warning("Aucune évaluation terminée dans le budget : paramètres par défaut conservés.")
+            return None, {'evaluations': [], 'duration': duration, 'best_rounds': None}
+
+        best = min(results, key=lambda result: result['score'])
+        self.warm_start = [dict(best['params'])] + [p for p in self.warm_start if p != best['params']]
+        del self.warm_start[self.max_warm_start:]
+        logger.info(f"Tuning {self.mode} terminé en {duration:.1f}s ({len(results)} évaluations) - "
+                    f"meilleurs paramètres: {best['params']} (RMSE CV {best['score']:.2f})")
+        return dict(best['params']), {'evaluations': results, 'duration': duration,
+                                      'best_rounds': best['best_rounds'], 'best_score': best['score']}
+
+
+# Tuners partagés par processus : les meilleurs paramètres d'un pays servent de
+# candidats de départ pour les pays suivants traités par le même worker.
+_default_tuners = {}
+
+
+def get_tuner(mode="halving", budget_seconds=None, nthread=None):
+    """Retourne le tuner partagé du processus pour ce mode, ce budget et ce nombre de threads."""
+    key = (mode, budget_seconds, nthread)
+    if key not in _default_tuners:
+        _default_tuners[key] = Tuner(mode=mode, budget_seconds=budget_seconds, nthread=nthread)
+    return _default_tuners[key]
+
+
+class HyperparamStore:
+    """
+    Stockage persistant (SQLite) des hyperparamètres trouvés par le tuning.
+
+    Une entrée par (pays, cible, configuration de features) conserve les meilleurs
+    paramètres, le résultat de la recherche (score, nombre d'évaluations, durée) et la
+    fenêtre de données utilisée (dates, nombre de lignes, moyenne/écart-type de la cible).
+    Une entrée devient obsolète si elle est plus vieille que max_age_days, si la fenêtre
+    a grandi de plus de max_new_rows (proportion) ou si la moyenne de la cible a dérivé de
+    plus de max_drift écarts-types.
+
+    Le fichier peut être partagé par les workers du pool : SQLite sérialise les écritures
+    (un worker attend jusqu'à 30 s que le verrou soit libéré) ; le journal WAL évite que
+    les lectures soient bloquées pendant une écriture.
+    """
+
+    def __init__(self, path="models/hyperparams.sqlite", max_age_days=30, max_new_rows=0.2, max_drift=1.0):
+        self.path = path
+        self.max_age_days = max_age_days
+        self.max_new_rows = max_new_rows
+        self.max_drift = max_drift
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with closing(self._connect()) as connection, connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS hyperparams ("
+                "country TEXT NOT NULL, target TEXT NOT NULL, feature_config TEXT NOT NULL, "
+                "params TEXT NOT NULL, mode TEXT, best_score REAL, n_evaluations INTEGER, duration REAL, "
+                "window_start TEXT, window_end TEXT, n_rows INTEGER, target_mean REAL, target_std REAL, "
+                "created_at TEXT NOT NULL, PRIMARY KEY (country, target, feature_config))"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def feature_config(feature_names):
+        """Empreinte courte de la liste des features."""
+        return hashlib.sha256(json.dumps(list(feature_names)).encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def window(df, target):
+        """Description de la fenêtre de données d'entraînement."""
+        values = df[target].astype("float64")
+        return {
+            'window_start': str(df.index.min()),
+            'window_end': str(df.index.max()),
+            'n_rows': len(df),
+            'target_mean': float(values.mean()),
+            'target_std': float(values.std(ddof=0)),
+        }
+
+    def _stale_reason(self, entry, window):
+        created_at = datetime.fromisoformat(entry['created_at'])
+        if self.max_age_days is not None and datetime.now(timezone.utc) - created_at > timedelta(days=self.max_age_days):
+            return "âge"
+        if self.max_new_rows is not None and window['n_rows'] > entry['n_rows'] * (1 + self.max_new_rows):
+            return "nouvelles données"
+        if self.max_drift is not None:
+            scale = entry['target_std'] or 1.0
+            if abs(window['target_mean'] - entry['target_mean']) / scale > self.max_drift:
+                return "dérive de la cible"
+        return None
+
+    def get(self, country, target, feature_names, window=None):
+        """
+        Retourne l'entrée stockée, ou None si elle est absente ou obsolète pour cette fenêtre.
+
+        Args:
+            window: Fenêtre courante (voir window()) ; si None, la fraîcheur n'est pas vérifiée.
+        """
+        with closing(self._connect()) as connection, connection:
+            connection.row_factory = sqlite3.Row
+            row = connection.execute(
+                "SELECT * FROM hyperparams WHERE country = ? AND target = ? AND feature_config = ?",
+                (country, target, self.feature_config(feature_names)),
+            ).fetchone()
+        if row is None:
+            return None
+        entry = dict(row)
+        entry['params'] = json.loads(entry['params'])
+        if window is not None:
+            reason = self._stale_reason(entry, window)
+            if reason is not None:
+                logger.info(f"Hyperparamètres stockés pour {country}/{target} obsolètes ({reason}).")
+                return None
+        return entry
+
+    def put(self, country, target, feature_names, params, window, summary=None, mode=None):
+        """Enregistre (ou remplace) le résultat d'un tuning."""
+        summary = summary or {}
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO hyperparams VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (country, target, self.feature_config(feature_names), json.dumps(params), mode,
+                 summary.get('best_score'), len(summary.get('evaluations', [])), summary.get('duration'),
+                 window['window_start'], window['window_end'], window['n_rows'],
+                 window['target_mean'], window['target_std'], datetime.now(timezone.utc).isoformat()),
+            )
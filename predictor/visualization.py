@@ -1,70 +1,202 @@
-import matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from predictor.instrumentation import timed
 import os
 import numpy as np
 
+# Les figures sont créées avec l'API objet (matplotlib.figure.Figure) sur un canvas
+# Agg et jamais enregistrées auprès de pyplot : aucun état global ni fenêtre, quel
+# que soit le backend configuré, et les rendus peuvent tourner en parallèle.
+OUTPUT_FORMATS = ("png", "svg", "none")
+
+
 def ensure_dir_exists(output_dir):
     """Vérifie si le répertoire de sortie existe, sinon le crée."""
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
 
-def plot_predictions(df, preds, target, country_name, output_dir="visualization"):
+
+def _with_last_point(history, pred_index, pred_values):
+    """Série prédite précédée du dernier point historique (continuité de la courbe)."""
+    dates = np.concatenate([history.index[-1:].to_numpy(), pred_index.to_numpy()])
+    values = np.concatenate([history.to_numpy(dtype=np.float64)[-1:], np.asarray(pred_values, dtype=np.float64)])
+    return dates, values
+
+
+def _rate(numerator, denominator):
+    """Taux en pourcentage (0 quand le dénominateur est nul)."""
+    return (numerator / denominator).replace([np.inf, -np.inf], np.nan).fillna(0) * 100
+
+
+class Renderer:
+    """
+    Rendu des graphiques avec l'API objet de matplotlib.
+
+    fmt choisit le format des fichiers ("png", "svg" ou "none" pour ne rien dessiner).
+    Avec reuse=True, chaque type de figure (axes, légendes, lignes, mise en page) est
+    construit une seule fois puis seules les données et les titres sont remplacés
+    d'un pays à l'autre. Un Renderer n'est pas partagé entre threads : en parallèle,
+    chaque processus (ou thread) utilise le sien.
+    """
+
+    def __init__(self, fmt="png", reuse=False):
+        if fmt not in OUTPUT_FORMATS:
+            raise ValueError(f"Format '{fmt}' invalide. Les formats valides sont: {list(OUTPUT_FORMATS)}")
+        self.fmt = fmt
+        self.reuse = reuse
+        self._templates = {}
+
+    @property
+    def enabled(self):
+        return self.fmt != "none"
+
+    def _template(self, key, build):
+        if not self.reuse:
+            return build()
+        if key not in self._templates:
+            self._templates[key] = build()
+        return self._templates[key]
+
+    @staticmethod
+    def _build(figsize, series_labels, colors, ylabels, xlabel='Date', sharex=False, annotate=False):
+        """Figure à une ou plusieurs lignes d'axes, chacune avec une courbe historique et une prédite."""
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        axes = fig.subplots(len(series_labels), 1, sharex=sharex, squeeze=False)[:, 0]
+        lines = []
+        for ax, labels, (hist_color, pred_color), ylabel in zip(axes, series_labels, colors, ylabels):
+            hist, = ax.plot([], [], label=labels[0], color=hist_color)
+            pred, = ax.plot([], [], label=labels[1], color=pred_color)
+            lines.append((hist, pred))
+            ax.set_ylabel(ylabel)
+            ax.legend()
+            ax.grid(True)
+        axes[-1].set_xlabel(xlabel)
+        annotation = None
+        if annotate:
+            annotation = axes[0].annotate("", xy=(0.05, 0.95), xycoords='axes fraction',
+                                          bbox=dict(boxstyle='round', facecolor='white', alpha=0.8))
+        return {'fig': fig, 'axes': axes, 'lines': lines, 'annotation': annotation, 'laid_out': False}
+
+    def _render(self, template, series, title, output_dir, name, suptitle=False, annotation=None):
+        """Remplace les données du modèle de figure, ajuste les axes et enregistre le fichier."""
+        fig = template['fig']
+        for ax, (hist, pred), (hist_x, hist_y, pred_x, pred_y) in zip(template['axes'], template['lines'], series):
+            ax.xaxis.update_units(hist_x)
+            hist.set_data(hist_x, hist_y)
+            pred.set_data(pred_x, pred_y)
+            ax.relim()
+            ax.autoscale_view()
+        if suptitle:
+            fig.suptitle(title)
+        else:
+            template['axes'][0].set_title(title)
+        if template['annotation'] is not None:
+            template['annotation'].set_text(annotation or "")
+            template['annotation'].set_visible(annotation is not None)
+        if not template['laid_out']:
+            fig.tight_layout()
+            template['laid_out'] = self.reuse
+        ensure_dir_exists(output_dir)
+        output_path = os.path.join(output_dir, f"{name}.{self.fmt}")
+        fig.savefig(output_path, format=self.fmt)
+        return output_path
+
+    @staticmethod
+    def _series(history, pred_index, pred_values):
+        pred_x, pred_y = _with_last_point(history, pred_index, pred_values)
+        return history.index.to_numpy(), history.to_numpy(dtype=np.float64), pred_x, pred_y
+
+    def predictions(self, df, preds, target, country_name, output_dir="visualization"):
+        """Graphique comparant les données historiques et les prédictions d'une cible."""
+        if not self.enabled:
+            return None
+        template = self._template(('predictions', target), lambda: self._build(
+            (12, 6), [('Données historiques', 'Prédictions')], [('blue', 'red')], [f"Nombre de {target}"]))
+        series = [self._series(df[target], preds.index, preds[f'predicted_{target}'])]
+        return self._render(template, series, f"Prédiction des {target} pour {country_name}",
+                            output_dir, f"{country_name}_{target}_predictions")
+
+    def combined(self, df, predictions, country_name, output_dir="visualization"):
+        """Graphique combinant les prédictions des différentes cibles (un axe par cible)."""
+        if not self.enabled:
+            return None
+        targets = tuple(predictions)
+        colors = [('blue', 'red'), ('green', 'orange'), ('purple', 'pink')]
+        template = self._template(('combined', targets), lambda: self._build(
+            (12, 5 * len(targets)), [(f'{t} historiques', f'Prédictions {t}') for t in targets],
+            colors[:len(targets)], [f"Nombre de {t}" for t in targets], sharex=True))
+        series = [self._series(df[t], predictions[t].index, predictions[t][f'predicted_{t}']) for t in targets]
+        return self._render(template, series, f"Prédictions COVID-19 pour {country_name}",
+                            output_dir, f"{country_name}_combined_predictions", suptitle=True)
+
+    def rate(self, kind, df, cases_preds, other_preds, country_name, output_dir="visualization"):
+        """Taux de mortalité (kind="mortality") ou de guérison (kind="recovery") historique et prédit."""
+        if not self.enabled:
+            return None
+        column, label, title, pred_color = RATE_PLOTS[kind]
+        template = self._template(('rate', kind), lambda: self._build(
+            (12, 6), [(f'{label} historique', f'{label} prédit')], [('blue', pred_color)],
+            [f'{label} (%)'], annotate=True))
+        historical_rate = _rate(df[column], df['new_cases'])
+        pred_rate = _rate(other_preds[f'predicted_{column}'], cases_preds['predicted_new_cases'])
+        annotation = None
+        if len(pred_rate) > 0:
+            variation = pred_rate.iloc[-1] - historical_rate.iloc[-1]
+            annotation = f"Variation prévue: {variation:.2f}%"
+        series = [self._series(historical_rate, other_preds.index, pred_rate)]
+        return self._render(template, series, f"{title} pour {country_name}",
+                            output_dir, f"{country_name}_{kind}_rate", annotation=annotation)
+
+    def residuals(self, y_true, y_pred, country_name, target, output_dir="visualization"):
+        """Graphique des résidus."""
+        if not self.enabled:
+            return None
+
+        def build():
+            fig = Figure(figsize=(10, 5))
+            FigureCanvasAgg(fig)
+            ax = fig.add_subplot()
+            points = ax.scatter([], [], alpha=0.5)
+            ax.axhline(0, color='red')
+            ax.set_xlabel("Valeurs prédites")
+            ax.set_ylabel("Résidus (y_true - y_pred)")
+            return {'fig': fig, 'ax': ax, 'points': points, 'laid_out': False}
+
+        template = self._template(('residuals', target), build)
+        y_pred = np.asarray(y_pred, dtype=np.float64)
+        residuals = np.asarray(y_true, dtype=np.float64) - y_pred
+        template['points'].set_offsets(np.column_stack([y_pred, residuals]))
+        # Limites recalculées sur ce seul pays (update_datalim les étendrait en mode réutilisation)
+        template['ax'].dataLim.update_from_data_xy(template['points'].get_offsets(), ignore=True)
+        template['ax'].autoscale_view()
+        template['ax'].set_title(f"Résidus du modèle pour {country_name} ({target})")
+        if not template['laid_out']:
+            template['fig'].tight_layout()
+            template['laid_out'] = self.reuse
+        ensure_dir_exists(output_dir)
+        output_path = os.path.join(output_dir, f"{country_name}_{target}_residuals.{self.fmt}")
+        template['fig'].savefig(output_path, format=self.fmt)
+        return output_path
+
+
+# Taux dérivés : colonne, libellé, titre, couleur de la courbe prédite
+RATE_PLOTS = {
+    'mortality': ('new_deaths', 'Taux de mortalité', "Taux de mortalité (décès/cas)", 'red'),
+    'recovery': ('new_recovered', 'Taux de guérison', "Taux de guérison (guéris/cas)", 'green'),
+}
+
+
+def plot_predictions(df, preds, target, country_name, output_dir="visualization", fmt="png", renderer=None):
     """Enregistre un graphique comparant les données historiques et les prédictions."""
-    ensure_dir_exists(output_dir)
-    plt.figure(figsize=(12, 6))
-    plt.plot(df.index, df[target], label='Données historiques', color='blue')
-    
-    last_date = df.index[-1]
-    last_value = df[target].iloc[-1]
-    all_pred_dates = [last_date] + list(preds.index)
-    all_pred_values = [last_value] + list(preds[f'predicted_{target}'])
-    
-    plt.plot(all_pred_dates, all_pred_values, label='Prédictions', color='red')
-    plt.title(f"Prédiction des {target} pour {country_name}")
-    plt.xlabel('Date')
-    plt.ylabel(f"Nombre de {target}")
-    plt.legend()
-    plt.grid(True)
-    plt.tight_layout()
-    
-    output_path = os.path.join(output_dir, f"{country_name}_{target}_predictions.png")
-    plt.savefig(output_path)
-    plt.close()
-
-def plot_combined_predictions(df, predictions, country_name, output_dir="visualization"):
+    return (renderer or Renderer(fmt)).predictions(df, preds, target, country_name, output_dir)
+
+
+def plot_combined_predictions(df, predictions, country_name, output_dir="visualization", fmt="png", renderer=None):
     """Enregistre un graphique combinant les prédictions des différentes cibles."""
-    ensure_dir_exists(output_dir)
-    
-    # Déterminer combien de subplots nous avons besoin
-    num_targets = len(predictions)
-    fig, axes = plt.subplots(num_targets, 1, figsize=(12, 5*num_targets), sharex=True)
-    
-    if num_targets == 1:
-        axes = [axes]
-    
-    colors = ['blue', 'green', 'purple']
-    pred_colors = ['red', 'orange', 'pink']
-    
-    for i, (target, pred_df) in enumerate(predictions.items()):
-        ax = axes[i]
-        ax.plot(df.index, df[target], label=f'{target} historiques', color=colors[i])
-        
-        last_date = df.index[-1]
-        last_value = df[target].iloc[-1]
-        all_pred_dates = [last_date] + list(pred_df.index)
-        all_pred_values = [last_value] + list(pred_df[f'predicted_{target}'])
-        
-        ax.plot(all_pred_dates, all_pred_values, label=f'Prédictions {target}', color=pred_colors[i])
-        ax.set_ylabel(f"Nombre de {target}")
-        ax.legend()
-        ax.grid(True)
-    
-    plt.suptitle(f"Prédictions COVID-19 pour {country_name}")
-    plt.xlabel('Date')
-    plt.tight_layout()
-    
-    output_path = os.path.join(output_dir, f"{country_name}_combined_predictions.png")
-    plt.savefig(output_path)
-    plt.close()
+    return (renderer or Renderer(fmt)).combined(df, predictions, country_name, output_dir)
+
 
 def save_metrics(metrics: dict, country_name: str, target: str, output_dir="visualization"):
     """Sauvegarde les métriques d'évaluation du modèle."""
@@ -74,117 +206,30 @@ def save_metrics(metrics: dict, country_name: str, target: str, output_dir="visu
         for key, value in metrics.items():
             f.write(f"{key}: {value}\n")
 
-def plot_residuals(y_true, y_pred, country_name, target, output_dir="visualization"):
+
+def plot_residuals(y_true, y_pred, country_name, target, output_dir="visualization", fmt="png", renderer=None):
     """Génère et sauvegarde le graphique des résidus."""
-    ensure_dir_exists(output_dir)
-    residuals = y_true - y_pred
-    plt.figure(figsize=(10, 5))
-    plt.scatter(y_pred, residuals, alpha=0.5)
-    plt.axhline(0, color='red')
-    plt.xlabel("Valeurs prédites")
-    plt.ylabel("Résidus (y_true - y_pred)")
-    plt.title(f"Résidus du modèle pour {country_name} ({target})")
-    plt.tight_layout()
-    
-    output_path = os.path.join(output_dir, f"{country_name}_{target}_residuals.png")
-    plt.savefig(output_path)
-    plt.close()
-
-def plot_mortality_rate(df, cases_preds, deaths_preds, country_name, output_dir="visualization"):
+    return (renderer or Renderer(fmt)).residuals(y_true, y_pred, country_name, target, output_dir)
+
+
+def plot_mortality_rate(df, cases_preds, deaths_preds, country_name, output_dir="visualization", fmt="png",
+                        renderer=None):
     """Calcule et affiche le taux de mortalité (new_deaths / new_cases) historique et prédit."""
-    ensure_dir_exists(output_dir)
-    
-    # Calcul du taux de mortalité historique
-    historical_rate = (df['new_deaths'] / df['new_cases']).replace([np.inf, -np.inf], np.nan).fillna(0) * 100
-    
-    # Calcul du taux de mortalité prédit
-    pred_rate = (deaths_preds['predicted_new_deaths'] / cases_preds['predicted_new_cases']).replace([np.inf, -np.inf], np.nan).fillna(0) * 100
-    
-    # Création du graphique
-    plt.figure(figsize=(12, 6))
-    
-    # Taux historique
-    plt.plot(df.index, historical_rate, label='Taux de mortalité historique', color='blue')
-    
-    # Taux prédit
-    last_date = df.index[-1]
-    last_value = historical_rate.iloc[-1]
-    all_pred_dates = [last_date] + list(deaths_preds.index)
-    all_pred_values = [last_value] + list(pred_rate)
-    
-    plt.plot(all_pred_dates, all_pred_values, label='Taux de mortalité prédit', color='red')
-    
-    # Calcul et affichage de la variation
-    if len(pred_rate) > 0:
-        initial_rate = historical_rate.iloc[-1]
-        final_rate = pred_rate.iloc[-1]
-        variation = final_rate - initial_rate
-        variation_text = f"Variation prévue: {variation:.2f}%"
-        plt.annotate(variation_text, xy=(0.05, 0.95), xycoords='axes fraction',
-                    bbox=dict(boxstyle='round', facecolor='white', alpha=0.8))
-    
-    plt.title(f"Taux de mortalité (décès/cas) pour {country_name}")
-    plt.xlabel('Date')
-    plt.ylabel('Taux de mortalité (%)')
-    plt.legend()
-    plt.grid(True)
-    plt.tight_layout()
-    
-    output_path = os.path.join(output_dir, f"{country_name}_mortality_rate.png")
-    plt.savefig(output_path)
-    plt.close()
-
-def plot_recovery_rate(df, cases_preds, recovered_preds, country_name, output_dir="visualization"):
+    return (renderer or Renderer(fmt)).rate('mortality', df, cases_preds, deaths_preds, country_name, output_dir)
+
+
+def plot_recovery_rate(df, cases_preds, recovered_preds, country_name, output_dir="visualization", fmt="png",
+                       renderer=None):
     """Calcule et affiche le taux de guérison (new_recovered / new_cases) historique et prédit."""
-    ensure_dir_exists(output_dir)
-    
-    # Calcul du taux de guérison historique
-    historical_rate = (df['new_recovered'] / df['new_cases']).replace([np.inf, -np.inf], np.nan).fillna(0) * 100
-    
-    # Calcul du taux de guérison prédit
-    pred_rate = (recovered_preds['predicted_new_recovered'] / cases_preds['predicted_new_cases']).replace([np.inf, -np.inf], np.nan).fillna(0) * 100
-    
-    # Création du graphique
-    plt.figure(figsize=(12, 6))
-    
-    # Taux historique
-    plt.plot(df.index, historical_rate, label='Taux de guérison historique', color='blue')
-    
-    # Taux prédit
-    last_date = df.index[-1]
-    last_value = historical_rate.iloc[-1]
-    all_pred_dates = [last_date] + list(recovered_preds.index)
-    all_pred_values = [last_value] + list(pred_rate)
-    
-    plt.plot(all_pred_dates, all_pred_values, label='Taux de guérison prédit', color='green')
-    
-    # Calcul et affichage de la variation
-    if len(pred_rate) > 0:
-        initial_rate = historical_rate.iloc[-1]
-        final_rate = pred_rate.iloc[-1]
-        variation = final_rate - initial_rate
-        variation_text = f"Variation prévue: {variation:.2f}%"
-        plt.annotate(variation_text, xy=(0.05, 0.95), xycoords='axes fraction',
-                    bbox=dict(boxstyle='round', facecolor='white', alpha=0.8))
-    
-    plt.title(f"Taux de guérison (guéris/cas) pour {country_name}")
-    plt.xlabel('Date')
-    plt.ylabel('Taux de guérison (%)')
-    plt.legend()
-    plt.grid(True)
-    plt.tight_layout()
-    
-    output_path = os.path.join(output_dir, f"{country_name}_recovery_rate.png")
-    plt.savefig(output_path)
-    plt.close()
+    return (renderer or Renderer(fmt)).rate('recovery', df, cases_preds, recovered_preds, country_name, output_dir)
 
 def save_mortality_stats(cases_preds, deaths_preds, country_name, output_dir="visualization"):
     """Sauvegarde les statistiques de mortalité dans un fichier texte."""
     ensure_dir_exists(output_dir)
-    
+
     # Calcul des taux de mortalité
     mortality_rate = (deaths_preds['predicted_new_deaths'] / cases_preds['predicted_new_cases']).replace([np.inf, -np.inf], np.nan).fillna(0) * 100
-    
+
     # Calcul de la variation
     if len(mortality_rate) > 1:
         initial_rate = mortality_rate.iloc[0]
@@ -194,7 +239,7 @@ def save_mortality_stats(cases_preds, deaths_preds, country_name, output_dir="vi
     else:
         variation = 0
         variation_pct = 0
-    
+
     # Sauvegarde dans un fichier
     output_path = os.path.join(output_dir, f"{country_name}_mortality_stats.txt")
     with open(output_path, "w") as f:
@@ -209,10 +254,10 @@ def save_mortality_stats(cases_preds, deaths_preds, country_name, output_dir="vi
 def save_recovery_stats(cases_preds, recovered_preds, country_name, output_dir="visualization"):
     """Sauvegarde les statistiques de guérison dans un fichier texte."""
     ensure_dir_exists(output_dir)
-    
+
     # Calcul des taux de guérison
     recovery_rate = (recovered_preds['predicted_new_recovered'] / cases_preds['predicted_new_cases']).replace([np.inf, -np.inf], np.nan).fillna(0) * 100
-    
+
     # Calcul de la variation
     if len(recovery_rate) > 1:
         initial_rate = recovery_rate.iloc[0]
@@ -222,7 +267,7 @@ def save_recovery_stats(cases_preds, recovered_preds, country_name, output_dir="
     else:
         variation = 0
         variation_pct = 0
-    
+
     # Sauvegarde dans un fichier
     output_path = os.path.join(output_dir, f"{country_name}_recovery_stats.txt")
     with open(output_path, "w") as f:
@@ -234,30 +279,76 @@ def save_recovery_stats(cases_preds, recovered_preds, country_name, output_dir="
         for date, rate in recovery_rate.items():
             f.write(f"{date.date()}: {rate:.2f}%\n")
 
-def visualize_all_results(df, predictions, country_name, output_dir="visualization"):
+@timed()
+def visualize_all_results(df, predictions, country_name, output_dir="visualization", fmt="png", renderer=None,
+                          stats=True):
     """
     Génère toutes les visualisations pour les résultats.
-    
+
     Args:
         df: DataFrame contenant les données historiques.
         predictions: Dictionnaire des prédictions (clé: nom de la cible, valeur: DataFrame de prédictions).
         country_name: Nom du pays.
         output_dir: Répertoire de sortie.
+        fmt: Format des graphiques ("png", "svg" ou "none" : seules les statistiques sont écrites).
+        renderer: Renderer à utiliser (ex: avec réutilisation des figures) ; par défaut un Renderer(fmt).
+        stats: Écrire les statistiques de mortalité et de guérison dans des fichiers texte.
     """
+    renderer = renderer or Renderer(fmt)
+
     # Graphiques individuels pour chaque target
     for target, pred_df in predictions.items():
-        plot_predictions(df, pred_df, target, country_name, output_dir)
-    
+        renderer.predictions(df, pred_df, target, country_name, output_dir)
+
     # Graphique combiné si plusieurs targets
     if len(predictions) > 1:
-        plot_combined_predictions(df, predictions, country_name, output_dir)
-        
+        renderer.combined(df, predictions, country_name, output_dir)
+
         # Graphique spécifique pour le taux de mortalité si new_cases et new_deaths sont présents
         if 'new_cases' in predictions and 'new_deaths' in predictions:
-            plot_mortality_rate(df, predictions['new_cases'], predictions['new_deaths'], country_name, output_dir)
-            save_mortality_stats(predictions['new_cases'], predictions['new_deaths'], country_name, output_dir)
-        
+            renderer.rate('mortality', df, predictions['new_cases'], predictions['new_deaths'], country_name, output_dir)
+            if stats:
+                save_mortality_stats(predictions['new_cases'], predictions['new_deaths'], country_name, output_dir)
+
         # Graphique spécifique pour le taux de guérison si new_cases et new_recovered sont présents
         if 'new_cases' in predictions and 'new_recovered' in predictions:
-            plot_recovery_rate(df, predictions['new_cases'], predictions['new_recovered'], country_name, output_dir)
-            save_recovery_stats(predictions['new_cases'], predictions['new_recovered'], country_name, output_dir)
\ No newline at end of file
+            renderer.rate('recovery', df, predictions['new_cases'], predictions['new_recovered'], country_name, output_dir)
+            if stats:
+                save_recovery_stats(predictions['new_cases'], predictions['new_recovered'], country_name, output_dir)
+
+
+# Renderer propre à chaque processus du pool (les modèles de figures y sont réutilisés)
+_process_renderer = None
+
+
+def _render_country(df, predictions, country_name, output_dir, fmt, reuse, stats):
+    global _process_renderer
+    if _process_renderer is None or (_process_renderer.fmt, _process_renderer.reuse) != (fmt, reuse):
+        _process_renderer = Renderer(fmt, reuse=reuse)
+    visualize_all_results(df, predictions, country_name, output_dir, renderer=_process_renderer, stats=stats)
+    return country_name
+
+
+def visualize_many(jobs, output_dir="visualization", fmt="png", workers=None, reuse=True, stats=True):
+    """
+    Génère les visualisations de plusieurs pays, réparties sur un pool de processus.
+
+    Args:
+        jobs: Liste de tuples (df, predictions, country_name).
+        output_dir: Répertoire de sortie.
+        fmt: Format des graphiques ("png", "svg" ou "none").
+        workers: Nombre de processus (1 pour rester dans le processus courant).
+        reuse: Réutiliser les figures d'un pays à l'autre dans chaque processus.
+        stats: Écrire les statistiques de mortalité et de guérison dans des fichiers texte.
+
+    Returns:
+        Liste des pays traités.
+    """
+    jobs = [(df[[c for c in df.columns if c in ('new_cases', 'new_deaths', 'new_recovered')]], predictions, country)
+            for df, predictions, country in jobs]
+    if workers == 1 or len(jobs) <= 1 or fmt == "none":
+        return [_render_country(df, predictions, country, output_dir, fmt, reuse, stats) for df, predictions, country in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_render_country, df, predictions, country, output_dir, fmt, reuse, stats)
+                   for df, predictions, country in jobs]
+        return [future.result() for future in futures]
@@ -0,0 +1,41 @@
+"""
+Met à jour la table pré-agrégée Country_Daily_Series à partir de Global_Data.
+
+    python scripts/refresh_daily_series.py                # recalcule les 7 derniers jours
+    python scripts/refresh_daily_series.py --days 30
+    python scripts/refresh_daily_series.py --full         # reconstruction complète
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pandas as pd
+from sqlalchemy import text
+from predictor.database import DAILY_SERIES_TABLE, get_engine, load_db_config, refresh_daily_series
+
+
+def main():
+    parser = argparse.ArgumentParser(description=f"Rafraîchit la table {DAILY_SERIES_TABLE}")
+    parser.add_argument("--db-config", type=str, default=None, help="Fichier INI de connexion à la base")
+    parser.add_argument("--days", type=int, default=7,
+                        help="Nombre de jours recalculés avant la dernière date agrégée (corrections tardives)")
+    parser.add_argument("--full", action="store_true", help="Recalculer toute la table")
+    args = parser.parse_args()
+
+    engine = get_engine(load_db_config(args.db_config))
+    since = None
+    if not args.full:
+        with engine.connect() as connection:
+            last_date = connection.execute(text(f"SELECT MAX(date) FROM {DAILY_SERIES_TABLE}")).scalar()
+        if last_date is not None:
+            since = pd.Timestamp(last_date) - pd.Timedelta(days=args.days)
+
+    rows = refresh_daily_series(engine, since=since)
+    print(f"{rows} lignes (pays, jour) écrites dans {DAILY_SERIES_TABLE}"
+          + (f" depuis le {since.date()}" if since is not None else " (reconstruction complète)"))
+
+
+if __name__ == "__main__":
+    main()